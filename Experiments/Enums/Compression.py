@@ -0,0 +1,5 @@
+from enum import Enum
+class Compression(str, Enum):
+    NONE = "none"
+    GZIP = "gzip"
+    ZSTD = "zstd"
@@ -3,4 +3,7 @@ class CongestionControlType(str, Enum):
     BBR = "bbr"
     VEGAS = "vegas"
     RENO = "reno"
-    RL = "rl"
\ No newline at end of file
+    RL = "rl"
+    NEURAL = "neural"
+    DCTCP = "dctcp"
+    CUBIC = "cubic"
\ No newline at end of file
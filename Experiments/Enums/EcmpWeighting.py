@@ -0,0 +1,4 @@
+from enum import Enum
+class EcmpWeighting(str, Enum):
+    EQUAL = "equal"
+    BANDWIDTH = "bandwidth"
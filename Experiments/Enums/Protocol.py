@@ -0,0 +1,4 @@
+from enum import Enum
+class Protocol(str, Enum):
+    TCP = "tcp"
+    UDP = "udp"
\ No newline at end of file
@@ -0,0 +1,7 @@
+from enum import Enum
+class QueueDiscipline(str, Enum):
+    FIFO = "fifo"
+    RED = "red"
+    CODEL = "codel"
+    FQ_CODEL = "fq_codel"
+    PRIORITY = "priority"
\ No newline at end of file
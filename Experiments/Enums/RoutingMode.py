@@ -0,0 +1,4 @@
+from enum import Enum
+class RoutingMode(str, Enum):
+    STATIC = "static"
+    ECMP = "ecmp"
@@ -0,0 +1,5 @@
+from enum import Enum
+class TimeUnit(str, Enum):
+    MS = "ms"
+    US = "us"
+    NS = "ns"
@@ -0,0 +1,8 @@
+from enum import IntEnum
+class TraceEvent(IntEnum):
+    SEND = 0
+    ENQUEUE = 1
+    DEQUEUE = 2
+    DROP = 3
+    DELIVER = 4
+    ACK = 5
\ No newline at end of file
@@ -0,0 +1,120 @@
+from typing import Optional
+
+
+class ReceiveState:
+    """Receiver side state of one incoming flow at a host."""
+    next_expected: int
+    out_of_order: set
+    segments_since_ack: int
+    ack_deadline: Optional[int]
+    ce_pending: bool
+    ack_path: tuple[str, ...]
+    flow_label: Optional[int]
+
+    def __init__(self, ack_path: tuple[str, ...], flow_label: Optional[int] = None):
+        """Constructor for the receive state.
+
+        Args:
+            ack_path (tuple[str, ...]): The path ACKs take back to the sender, shared by all its ACKs
+            flow_label (Optional[int], optional): The ECMP label of the ACKs, None for source routed ACKs. Defaults to None.
+        """
+        self.next_expected = 0
+        self.out_of_order = set()
+        self.segments_since_ack = 0
+        self.ack_deadline = None
+        self.ce_pending = False
+        self.ack_path = ack_path
+        self.flow_label = flow_label
+
+    def on_segment(self, seq_num: int) -> bool:
+        """Records an arriving data segment.
+
+        Args:
+            seq_num (int): The sequence number of the segment
+
+        Returns:
+            bool: True if the segment arrived in order and did not fill a hole
+        """
+        if seq_num == self.next_expected:
+            self.next_expected += 1
+            filled_hole = False
+            while self.next_expected in self.out_of_order:
+                self.out_of_order.remove(self.next_expected)
+                self.next_expected += 1
+                filled_hole = True
+            return not filled_hole
+        if seq_num > self.next_expected:
+            self.out_of_order.add(seq_num)
+        return False
+
+    def cumulative_ack(self) -> int:
+        """Gets the highest sequence number received with nothing missing below it.
+
+        Returns:
+            int: The cumulative ACK number, -1 before the first segment
+        """
+        return self.next_expected - 1
+
+    def sack_blocks(self, max_blocks: int) -> tuple[tuple[int, int], ...]:
+        """Gets the received ranges above the cumulative ACK, highest first.
+
+        Args:
+            max_blocks (int): The most blocks to report
+
+        Returns:
+            tuple[tuple[int, int], ...]: Inclusive (start, end) sequence ranges, the shared empty tuple when in order
+        """
+        if not self.out_of_order or max_blocks <= 0:
+            return ()
+        blocks = []
+        ordered = sorted(self.out_of_order, reverse=True)
+        end = start = ordered[0]
+        for seq in ordered[1:]:
+            if seq == start - 1:
+                start = seq
+                continue
+            blocks.append((start, end))
+            if len(blocks) >= max_blocks:
+                return tuple(blocks)
+            end = start = seq
+        blocks.append((start, end))
+        return tuple(blocks[:max_blocks])
+
+
+class AckPolicy:
+    """Decides when a receiver sends an ACK.
+    Out of order or hole filling segments are ACKed at once, in order ones every ack_every
+    segments or once max_delay_ms has passed since the first unACKed one.
+    """
+    ack_every: int
+    max_delay_ms: int
+    sack: bool
+    max_sack_blocks: int
+
+    def __init__(self, ack_every: int = 1, max_delay_ms: int = 0, sack: bool = True, max_sack_blocks: int = 3):
+        """Constructor for the ACK policy.
+
+        Args:
+            ack_every (int, optional): In order segments covered by one ACK. Defaults to 1.
+            max_delay_ms (int, optional): Longest an ACK may be held back. Defaults to 0.
+            sack (bool, optional): If ACKs carry SACK blocks. Defaults to True.
+            max_sack_blocks (int, optional): The most SACK blocks per ACK. Defaults to 3.
+        """
+        self.ack_every = max(ack_every, 1)
+        self.max_delay_ms = max_delay_ms
+        self.sack = sack
+        self.max_sack_blocks = max_sack_blocks
+
+    def should_ack_now(self, state: ReceiveState, in_order: bool) -> bool:
+        """Checks if the segment just recorded in state needs an immediate ACK.
+
+        Args:
+            state (ReceiveState): The flow's receive state
+            in_order (bool): If the segment arrived in order
+
+        Returns:
+            bool: True to ACK now, False to hold the ACK until the deadline
+        """
+        if not in_order or state.ce_pending:
+            return True
+        return state.segments_since_ack >= self.ack_every or self.max_delay_ms <= 0
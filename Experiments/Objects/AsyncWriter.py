@@ -0,0 +1,263 @@
+from Enums.Compression import Compression
+from typing import Optional
+import atexit
+import os
+import queue
+import threading
+import zlib
+
+# File suffix each compression adds to the stream's path
+SUFFIXES = {Compression.NONE: "", Compression.GZIP: ".gz", Compression.ZSTD: ".zst"}
+
+
+class _Encoder:
+    """Compresses one file's chunks as a single stream, on the writer thread."""
+
+    def __init__(self, compression: Compression, level: Optional[int]):
+        """Constructor for the encoder.
+
+        Args:
+            compression (Compression): The format to write
+            level (Optional[int]): The compression level, None for the format's default
+
+        Raises:
+            ValueError: When zstd is asked for without the zstandard package
+        """
+        self.compression = compression
+        if compression == Compression.GZIP:
+            # wbits 31 writes a gzip header and trailer, readable by gzip.open
+            self.compressor = zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 31)
+        elif compression == Compression.ZSTD:
+            try:
+                import zstandard
+            except ImportError:
+                raise ValueError("zstd compression needs the zstandard package, pip install zstandard")
+            self.compressor = zstandard.ZstdCompressor(level=3 if level is None else level).compressobj()
+        else:
+            self.compressor = None
+
+    def encode(self, data: bytes) -> bytes:
+        """Compresses a chunk.
+
+        Args:
+            data (bytes): The raw chunk
+
+        Returns:
+            bytes: What to append to the file, possibly nothing until the compressor's window fills
+        """
+        return data if self.compressor is None else self.compressor.compress(data)
+
+    def finish(self) -> bytes:
+        """Ends the compressed stream.
+
+        Returns:
+            bytes: The last compressed bytes and the format's trailer
+        """
+        return b"" if self.compressor is None else self.compressor.flush()
+
+
+class WriterStream:
+    """A text file written by an AsyncWriter.
+    Writes only append to the active buffer. A full buffer is swapped for an empty one and handed to the writer thread,
+    which joins, compresses and writes it while the simulation fills the other.
+    """
+    path: str
+    rotated_paths: list[str]  # the files earlier rotations moved the stream's content to
+    closed: bool
+
+    def __init__(self, writer: 'AsyncWriter', path: str):
+        """Constructor for the stream, use AsyncWriter.open.
+
+        Args:
+            writer (AsyncWriter): The writer that owns the file
+            path (str): The file, including the compression suffix
+        """
+        self.writer = writer
+        self.path = path
+        self.rotated_paths = []
+        self.buffer = []
+        self.buffered = 0
+        self.closed = False
+        # Only touched by the writer thread
+        self.file = None
+        self.encoder = None
+
+    @property
+    def name(self) -> str:
+        """The path of the file, as for a built in file object."""
+        return self.path
+
+    def write(self, text: str):
+        """Appends text to the file.
+
+        Args:
+            text (str): The text to append
+        """
+        self.buffer.append(text)
+        self.buffered += len(text)
+        if self.buffered >= self.writer.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Hands the buffered text to the writer thread, without waiting for it to be written."""
+        if self.buffer:
+            chunk, self.buffer = self.buffer, []
+            self.buffered = 0
+            self.writer.submit(self, "write", chunk)
+
+    def rotate(self, suffix: str = ".1"):
+        """Ends the file, renames it with suffix before the compression suffix, replacing an older one, and starts a new file at path.
+
+        Args:
+            suffix (str, optional): Appended to the old file's path. Defaults to ".1".
+        """
+        self.flush()
+        extension = SUFFIXES[self.writer.compression]
+        rotated = self.path[:len(self.path) - len(extension)] + suffix + extension
+        if rotated not in self.rotated_paths:
+            self.rotated_paths.append(rotated)
+        self.writer.submit(self, "rotate", suffix)
+
+    def paths(self) -> list[str]:
+        """Gets every file the stream wrote.
+
+        Returns:
+            list[str]: The path and the rotated files
+        """
+        return [self.path] + self.rotated_paths
+
+    def close(self):
+        """Flushes the stream and has the writer thread close the file."""
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+        self.writer.submit(self, "close", None)
+
+
+class AsyncWriter:
+    """Writes the run's text files from a background thread, so slow disks do not stall the simulation.
+    Chunks reach the thread through a bounded queue; when the disk falls that far behind, the simulation waits for it.
+    Every file is flushed and closed on close(), which also runs at interpreter exit if a run ends by an exception.
+    """
+    compression: Compression
+    level: Optional[int]
+    chunk_size: int
+    streams: list[WriterStream]
+    error: Optional[BaseException]
+
+    def __init__(self, compression: Compression = Compression.NONE, level: Optional[int] = None, chunk_size: int = 1 << 18, max_chunks: int = 16):
+        """Constructor for the writer, starts its thread.
+
+        Args:
+            compression (Compression, optional): The format of every file. Defaults to Compression.NONE.
+            level (Optional[int], optional): The compression level, None for the format's default. Defaults to None.
+            chunk_size (int, optional): Characters a stream buffers before handing them to the thread. Defaults to 262144.
+            max_chunks (int, optional): Chunks queued before writes block. Defaults to 16.
+
+        Raises:
+            ValueError: When a non valid compression is picked, or zstd without the zstandard package
+        """
+        try:
+            self.compression = Compression(compression)
+        except ValueError:
+            raise ValueError("Not a valid compression enum used")
+        self.level = level
+        # Fails here rather than on the thread when zstandard is missing
+        _Encoder(self.compression, level)
+        self.chunk_size = chunk_size
+        self.streams = []
+        self.error = None
+        self.closed = False
+        self.queue = queue.Queue(max_chunks)
+        self.thread = threading.Thread(target=self._run, name="async-writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def open(self, path: str) -> WriterStream:
+        """Starts a file, truncating any existing one.
+
+        Args:
+            path (str): The file, without the compression suffix
+
+        Returns:
+            WriterStream: The stream to write to
+        """
+        stream = WriterStream(self, path + SUFFIXES[self.compression])
+        self.streams.append(stream)
+        self.submit(stream, "open", None)
+        return stream
+
+    def submit(self, stream: WriterStream, op: str, data):
+        """Queues work for the writer thread, waiting while the queue is full.
+
+        Args:
+            stream (WriterStream): The stream the work is for
+            op (str): open, write, rotate or close
+            data: The chunk of a write, the suffix of a rotate
+
+        Raises:
+            ValueError: When the writer is already closed
+            OSError: The first error the writer thread hit
+        """
+        if self.closed:
+            raise ValueError("Write to a closed AsyncWriter")
+        self.raise_error()
+        self.queue.put((stream, op, data))
+
+    def raise_error(self):
+        """Raises the first error the writer thread hit, once."""
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _run(self):
+        """Writes queued chunks until close. After an error the queue keeps draining so the simulation never blocks on it."""
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            stream, op, data = item
+            try:
+                if self.error is None:
+                    self._apply(stream, op, data)
+            except BaseException as e:
+                self.error = e
+
+    def _apply(self, stream: WriterStream, op: str, data):
+        """Carries out one queued operation.
+
+        Args:
+            stream (WriterStream): The stream the work is for
+            op (str): open, write, rotate or close
+            data: The chunk of a write, the suffix of a rotate
+        """
+        if op == "write":
+            stream.file.write(stream.encoder.encode("".join(data).encode()))
+            return
+        if op in ("rotate", "close") and stream.file is not None:
+            stream.file.write(stream.encoder.finish())
+            stream.file.close()
+            stream.file = None
+        if op == "rotate":
+            extension = SUFFIXES[self.compression]
+            os.replace(stream.path, stream.path[:len(stream.path) - len(extension)] + data + extension)
+        if op in ("open", "rotate"):
+            stream.file = open(stream.path, "wb")
+            stream.encoder = _Encoder(self.compression, self.level)
+
+    def close(self):
+        """Flushes and closes every stream and waits for the thread to write them.
+
+        Raises:
+            OSError: The first error the writer thread hit
+        """
+        if self.closed:
+            return
+        for stream in self.streams:
+            stream.close()
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join()
+        atexit.unregister(self.close)
+        self.raise_error()
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 from typing import Optional
 from Enums.BBRStage import BBRStage
+from Objects.WindowedFilter import WindowedFilter
+from Objects.RTTEstimator import RTTEstimator
 import random
 import math
 
@@ -10,11 +12,13 @@ class CongestionControl(ABC):
     def __init__(self):
         self.cwnd: float = 1.0
         self.ssthresh: float = 64
-        self.rto: int = 1000
+        self.rtt_estimator: RTTEstimator = RTTEstimator()
         self.last_ack_tick: int = 0
         self.dup_ack_count: int = 0
         self.in_fast_recovery: bool = False
         self.recovery_seq: int = 0
+        self.ecn_capable: bool = False
+        self.ecn_recovery_seq: int = -1
     
     @abstractmethod
     def on_packet_sent(self, seq_num: int, current_tick: int):
@@ -65,6 +69,35 @@ class CongestionControl(ABC):
         """
         pass
     
+    def on_rtt_sample(self, seq_num: int, rtt: float, current_tick: int):
+        """Called with the RTT of a packet that was sent once, before on_ack_received for the same packet.
+
+        Args:
+            seq_num (int): The seq number of the ACKed packet
+            rtt (float): The ms between sending the packet and getting its ACK
+            current_tick (int): The current tick in the simulation
+        """
+        self.rtt_estimator.add_sample(rtt)
+
+    def on_ecn(self, ack_num: int, current_tick: int, segments: int = 1) -> Optional[float]:
+        """Called when an ACK echoes a congestion mark, before on_ack_received for the same ACK.
+        Halves the window at most once per window of data, like a loss without the retransmit (RFC 3168).
+
+        Args:
+            ack_num (int): The ACK number carrying the echo
+            current_tick (int): The current tick in the simulation
+            segments (int, optional): The segments the ACK newly covers. Defaults to 1.
+
+        Returns:
+            Optional[float]: The new CWND, None if the mark was ignored
+        """
+        if ack_num <= self.ecn_recovery_seq:
+            return None
+        self.ssthresh = max(self.cwnd / 2, 2)
+        self.cwnd = self.ssthresh
+        self.ecn_recovery_seq = ack_num + int(self.cwnd)
+        return self.cwnd
+
     def get_cwnd(self) -> float:
         """Gets the current CWND.
 
@@ -81,13 +114,34 @@ class CongestionControl(ABC):
         """
         return self.ssthresh
     
-    def get_rto(self) -> int:
+    def get_rto(self) -> float:
         """Gets the retransmission timeout time.
 
         Returns:
-            int: The retransmission timeout time
+            float: The retransmission timeout time in ms
+        """
+        return self.rtt_estimator.get_rto()
+
+    def get_smoothed_rtt(self) -> Optional[float]:
+        """Gets the RTT the controller currently believes in.
+
+        Returns:
+            Optional[float]: The SRTT in ms, None when there are no samples yet
+        """
+        return self.rtt_estimator.srtt
+
+    def get_pacing_rate(self) -> Optional[float]:
+        """Gets the rate the host should release packets at.
+        Spreads the cwnd over one RTT, with the usual 2x gain in slow start and 1.2x after.
+
+        Returns:
+            Optional[float]: The pacing rate in packets per ms, None to send as the cwnd allows
         """
-        return self.rto
+        rtt = self.get_smoothed_rtt()
+        if not rtt:
+            return None
+        gain = 2.0 if self.cwnd < self.ssthresh else 1.2
+        return gain * self.cwnd / rtt
 
 
 class RenoCongestionControl(CongestionControl):
@@ -163,25 +217,101 @@ class RenoCongestionControl(CongestionControl):
             return self.cwnd
         return None
     
+class DCTCPCongestionControl(RenoCongestionControl):
+    """DCTCP congestion control (RFC 8257).
+    Grows like Reno, but on ECN marks cuts the window in proportion to the fraction of marked ACKs.
+    """
+
+    def __init__(self, g: float = 1 / 16):
+        """Constructor for DCTCP.
+
+        Args:
+            g (float, optional): The EWMA gain of the marked fraction. Defaults to 1/16.
+        """
+        super().__init__()
+        self.ecn_capable = True
+        self.g = g
+        self.alpha = 1.0
+        self.acked_in_window = 0
+        self.marked_in_window = 0
+        self.window_end = 0
+
+    def on_ecn(self, ack_num: int, current_tick: int, segments: int = 1) -> Optional[float]:
+        """Counts the marked segments, the reaction waits for the end of the window.
+
+        Args:
+            ack_num (int): The ACK number carrying the echo
+            current_tick (int): The current tick in the simulation
+            segments (int, optional): The segments the ACK newly covers. Defaults to 1.
+
+        Returns:
+            Optional[float]: None, the CWND changes at the end of the window
+        """
+        # Each segment the ACK covers is counted in acked_in_window too, so the fraction stays per segment
+        self.marked_in_window += segments
+        return None
+
+    def on_ack_received(self, ack_num: int, current_tick: int) -> Optional[float]:
+        """Grows like Reno, and once per window updates alpha and cuts by alpha / 2 if anything was marked.
+
+        Args:
+            ack_num (int): The ACK number.
+            current_tick (int): The current tick in the simulation
+
+        Returns:
+            Optional[float]: The new CWND after an ACK is received
+        """
+        super().on_ack_received(ack_num, current_tick)
+        self.acked_in_window += 1
+        if ack_num >= self.window_end:
+            fraction = self.marked_in_window / self.acked_in_window
+            self.alpha = (1 - self.g) * self.alpha + self.g * fraction
+            if self.marked_in_window > 0:
+                self.ssthresh = max(self.cwnd * (1 - self.alpha / 2), 2)
+                self.cwnd = self.ssthresh
+            self.window_end = ack_num + max(int(self.cwnd), 1)
+            self.acked_in_window = 0
+            self.marked_in_window = 0
+        return self.cwnd
+
+
 class VegasCongestionControl(CongestionControl):
     """TCP Vegas congestion control algorithm implementation."""
     
-    def __init__(self):
+    def __init__(self, alpha: float = 1.0, beta: float = 3.0):
+        """Constructor for Vegas.
+
+        Args:
+            alpha (float, optional): Grow while fewer than alpha extra packets sit in queues. Defaults to 1.0.
+            beta (float, optional): Shrink once more than beta extra packets sit in queues. Defaults to 3.0.
+        """
         super().__init__()
         self.base_rtt: float = float('inf')
         self.current_rtt: float = float('inf')
-        self.alpha: float = 1.0
-        self.beta: float = 3.0
-        self.packet_sent_times: dict[int, int] = {}
+        self.alpha: float = alpha
+        self.beta: float = beta
         
     def on_packet_sent(self, seq_num: int, current_tick: int):
-        """Called when a packet is sent.
+        """No events on packet sent, RTT samples come from on_rtt_sample.
 
         Args:
             seq_num (int): The sequence number of the sent packet
             current_tick (int): The current tick of the simulation
         """
-        self.packet_sent_times[seq_num] = current_tick
+        pass
+
+    def on_rtt_sample(self, seq_num: int, rtt: float, current_tick: int):
+        """Updates the current and base RTT.
+
+        Args:
+            seq_num (int): The seq number of the ACKed packet
+            rtt (float): The RTT of the packet in ms
+            current_tick (int): The current tick in the simulation
+        """
+        super().on_rtt_sample(seq_num, rtt, current_tick)
+        self.current_rtt = rtt
+        if self.current_rtt < self.base_rtt:
+            self.base_rtt = self.current_rtt
         
     def on_ack_received(self, ack_num: int, current_tick: int) -> Optional[float]:
         """Called when an ACK is received.
@@ -195,18 +325,6 @@ class VegasCongestionControl(CongestionControl):
         """
         self.last_ack_tick = current_tick
         
-        # Calculate RTT if we have the sent time for this packet
-        if ack_num in self.packet_sent_times:
-            sent_time = self.packet_sent_times[ack_num]
-            self.current_rtt = current_tick - sent_time
-            
-            # Update base RTT (minimum observed RTT)
-            if self.current_rtt < self.base_rtt:
-                self.base_rtt = self.current_rtt
-            
-            # Remove the recorded sent time
-            del self.packet_sent_times[ack_num]
-        
         # Calculate expected and actual throughput using base RTT and current RTT
         if self.base_rtt != float('inf') and self.current_rtt != float('inf'):
             expected_throughput = self.cwnd / self.base_rtt
@@ -272,35 +390,110 @@ class VegasCongestionControl(CongestionControl):
 
 
 class BBRCongestionControl(CongestionControl):
-    """BBR congestion control."""
-    
-    def __init__(self):
+    """BBR congestion control.
+    Samples the delivery rate and RTT of every ACKed packet and keeps them in windowed filters:
+    a max filter over the last 10 rounds for the bottleneck bandwidth and a min filter over
+    10 seconds for RTprop. The cwnd and pacing rate are both built from these estimates.
+    """
+    STARTUP_GAIN = 2.885  # 2 / ln(2)
+    PROBE_BW_GAINS = [1.25, 0.75, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0]
+    BTL_BW_WINDOW_ROUNDS = 10
+    RT_PROP_WINDOW_MS = 10000
+    PROBE_RTT_MS = 200
+    MIN_CWND = 4.0
+
+    def __init__(self, startup_gain: float = STARTUP_GAIN, probe_bw_gains: Optional[list[float]] = None, btl_bw_window_rounds: int = BTL_BW_WINDOW_ROUNDS,
+                 rt_prop_window_ms: float = RT_PROP_WINDOW_MS, probe_rtt_ms: float = PROBE_RTT_MS, min_cwnd: float = MIN_CWND):
+        """Constructor for BBR, the defaults are the class constants.
+
+        Args:
+            startup_gain (float, optional): Pacing and cwnd gain of STARTUP. Defaults to 2 / ln(2).
+            probe_bw_gains (Optional[list[float]], optional): The pacing gain cycle of PROBE_BW. Defaults to PROBE_BW_GAINS.
+            btl_bw_window_rounds (int, optional): Rounds the bottleneck bandwidth max filter spans. Defaults to 10.
+            rt_prop_window_ms (float, optional): ms the RTprop min filter spans. Defaults to 10000.
+            probe_rtt_ms (float, optional): ms spent in PROBE_RTT. Defaults to 200.
+            min_cwnd (float, optional): The smallest cwnd. Defaults to 4.0.
+        """
         super().__init__()
-        self.btl_bw = 0.0
+        self.startup_gain = startup_gain
+        self.probe_bw_gains = list(probe_bw_gains) if probe_bw_gains is not None else list(self.PROBE_BW_GAINS)
+        self.rt_prop_window_ms = rt_prop_window_ms
+        self.probe_rtt_ms = probe_rtt_ms
+        self.min_cwnd = min_cwnd
+        self.btl_bw_filter = WindowedFilter(btl_bw_window_rounds, is_max=True)
+        self.rt_prop_filter = WindowedFilter(rt_prop_window_ms, is_max=False)
+        self.btl_bw = 0.0  # packets per ms
         self.rt_prop = float('inf')
-        self.min_rtt = float('inf')
+        self.rt_prop_stamp = 0
         self.delivery_rate = 0.0
-        self.pacing_gain = 2.89
-        self.cwnd_gain = 2.0 
+        self.pacing_gain = self.startup_gain
+        self.cwnd_gain = self.startup_gain
         self.state = BBRStage.STARTUP
         self.cycle_index = 0
-        self.rt_prop_stamp = 0
-        self.packet_count = 0
-        self.ack_count = 0
-        
+        self.cycle_stamp = 0
+
+        # Delivery rate sampling, seq -> (sent_tick, delivered, delivered_tick)
+        self.delivered = 0
+        self.delivered_tick = 0
+        self.packet_states: dict[int, tuple[int, int, int]] = {}
+
+        # Round counting
+        self.round_count = 0
+        self.next_round_delivered = 0
+        self.round_start = False
+
+        # Full pipe detection for leaving STARTUP
+        self.full_bw = 0.0
+        self.full_bw_count = 0
+        self.filled_pipe = False
+
+        self.probe_rtt_done_stamp = 0
+        self.prior_cwnd = 0.0
+
+    def get_pacing_rate(self) -> Optional[float]:
+        """Gets the pacing rate from the bottleneck bandwidth estimate.
+
+        Returns:
+            Optional[float]: The pacing rate in packets per ms, None before the first sample
+        """
+        if self.btl_bw <= 0:
+            return None
+        return self.pacing_gain * self.btl_bw
+
+    def get_smoothed_rtt(self) -> Optional[float]:
+        """Gets the RTprop estimate.
+
+        Returns:
+            Optional[float]: RTprop, None before the first sample
+        """
+        if self.rt_prop == float('inf'):
+            return None
+        return self.rt_prop
+
+    def get_bdp(self) -> float:
+        """Gets the estimated bandwidth delay product.
+
+        Returns:
+            float: The BDP in packets
+        """
+        if self.rt_prop == float('inf'):
+            return self.min_cwnd
+        return self.btl_bw * self.rt_prop
+
     def on_packet_sent(self, seq_num: int, current_tick: int):
-        """Called on a packet sent for BBR algorithm.
+        """Snapshots the delivery state so the ACK can compute a delivery rate.
 
         Args:
             seq_num (int): The sequence number of the sent packet
             current_tick (int): The current tick in the simulation
         """
-        self.packet_count += 1
-        if self.rt_prop_stamp == 0:
-            self.rt_prop_stamp = current_tick
-        
+        if not self.packet_states:
+            # Nothing in flight, restart the delivery clock from now
+            self.delivered_tick = current_tick
+        self.packet_states[seq_num] = (current_tick, self.delivered, self.delivered_tick)
+
     def on_ack_received(self, ack_num: int, current_tick: int) -> Optional[float]:
-        """Called when an ACK is received.
+        """Takes a delivery rate and RTT sample and updates the model.
 
         Args:
             ack_num (int): The ACK number received
@@ -310,66 +503,142 @@ class BBRCongestionControl(CongestionControl):
             Optional[float]: The new CWND after the ACK is received
         """
         self.last_ack_tick = current_tick
-        self.ack_count += 1
-        
-        # Calculate RTT sample (simplified)
-        rtt_sample = current_tick - self.rt_prop_stamp
-        if rtt_sample < self.min_rtt:
-            self.min_rtt = rtt_sample
-            self.rt_prop = self.min_rtt
-        
-        # Estimate delivery rate (simplified)
-        if self.packet_count > 0 and self.ack_count > 0:
-            self.delivery_rate = self.ack_count / (current_tick - self.rt_prop_stamp)
-            if self.delivery_rate > self.btl_bw:
-                self.btl_bw = self.delivery_rate
-        
-        # Update state machine
-        self._update_state(current_tick)
-        
-        # Calculate new cwnd based on BBR formula
-        self.cwnd = self.btl_bw * self.rt_prop * self.cwnd_gain
-        self.cwnd = max(self.cwnd, 1)  # Ensure at least 1
-        
-        # Reset counters for next round
-        if self.ack_count >= self.packet_count:
-            self.packet_count = 0
-            self.ack_count = 0
-            self.rt_prop_stamp = current_tick
-        
+        self.delivered += 1
+        self.delivered_tick = current_tick
+
+        state = self.packet_states.pop(ack_num, None)
+        if state is not None:
+            sent_tick, delivered_at_send, delivered_tick_at_send = state
+            self._update_round(delivered_at_send)
+
+            # Delivery rate over the interval the packet was in flight
+            # Times are in ms, fractions of one on a sub ms time base, so samples are floored at one tick rather than at 1 ms
+            granularity = self.rtt_estimator.granularity
+            interval = max(current_tick - delivered_tick_at_send, current_tick - sent_tick, granularity)
+            self.delivery_rate = (self.delivered - delivered_at_send) / interval
+            self.btl_bw = self.btl_bw_filter.update(self.delivery_rate, self.round_count)
+
+            # RTT sample from this packet's own send time
+            rtt_sample = max(current_tick - sent_tick, granularity)
+            prop_expired = self.rt_prop != float('inf') and current_tick - self.rt_prop_stamp > self.rt_prop_window_ms
+            self.rt_prop = self.rt_prop_filter.update(rtt_sample, current_tick)
+            if self.rt_prop_filter.get_time() == current_tick:
+                self.rt_prop_stamp = current_tick
+            self._check_full_pipe()
+            self._update_state(current_tick, prop_expired)
+
+        self._set_cwnd()
         return self.cwnd
-    
-    def _update_state(self, current_tick: int):
-        """Updates the state of the state of the BBR state machine.
+
+    def _update_round(self, delivered_at_send: int):
+        """Starts a new round once a packet sent after the last round start is ACKed.
+
+        Args:
+            delivered_at_send (int): The delivered count when the ACKed packet was sent
+        """
+        self.round_start = False
+        if delivered_at_send >= self.next_round_delivered:
+            self.next_round_delivered = self.delivered
+            self.round_count += 1
+            self.round_start = True
+
+    def _check_full_pipe(self):
+        """Marks the pipe full when the bandwidth stops growing by 25% for 3 rounds."""
+        if self.filled_pipe or not self.round_start:
+            return
+        if self.btl_bw >= self.full_bw * 1.25:
+            self.full_bw = self.btl_bw
+            self.full_bw_count = 0
+            return
+        self.full_bw_count += 1
+        if self.full_bw_count >= 3:
+            self.filled_pipe = True
+
+    def _packets_in_flight(self) -> int:
+        """Gets the number of sent packets not yet ACKed or timed out.
+
+        Returns:
+            int: The packets in flight
+        """
+        return len(self.packet_states)
+
+    def _update_state(self, current_tick: int, prop_expired: bool):
+        """Updates the state of the BBR state machine.
 
         Args:
             current_tick (int): The current tick of the simulation
+            prop_expired (bool): If RTprop was not refreshed for a whole window
         """
-        if self.state == BBRStage.STARTUP:
-            if self.btl_bw > 0 and self.cwnd >= 2 * self.btl_bw * self.rt_prop:
-                self.state = BBRStage.DRAIN
-                self.pacing_gain = 1.0 / 2.89  # Inverse of startup gain
-        elif self.state == BBRStage.DRAIN:
-            if self.cwnd <= self.btl_bw * self.rt_prop:
-                self.state = BBRStage.PROB_BW
-                self.pacing_gain = 1.0
-                self.cycle_index = 0
+        if self.state == BBRStage.STARTUP and self.filled_pipe:
+            self.state = BBRStage.DRAIN
+            self.pacing_gain = 1.0 / self.startup_gain
+            self.cwnd_gain = self.startup_gain
+        if self.state == BBRStage.DRAIN and self._packets_in_flight() <= self.get_bdp():
+            self._enter_probe_bw(current_tick)
         elif self.state == BBRStage.PROB_BW:
-            # Cycle through gains: 1.25, 0.75, 1, 1, 1, 1, 1, 1
-            gains = [1.25, 0.75, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0]
-            self.pacing_gain = gains[self.cycle_index % len(gains)]
-            self.cycle_index += 1
-            
-            # Check for PROBE_RTT every 10 seconds (simplified)
-            if current_tick % 10000 == 0:
-                self.state = BBRStage.PROB_RTT
-        elif self.state == BBRStage.PROB_RTT:
-            if current_tick - self.last_ack_tick > self.rt_prop:
-                self.state = BBRStage.PROB_BW
-                self.cycle_index = 0
-    
+            # Advance the gain cycle once per RTprop
+            if current_tick - self.cycle_stamp > self.rt_prop:
+                self.cycle_index = (self.cycle_index + 1) % len(self.probe_bw_gains)
+                self.cycle_stamp = current_tick
+                self.pacing_gain = self.probe_bw_gains[self.cycle_index]
+
+        if prop_expired and self.state != BBRStage.PROB_RTT:
+            # Drain the queue to take a fresh RTprop sample
+            self.state = BBRStage.PROB_RTT
+            self.pacing_gain = 1.0
+            self.prior_cwnd = self.cwnd
+            self.probe_rtt_done_stamp = current_tick + self.probe_rtt_ms
+        elif self.state == BBRStage.PROB_RTT and current_tick >= self.probe_rtt_done_stamp:
+            self.rt_prop_stamp = current_tick
+            self.cwnd = max(self.cwnd, self.prior_cwnd)
+            if self.filled_pipe:
+                self._enter_probe_bw(current_tick)
+            else:
+                self.state = BBRStage.STARTUP
+                self.pacing_gain = self.startup_gain
+                self.cwnd_gain = self.startup_gain
+
+    def _enter_probe_bw(self, current_tick: int):
+        """Moves into PROBE_BW at a random phase of the gain cycle, skipping the drain phase.
+
+        Args:
+            current_tick (int): The current tick of the simulation
+        """
+        self.state = BBRStage.PROB_BW
+        self.cwnd_gain = 2.0
+        self.cycle_index = random.choice([0, 2, 3, 4, 5, 6, 7])
+        self.cycle_stamp = current_tick
+        self.pacing_gain = self.probe_bw_gains[self.cycle_index]
+
+    def _set_cwnd(self):
+        """Sets the cwnd from the BDP, or the PROBE_RTT floor."""
+        if self.state == BBRStage.PROB_RTT:
+            self.cwnd = self.min_cwnd
+            return
+        target = max(self.cwnd_gain * self.get_bdp(), self.min_cwnd)
+        if self.filled_pipe:
+            self.cwnd = min(self.cwnd + 1, target)
+        elif self.cwnd < target or self.delivered < 10:
+            # Grow by one packet per ACK until the pipe is full, like slow start
+            self.cwnd += 1
+        self.cwnd = max(self.cwnd, self.min_cwnd)
+
+    def on_ecn(self, ack_num: int, current_tick: int, segments: int = 1) -> Optional[float]:
+        """BBR does not react to ECN marks.
+
+        Args:
+            ack_num (int): The ACK number carrying the echo
+            current_tick (int): The current tick of the simulation
+            segments (int, optional): The segments the ACK newly covers. Defaults to 1.
+
+        Returns:
+            Optional[float]: None
+        """
+        return None
+
     def on_timeout(self, seq_num: int, current_tick: int) -> Optional[float]:
         """Called when a timeout occurs for a packet.
+        The lost packet gives no sample, the cwnd falls back to packet conservation until the next ACK.
 
         Args:
             seq_num (int): The sequence number of the timed out packet
@@ -378,11 +647,10 @@ class BBRCongestionControl(CongestionControl):
         Returns:
             Optional[float]: The new CWND after a timeout
         """
-        # BBR doesn't reduce cwnd on timeout like Reno
-        # Instead, it updates estimates
-        self.btl_bw *= 0.9
+        self.packet_states.pop(seq_num, None)
+        self.cwnd = 1.0
         return self.cwnd
-    
+
     def on_dup_ack(self, ack_num: int, current_tick: int) -> Optional[float]:
         """Called on a duplicate ACK.
 
@@ -399,12 +667,19 @@ class BBRCongestionControl(CongestionControl):
 class RLCongestionControl(CongestionControl):
     """Reinforcement Learning-based congestion control algorithm."""
     
-    def __init__(self):
+    def __init__(self, learning_rate: float = 0.1, discount_factor: float = 0.9, epsilon: float = 0.1):
+        """Constructor for the RL controller.
+
+        Args:
+            learning_rate (float, optional): The Q-learning step size. Defaults to 0.1.
+            discount_factor (float, optional): The weight of future rewards. Defaults to 0.9.
+            epsilon (float, optional): The exploration rate. Defaults to 0.1.
+        """
         super().__init__()
         # RL parameters
-        self.learning_rate = 0.1
-        self.discount_factor = 0.9
-        self.epsilon = 0.1  # Exploration rate
+        self.learning_rate = learning_rate
+        self.discount_factor = discount_factor
+        self.epsilon = epsilon  # Exploration rate
         
         # State variables
         self.current_state = "slow_start"
@@ -538,16 +813,28 @@ class RLCongestionControl(CongestionControl):
                 self.cwnd += 1.0 / self.cwnd  # Congestion avoidance
     
     def on_packet_sent(self, seq_num: int, current_tick: int):
-        """Called when a packet is sent.
+        """Called when a packet is sent, RTT samples come from on_rtt_sample.
         
         Args:
             seq_num (int): Sequence number of sent packet
             current_tick (int): Current simulation tick
         """
-        # Store sent time for RTT calculation
-        if not hasattr(self, 'packet_sent_times'):
-            self.packet_sent_times = {}
-        self.packet_sent_times[seq_num] = current_tick
+        pass
+
+    def on_rtt_sample(self, seq_num: int, rtt: float, current_tick: int):
+        """Keeps the sample for the reward of the ACK that follows.
+
+        Args:
+            seq_num (int): Sequence number of the ACKed packet
+            rtt (float): RTT of the packet in ms
+            current_tick (int): Current simulation tick
+        """
+        super().on_rtt_sample(seq_num, rtt, current_tick)
+        self.last_rtt = rtt
+        self.rtt_samples.append(rtt)
+        # Keep only recent samples
+        if len(self.rtt_samples) > 10:
+            self.rtt_samples.pop(0)
     
     def on_ack_received(self, ack_num: int, current_tick: int) -> Optional[float]:
         """Called when an ACK is received.
@@ -562,16 +849,9 @@ class RLCongestionControl(CongestionControl):
         self.last_ack_tick = current_tick
         self.successful_transmissions += 1
         
-        # Calculate RTT if we have the sent time
-        rtt = float('inf')
-        if hasattr(self, 'packet_sent_times') and ack_num in self.packet_sent_times:
-            sent_time = self.packet_sent_times[ack_num]
-            rtt = current_tick - sent_time
-            self.rtt_samples.append(rtt)
-            # Keep only recent samples
-            if len(self.rtt_samples) > 10:
-                self.rtt_samples.pop(0)
-            del self.packet_sent_times[ack_num]
+        # RTT of this ACK, inf when the packet was retransmitted and gave no sample
+        rtt = self.last_rtt
+        self.last_rtt = float('inf')
         
         # Get current state
         current_state = self._get_state(current_tick)
@@ -0,0 +1,170 @@
+from Enums.CongestionControlType import CongestionControlType
+from typing import Optional, Union, TYPE_CHECKING
+import importlib
+
+if TYPE_CHECKING:
+    from Objects.CongestionControl import CongestionControl
+
+# Installed packages add algorithms by declaring an entry point in this group, name = "module:Class"
+ENTRY_POINT_GROUP = "experiments.congestion_control"
+
+# Module and class of each built in algorithm, imported the first time a host uses it
+BUILTIN_CONGESTION_CONTROLS = {
+    CongestionControlType.BBR.value: "Objects.CongestionControl:BBRCongestionControl",
+    CongestionControlType.VEGAS.value: "Objects.CongestionControl:VegasCongestionControl",
+    CongestionControlType.RENO.value: "Objects.CongestionControl:RenoCongestionControl",
+    CongestionControlType.RL.value: "Objects.CongestionControl:RLCongestionControl",
+    CongestionControlType.DCTCP.value: "Objects.CongestionControl:DCTCPCongestionControl",
+    CongestionControlType.NEURAL.value: "Objects.NeuralCongestionControl:NeuralCongestionControl",
+    CongestionControlType.CUBIC.value: "Objects.CubicCongestionControl:CubicCongestionControl",
+}
+
+
+def congestion_control_name(congestion_control: Union[CongestionControlType, str]) -> str:
+    """Gets the registry name of an algorithm.
+
+    Args:
+        congestion_control (Union[CongestionControlType, str]): An enum member or a name
+
+    Returns:
+        str: The lower case name
+    """
+    return str(getattr(congestion_control, "value", congestion_control)).lower()
+
+
+class CongestionControlRegistry:
+    """Maps algorithm names to controller classes.
+    Built in algorithms, entry points of installed packages and register calls share one namespace.
+    Nothing is imported until a host asks for the algorithm, so unused plugins cost nothing.
+    """
+    targets: dict  # name -> "module:Class" or a class
+    loaded: dict  # name -> class, filled on first use
+    discovered: bool
+
+    def __init__(self):
+        """Constructor for the registry, holding the built in algorithms."""
+        self.targets = dict(BUILTIN_CONGESTION_CONTROLS)
+        self.loaded = {}
+        self.discovered = False
+
+    def register(self, name: str, target: Union[str, type], replace: bool = False):
+        """Adds an algorithm.
+
+        Args:
+            name (str): The name hosts select it by
+            target (Union[str, type]): "module:Class", imported on first use, or the class itself
+            replace (bool, optional): Allow replacing an algorithm that is already registered. Defaults to False.
+
+        Raises:
+            ValueError: When the name is taken and replace is not set, or target is not module:Class
+        """
+        name = congestion_control_name(name)
+        if name in self.targets and not replace and self.targets[name] != target:
+            raise ValueError(f"Congestion control {name} is already registered as {self.targets[name]}")
+        if isinstance(target, str) and ":" not in target:
+            raise ValueError(f"Congestion control {name}: expected module:Class, got {target}")
+        self.targets[name] = target
+        self.loaded.pop(name, None)
+
+    def discover(self):
+        """Reads the entry points of installed packages, once. Only their names are read, nothing is imported."""
+        if self.discovered:
+            return
+        self.discovered = True
+        try:
+            from importlib.metadata import entry_points
+            found = entry_points(group=ENTRY_POINT_GROUP)
+        except Exception:
+            return
+        for entry_point in found:
+            # Built in and explicitly registered algorithms win over packages
+            self.targets.setdefault(congestion_control_name(entry_point.name), entry_point.value)
+
+    def names(self) -> list[str]:
+        """Gets every algorithm hosts can use.
+
+        Returns:
+            list[str]: The sorted names
+        """
+        self.discover()
+        return sorted(self.targets)
+
+    def has(self, name: Union[CongestionControlType, str]) -> bool:
+        """Checks whether an algorithm is known.
+
+        Args:
+            name (Union[CongestionControlType, str]): The algorithm
+
+        Returns:
+            bool: True if a host could use it
+        """
+        self.discover()
+        return congestion_control_name(name) in self.targets
+
+    def get(self, name: Union[CongestionControlType, str]) -> type:
+        """Gets the class of an algorithm, importing its module the first time.
+
+        Args:
+            name (Union[CongestionControlType, str]): The algorithm
+
+        Raises:
+            ValueError: When the algorithm is unknown, cannot be imported or is not a CongestionControl
+
+        Returns:
+            type: The controller class
+        """
+        name = congestion_control_name(name)
+        cls = self.loaded.get(name)
+        if cls is not None:
+            return cls
+        self.discover()
+        target = self.targets.get(name)
+        if target is None:
+            raise ValueError(f"Not a valid congestion control: {name}, known are {', '.join(self.names())}")
+        if isinstance(target, str):
+            module_name, _, class_name = target.partition(":")
+            try:
+                cls = getattr(importlib.import_module(module_name), class_name)
+            except (ImportError, AttributeError) as e:
+                raise ValueError(f"Congestion control {name} could not be loaded from {target}: {e}")
+        else:
+            cls = target
+        from Objects.CongestionControl import CongestionControl
+        if not (isinstance(cls, type) and issubclass(cls, CongestionControl)):
+            raise ValueError(f"Congestion control {name} from {target} is not a CongestionControl")
+        self.loaded[name] = cls
+        return cls
+
+    def create(self, name: Union[CongestionControlType, str], params: Optional[dict] = None) -> 'CongestionControl':
+        """Builds a controller.
+
+        Args:
+            name (Union[CongestionControlType, str]): The algorithm
+            params (Optional[dict], optional): Keyword arguments of the algorithm's constructor. Defaults to None.
+
+        Raises:
+            ValueError: When the algorithm is unknown or does not take the given parameters
+
+        Returns:
+            CongestionControl: The new controller
+        """
+        cls = self.get(name)
+        try:
+            return cls(**(params or {}))
+        except TypeError as e:
+            raise ValueError(f"Bad parameters for congestion control {congestion_control_name(name)}: {e}")
+
+
+# The registry hosts build their controllers from
+REGISTRY = CongestionControlRegistry()
+
+
+def register_congestion_control(name: str, target: Union[str, type], replace: bool = False):
+    """Adds an algorithm to the shared registry, see CongestionControlRegistry.register.
+
+    Args:
+        name (str): The name hosts select it by
+        target (Union[str, type]): "module:Class", imported on first use, or the class itself
+        replace (bool, optional): Allow replacing an algorithm that is already registered. Defaults to False.
+    """
+    REGISTRY.register(name, target, replace)
@@ -0,0 +1,167 @@
+from typing import Optional
+from Objects.CongestionControl import CongestionControl
+
+TICKS_PER_SECOND = 1000  # 1 tick = 1 ms, C is defined in packets per second cubed
+
+
+class CubicCongestionControl(CongestionControl):
+    """CUBIC congestion control (RFC 9438).
+    After a congestion event the window follows W(t) = C * (t - K)^3 + W_max: it climbs quickly back toward the
+    window where the loss happened, stays flat around it and then probes faster the longer it has been since.
+    In the Reno-friendly region the window never grows slower than an AIMD flow with the same beta would.
+    """
+
+    def __init__(self, c: float = 0.4, beta: float = 0.7, fast_convergence: bool = True, reno_friendly: bool = True):
+        """Constructor for CUBIC.
+
+        Args:
+            c (float, optional): The scaling constant of the cubic curve. Defaults to 0.4.
+            beta (float, optional): The multiplicative decrease factor. Defaults to 0.7.
+            fast_convergence (bool, optional): Release bandwidth faster when the loss window keeps shrinking. Defaults to True.
+            reno_friendly (bool, optional): Grow at least as fast as AIMD with the same beta. Defaults to True.
+        """
+        super().__init__()
+        self.c = c
+        self.beta = beta
+        self.fast_convergence = fast_convergence
+        self.reno_friendly = reno_friendly
+        # Additive increase that gives AIMD with beta the same average rate as Reno
+        self.alpha_aimd = 3 * (1 - beta) / (1 + beta)
+        self.w_max = 0.0
+        self.k = 0.0
+        self.epoch_start: Optional[int] = None
+        self.w_est = 0.0
+
+    def cubic_window(self, elapsed_ticks: float) -> float:
+        """Gets the window of the cubic curve.
+
+        Args:
+            elapsed_ticks (float): The ticks since the current congestion avoidance epoch started
+
+        Returns:
+            float: W_cubic in packets
+        """
+        t = elapsed_ticks / TICKS_PER_SECOND
+        return self.c * (t - self.k) ** 3 + self.w_max
+
+    def _start_epoch(self, current_tick: int):
+        """Starts the cubic curve from the current window.
+
+        Args:
+            current_tick (int): The current tick in the simulation
+        """
+        self.epoch_start = current_tick
+        if self.cwnd < self.w_max:
+            # K is the time the curve takes to climb back to W_max
+            self.k = ((self.w_max - self.cwnd) / self.c) ** (1 / 3)
+        else:
+            self.k = 0.0
+            self.w_max = self.cwnd
+        self.w_est = self.cwnd
+
+    def _on_congestion(self):
+        """Remembers the window of a congestion event and sets the reduced one as ssthresh."""
+        if self.fast_convergence and self.cwnd < self.w_max:
+            self.w_max = self.cwnd * (1 + self.beta) / 2
+        else:
+            self.w_max = self.cwnd
+        self.ssthresh = max(self.cwnd * self.beta, 2)
+        self.epoch_start = None
+
+    def on_packet_sent(self, seq_num: int, current_tick: int):
+        """No events on packet sent.
+
+        Args:
+            seq_num (int): The seq number of the sent packet
+            current_tick (int): The current tick in the simulation
+        """
+        pass
+
+    def on_ack_received(self, ack_num: int, current_tick: int) -> Optional[float]:
+        """Grows the window, by one per ACK in slow start and toward the cubic curve one RTT ahead after.
+
+        Args:
+            ack_num (int): The ACK number
+            current_tick (int): The current tick in the simulation
+
+        Returns:
+            Optional[float]: The new CWND after an ACK is received
+        """
+        self.last_ack_tick = current_tick
+        if self.in_fast_recovery:
+            if ack_num >= self.recovery_seq:
+                self.in_fast_recovery = False
+                self.dup_ack_count = 0
+                self.cwnd = self.ssthresh
+            return self.cwnd
+        if self.cwnd < self.ssthresh:
+            self.cwnd += 1
+            return self.cwnd
+
+        if self.epoch_start is None:
+            self._start_epoch(current_tick)
+        rtt = self.get_smoothed_rtt() or 1.0
+        # Aim where the curve will be one RTT from now, at most 1.5x the current window
+        target = min(max(self.cubic_window(current_tick - self.epoch_start + rtt), self.cwnd), 1.5 * self.cwnd)
+        if target > self.cwnd:
+            self.cwnd += (target - self.cwnd) / self.cwnd
+        else:
+            self.cwnd += 0.01 / self.cwnd
+
+        if self.reno_friendly:
+            self.w_est += self.alpha_aimd / self.cwnd
+            self.cwnd = max(self.cwnd, self.w_est)
+        return self.cwnd
+
+    def on_timeout(self, seq_num: int, current_tick: int) -> Optional[float]:
+        """Restarts from one packet in slow start after remembering the window.
+
+        Args:
+            seq_num (int): The sequence number of the timed out packet
+            current_tick (int): The current tick in the simulation
+
+        Returns:
+            Optional[float]: The new CWND after a packet times out
+        """
+        self._on_congestion()
+        self.cwnd = 1
+        self.in_fast_recovery = False
+        self.dup_ack_count = 0
+        return self.cwnd
+
+    def on_dup_ack(self, ack_num: int, current_tick: int) -> Optional[float]:
+        """Cuts the window to beta times its size on the third duplicate ACK.
+
+        Args:
+            ack_num (int): The ACK number received
+            current_tick (int): The current tick in the simulation
+
+        Returns:
+            Optional[float]: The new CWND, None unless fast retransmit triggered
+        """
+        self.dup_ack_count += 1
+        if self.dup_ack_count == 3 and not self.in_fast_recovery:
+            self._on_congestion()
+            self.cwnd = self.ssthresh
+            self.in_fast_recovery = True
+            self.recovery_seq = ack_num + 1
+            return self.cwnd
+        return None
+
+    def on_ecn(self, ack_num: int, current_tick: int, segments: int = 1) -> Optional[float]:
+        """Treats a congestion mark as a loss without the retransmit, once per window.
+
+        Args:
+            ack_num (int): The ACK number carrying the echo
+            current_tick (int): The current tick in the simulation
+            segments (int, optional): The segments the ACK newly covers. Defaults to 1.
+
+        Returns:
+            Optional[float]: The new CWND, None if the mark was ignored
+        """
+        if ack_num <= self.ecn_recovery_seq:
+            return None
+        self._on_congestion()
+        self.cwnd = self.ssthresh
+        self.ecn_recovery_seq = ack_num + int(self.cwnd)
+        return self.cwnd
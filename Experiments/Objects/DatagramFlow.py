@@ -0,0 +1,93 @@
+from typing import Optional, TYPE_CHECKING
+from Objects.Packet import Packet
+from Enums.Protocol import Protocol
+from Objects.TimeBase import NEVER
+import math
+
+if TYPE_CHECKING:
+    from Objects.Host import Host
+
+
+class DatagramFlow:
+    """Unreliable UDP style flow from a host.
+    Datagrams share the links and routers with TCP traffic but have no ACKs or retransmission state.
+    """
+    dest_id: str
+    path: tuple[str, ...]  # shared by every datagram of the flow
+    packet_size_bytes: int
+    rate_pps: Optional[float]
+    burst: int
+    tokens: float
+    last_tick: int  # the last tick processed, tokens accrue over the ticks skipped since
+    next_seq_num: int
+    packets_sent: int
+
+    def __init__(self, dest_id: str, packet_path: list[str], packet_size_bytes: int = 1, rate_pps: Optional[float] = None, burst: int = 1):
+        """Constructor for a datagram flow.
+
+        Args:
+            dest_id (str): The string id of the receiving host
+            packet_path (list[str]): The devices the datagrams travel, ending with the receiver
+            packet_size_bytes (int, optional): The payload of each datagram, with framing its fragments travel as one packet of their total wire size. Defaults to 1.
+            rate_pps (Optional[float], optional): Token bucket rate in datagrams per second, None sends burst datagrams every ms. Defaults to None.
+            burst (int, optional): The most datagrams released at once. Defaults to 1.
+        """
+        self.dest_id = dest_id
+        self.path = tuple(packet_path)
+        self.packet_size_bytes = packet_size_bytes
+        self.rate_pps = rate_pps
+        self.burst = max(burst, 1)
+        self.tokens = 0.0
+        self.last_tick = 0
+        self.next_seq_num = 0
+        self.packets_sent = 0
+
+    def process_tick(self, host: 'Host', tick_num: int):
+        """Sends the datagrams the rate limiter allows this tick.
+
+        Args:
+            host (Host): The sending host
+            tick_num (int): The current tick of the simulation
+        """
+        elapsed = tick_num - self.last_tick
+        self.last_tick = tick_num
+        if self.rate_pps is None:
+            to_send = self.burst if tick_num % host.time_base.ticks_per_ms == 0 else 0
+        else:
+            rate_per_tick = host.time_base.per_tick(self.rate_pps)
+            self.tokens = min(self.tokens + (rate_per_tick if elapsed == 1 else elapsed * rate_per_tick), self.burst)
+            to_send = int(self.tokens)
+            self.tokens -= to_send
+        if not to_send:
+            return
+        wire_bytes = host.framing.datagram_bytes(self.packet_size_bytes) if host.framing is not None else self.packet_size_bytes
+        for _ in range(to_send):
+            p = Packet(
+                id_sequence=self.path,
+                packet_size_bytes=wire_bytes,
+                payload_bytes=self.packet_size_bytes,
+                seq_num=self.next_seq_num,
+                source_id=host.id,
+                dest_id=self.dest_id,
+                protocol=Protocol.UDP
+            )
+            self.next_seq_num += 1
+            self.packets_sent += 1
+            host.send_packet(p)
+
+    def next_event_tick(self, host: 'Host', tick_num: int) -> float:
+        """Gets the next tick the flow has a datagram to release.
+
+        Args:
+            host (Host): The sending host
+            tick_num (int): The tick just processed
+
+        Returns:
+            float: The tick, NEVER without a rate
+        """
+        ticks_per_ms = host.time_base.ticks_per_ms
+        if self.rate_pps is None:
+            return (tick_num // ticks_per_ms + 1) * ticks_per_ms
+        if self.rate_pps <= 0:
+            return NEVER
+        return tick_num + max(1, math.ceil((1 - self.tokens) / host.time_base.per_tick(self.rate_pps)))
@@ -1,11 +1,19 @@
 from abc import ABC, abstractmethod
 from Enums.DeviceType import DeviceType
+from Objects.TimeBase import TimeBase, MILLISECONDS
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from Objects.Network import Network
+
 class Device(ABC):
     """Abstract class for a device such as a router or host."""
     device_type: DeviceType
     id: str
     forwarding_table: dict
     links: list
+    network: Optional['Network']
+    time_base: TimeBase
 
     def __init__(self, device_type: DeviceType, id: str):
         """The constructor for a device.
@@ -18,6 +26,27 @@ class Device(ABC):
         self.id = id
         self.forwarding_table = {}
         self.links = []
+        self.network = None
+        self.time_base = MILLISECONDS
+
+    def set_time_base(self, time_base: TimeBase):
+        """Sets the length of a tick, called when the device joins a network.
+
+        Args:
+            time_base (TimeBase): The network's time base
+        """
+        self.time_base = time_base
+
+    def next_event_tick(self, tick_num: int) -> float:
+        """Gets the next tick the device has work on, ticks before it may be skipped.
+
+        Args:
+            tick_num (int): The tick just processed
+
+        Returns:
+            float: The tick, NEVER when idle until something arrives
+        """
+        return tick_num + 1
 
     @abstractmethod
     def process_tick(self, tick_num: int):
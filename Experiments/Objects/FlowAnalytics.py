@@ -0,0 +1,327 @@
+from typing import Optional
+from Objects.Packet import Packet
+from Enums.Protocol import Protocol
+
+
+class P2Quantile:
+    """Streaming quantile estimate with the P-square algorithm (Jain and Chlamtac).
+    Keeps five markers, so memory and update cost are constant.
+    """
+    q: float
+    heights: list[float]
+    positions: list[int]
+    desired: list[float]
+    count: int
+
+    def __init__(self, q: float):
+        """Constructor for the estimator.
+
+        Args:
+            q (float): The quantile to track, in (0, 1)
+        """
+        self.q = q
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self.increments = [0, q / 2, q, (1 + q) / 2, 1]
+        self.count = 0
+
+    def add(self, x: float):
+        """Adds a sample.
+
+        Args:
+            x (float): The sample
+        """
+        self.count += 1
+        h = self.heights
+        if self.count <= 5:
+            h.append(x)
+            if self.count == 5:
+                h.sort()
+            return
+
+        if x < h[0]:
+            h[0] = x
+            k = 0
+        elif x >= h[4]:
+            h[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= h[k + 1]:
+                k += 1
+
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the middle markers toward their desired positions
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if d > 0 else -1
+                parabolic = h[i] + step / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + step) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - step) * (h[i] - h[i - 1]) / (n[i] - n[i - 1]))
+                if h[i - 1] < parabolic < h[i + 1]:
+                    h[i] = parabolic
+                else:
+                    h[i] = h[i] + step * (h[i + step] - h[i]) / (n[i + step] - n[i])
+                n[i] += step
+
+    def get(self) -> Optional[float]:
+        """Gets the current estimate.
+
+        Returns:
+            Optional[float]: The quantile estimate, None without samples
+        """
+        if self.count == 0:
+            return None
+        if self.count < 5:
+            ordered = sorted(self.heights)
+            return ordered[min(int(self.q * len(ordered)), len(ordered) - 1)]
+        return self.heights[2]
+
+
+class DelayStats:
+    """Running mean, max and streaming percentiles of a delay."""
+
+    def __init__(self, quantiles: tuple = (0.5, 0.95, 0.99)):
+        """Constructor for the delay stats.
+
+        Args:
+            quantiles (tuple, optional): The quantiles to track. Defaults to (0.5, 0.95, 0.99).
+        """
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.sketches = {q: P2Quantile(q) for q in quantiles}
+
+    def add(self, value: float):
+        """Adds a sample.
+
+        Args:
+            value (float): The sample
+        """
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        for sketch in self.sketches.values():
+            sketch.add(value)
+
+    def summary(self) -> dict:
+        """Summarizes the samples.
+
+        Returns:
+            dict: The count, mean, max and each tracked percentile
+        """
+        out = {"count": self.count, "mean": self.total / self.count if self.count else None, "max": self.max}
+        for q, sketch in self.sketches.items():
+            out[f"p{round(q * 100)}"] = sketch.get()
+        return out
+
+
+class FlowStats:
+    """Online stats of one (source, destination, protocol) flow."""
+    source_id: str
+    dest_id: str
+    protocol: Protocol
+    path: list[str]  # empty for ECMP flows, whose packets each take their own path
+    reorder_window: Optional[int]
+
+    def __init__(self, source_id: str, dest_id: str, path: list[str], reorder_window: Optional[int] = None, protocol: Protocol = Protocol.TCP):
+        """Constructor for the flow stats.
+
+        Args:
+            source_id (str): The string id of the sending host
+            dest_id (str): The string id of the receiving host
+            path (list[str]): The devices the flow travels, not counting the source, empty when unknown
+            reorder_window (Optional[int], optional): The most seqs held above a hole before the hole counts as lost. Defaults to no limit.
+            protocol (Protocol, optional): The protocol of the flow's packets, each has its own seq space. Defaults to Protocol.TCP.
+        """
+        self.source_id = source_id
+        self.dest_id = dest_id
+        self.protocol = Protocol(protocol)
+        self.path = path
+        self.packets_delivered = 0
+        self.bytes_delivered = 0
+        self.goodput_bytes = 0
+        self.duplicate_packets = 0
+        self.rtt = DelayStats()
+        # Receiver view of which seqs arrived, only seqs above next_expected are stored
+        self.next_expected = 0
+        self.received_ahead = set()
+        self.reorder_window = reorder_window
+
+    def on_delivery(self, packet: Packet):
+        """Counts a data packet reaching the destination.
+        Retransmissions of seqs that already arrived count toward throughput but not goodput.
+
+        Args:
+            packet (Packet): The delivered data packet
+        """
+        self.packets_delivered += 1
+        self.bytes_delivered += packet.packet_size_bytes
+        seq = packet.seq_num
+        if seq < self.next_expected or seq in self.received_ahead:
+            self.duplicate_packets += 1
+            return
+        self.goodput_bytes += packet.payload_bytes
+        if seq == self.next_expected:
+            self.next_expected += 1
+            while self.next_expected in self.received_ahead:
+                self.received_ahead.remove(self.next_expected)
+                self.next_expected += 1
+        else:
+            self.received_ahead.add(seq)
+            if self.reorder_window is not None and len(self.received_ahead) > self.reorder_window:
+                # Datagrams are never resent, give up on the oldest hole instead of waiting forever
+                self.next_expected = min(self.received_ahead)
+                while self.next_expected in self.received_ahead:
+                    self.received_ahead.remove(self.next_expected)
+                    self.next_expected += 1
+
+    def summary(self, elapsed_ticks: int) -> dict:
+        """Summarizes the flow.
+
+        Args:
+            elapsed_ticks (int): The ticks since the simulation started
+
+        Returns:
+            dict: The flow's throughput, goodput and RTT stats in bps and ticks
+        """
+        seconds = max(elapsed_ticks, 1) / 1000
+        return {
+            "source": self.source_id,
+            "dest": self.dest_id,
+            "protocol": self.protocol.value,
+            "packets_delivered": self.packets_delivered,
+            "duplicate_packets": self.duplicate_packets,
+            "throughput_bps": self.bytes_delivered * 8 / seconds,
+            "goodput_bps": self.goodput_bytes * 8 / seconds,
+            "rtt": self.rtt.summary(),
+        }
+
+
+def jain_fairness(rates: list[float]) -> Optional[float]:
+    """Computes Jain's fairness index, 1 when all rates are equal and 1/n at worst.
+
+    Args:
+        rates (list[float]): The rate of each flow
+
+    Returns:
+        Optional[float]: The index, None when there are no rates or all are 0
+    """
+    square_sum = sum(r * r for r in rates)
+    if not rates or square_sum == 0:
+        return None
+    return sum(rates) ** 2 / (len(rates) * square_sum)
+
+
+class FlowAnalytics:
+    """Per-flow and per-router metrics updated as events happen, nothing is post-processed."""
+    flows: dict  # (source_id, dest_id, protocol) -> FlowStats
+    queue_delays: dict  # router_id -> DelayStats
+    reorder_window: Optional[int]  # see FlowStats, None keeps every out of order seq
+
+    def __init__(self):
+        """Constructor for the analytics."""
+        self.flows = {}
+        self.queue_delays = {}
+        self.reorder_window = None
+
+    def get_flow(self, source_id: str, dest_id: str, path: Optional[list[str]] = None, protocol: Protocol = Protocol.TCP) -> FlowStats:
+        """Gets the stats of a flow, creating them on first use.
+        TCP and UDP traffic between the same hosts are separate flows, their seqs would collide.
+
+        Args:
+            source_id (str): The string id of the sending host
+            dest_id (str): The string id of the receiving host
+            path (Optional[list[str]], optional): The devices the flow travels. Defaults to None.
+            protocol (Protocol, optional): The protocol of the flow. Defaults to Protocol.TCP.
+
+        Returns:
+            FlowStats: The flow's stats
+        """
+        key = (source_id, dest_id, protocol)
+        flow = self.flows.get(key)
+        if flow is None:
+            flow = FlowStats(source_id, dest_id, list(path or []), self.reorder_window, protocol)
+            self.flows[key] = flow
+        return flow
+
+    def on_delivery(self, packet: Packet):
+        """Records a data packet reaching its destination host.
+        An ECMP packet's route only holds its last hop, so its flow gets no path.
+
+        Args:
+            packet (Packet): The delivered data packet
+        """
+        path = packet.original_path if packet.flow_label is None else None
+        self.get_flow(packet.source_id, packet.dest_id, path, packet.protocol).on_delivery(packet)
+
+    def on_rtt_sample(self, source_id: str, dest_id: str, rtt: float):
+        """Records an RTT sample taken by the sender, only TCP flows are ACKed.
+
+        Args:
+            source_id (str): The string id of the sending host
+            dest_id (str): The string id of the receiving host
+            rtt (float): The RTT in ticks
+        """
+        self.get_flow(source_id, dest_id).rtt.add(rtt)
+
+    def on_queue_delay(self, router_id: str, delay: int):
+        """Records how long a packet waited in a router.
+
+        Args:
+            router_id (str): The string id of the router
+            delay (int): The ticks between enqueue and forwarding
+        """
+        stats = self.queue_delays.get(router_id)
+        if stats is None:
+            stats = DelayStats()
+            self.queue_delays[router_id] = stats
+        stats.add(delay)
+
+    def fairness_by_link(self, elapsed_ticks: int) -> dict:
+        """Computes Jain's index over the goodput of the flows sharing each link.
+        ECMP flows are left out, routers spread their packets over several paths and no single one is recorded.
+
+        Args:
+            elapsed_ticks (int): The ticks since the simulation started
+
+        Returns:
+            dict: "a-b" link name -> fairness index, only for links with 2 or more flows
+        """
+        sharing = {}
+        for flow in self.flows.values():
+            hops = [flow.source_id] + flow.path
+            for a, b in zip(hops[:-1], hops[1:]):
+                sharing.setdefault(tuple(sorted((a, b))), []).append(flow)
+        result = {}
+        for (a, b), flows in sharing.items():
+            if len(flows) >= 2:
+                result[f"{a}-{b}"] = jain_fairness([f.goodput_bytes / max(elapsed_ticks, 1) for f in flows])
+        return result
+
+    def summary(self, elapsed_ticks: int) -> dict:
+        """Summarizes every flow and router.
+
+        Args:
+            elapsed_ticks (int): The ticks since the simulation started
+
+        Returns:
+            dict: Flow stats, overall, per protocol and per link fairness and router queueing delays
+        """
+        flows = [f.summary(elapsed_ticks) for f in self.flows.values()]
+        return {
+            "flows": flows,
+            "fairness": jain_fairness([f["goodput_bps"] for f in flows]),
+            "fairness_by_protocol": {p.value: jain_fairness([f["goodput_bps"] for f in flows if f["protocol"] == p.value])
+                                     for p in Protocol if any(f["protocol"] == p.value for f in flows)},
+            "fairness_by_link": self.fairness_by_link(elapsed_ticks),
+            "queue_delay": {router_id: stats.summary() for router_id, stats in self.queue_delays.items()},
+        }
@@ -0,0 +1,530 @@
+from Enums.CongestionControlType import CongestionControlType
+from Enums.Protocol import Protocol
+from Objects.Host import Host
+from Objects.RTTEstimator import RTTEstimator
+from Objects.CongestionControlRegistry import REGISTRY
+from typing import Optional, TYPE_CHECKING
+import numpy as np
+
+if TYPE_CHECKING:
+    from Objects.Network import Network
+
+# Dynamics each flow follows in the fluid model
+AIMD = 0
+VEGAS = 1
+BBR = 2
+CONSTANT = 3  # datagram flows, no congestion control and no ACKs
+DYNAMICS_NAMES = {AIMD: "aimd", VEGAS: "vegas", BBR: "bbr", CONSTANT: "constant"}
+
+# Learned controllers have no closed form and CUBIC is treated as loss based, all follow AIMD here
+FLUID_DYNAMICS = {
+    CongestionControlType.RENO: AIMD,
+    CongestionControlType.DCTCP: AIMD,
+    CongestionControlType.RL: AIMD,
+    CongestionControlType.NEURAL: AIMD,
+    CongestionControlType.CUBIC: AIMD,
+    CongestionControlType.VEGAS: VEGAS,
+    CongestionControlType.BBR: BBR,
+}
+
+INITIAL_CWND = 1.0
+INITIAL_SSTHRESH = 64.0
+VEGAS_ALPHA = 1.0
+VEGAS_BETA = 3.0
+BBR_STARTUP_GAIN = 2.885
+BBR_PROBE_BW_GAINS = np.array([1.25, 0.75, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0])
+BBR_CWND_GAIN = 2.0
+BBR_BTL_BW_WINDOW_ROUNDS = 10
+RTO_MARGIN = RTTEstimator().min_rto  # ms the RTO keeps above SRTT
+
+
+class FluidModel:
+    """Flow level approximation of a Network.
+    Each flow is a rate set by its congestion control, each directional link a queue fed by the flows crossing it.
+    All flows and ports advance together in one vectorised Euler step, so tens of thousands of flows take seconds.
+
+    A port is the sending side of a link: a router port has the router's queue and service rate,
+    a host port has no buffer and is only limited by the link. Link bandwidth caps the bytes in flight,
+    so a link carries at most bandwidth_in_bytes / link_delay_ms bytes per tick. Like Host.send_packet,
+    hosts put packets on their link without its delay, they reach the first hop the next tick.
+    Every queue is modelled as drop-tail, AQM and ECN marks are not. Window based flows are
+    also capped by the PFTK formula, so heavy loss costs them retransmission timeouts as in packet runs.
+
+    Identical flows follow the same trajectory, so the copies added in one call share a row weighted
+    by their number. BBR copies get one row per gain cycle phase so they do not all probe at once.
+    """
+    network: 'Network'
+    dt: float
+    packet_size_bytes: int
+    port_ids: list[tuple[str, str]]
+    port_index: dict  # (device id, next hop id) -> port
+    tick: float
+
+    def __init__(self, network: 'Network', dt: float = 1.0, packet_size_bytes: int = 1):
+        """Constructor for the fluid model.
+
+        Args:
+            network (Network): The built Network whose devices and links are modelled
+            dt (float, optional): The step in ticks, well under the smallest RTT. Defaults to 1.0.
+            packet_size_bytes (int, optional): The size of every fluid packet. Defaults to 1.
+        """
+        self.network = network
+        self.dt = dt
+        self.packet_size_bytes = packet_size_bytes
+
+        # Link i gives port 2i from router_in to router_out and port 2i + 1 back
+        self.port_ids = []
+        capacity, buffer, delay, loss, ack_cost = [], [], [], [], []
+        for link in network.links:
+            for sender, receiver in ((link.router_in, link.router_out), (link.router_out, link.router_in)):
+                link_delay = link.delay_ms if sender.device_type == "router" else 1
+                link_rate = link.bandwidth_in_bytes / max(link_delay, 1) / packet_size_bytes
+                self.port_ids.append((sender.id, receiver.id))
+                delay.append(link_delay)
+                loss.append(link.loss_rate)
+                if sender.device_type == "router":
+                    # The fluid model steps in ms whatever the network's time base
+                    service = sender.service_rate / 1000 / (packet_size_bytes if sender.service_in_bytes else 1)
+                    capacity.append(min(service, link_rate))
+                    buffer.append(sender.queue_size)
+                    # A router serving packets per tick spends a slot on every ACK
+                    ack_cost.append(0.0 if sender.service_in_bytes else 1.0)
+                else:
+                    capacity.append(link_rate)
+                    buffer.append(0)
+                    ack_cost.append(0.0)
+        self.port_index = {port: i for i, port in enumerate(self.port_ids)}
+        self.capacity = np.maximum(np.array(capacity, dtype=np.float64), 1e-9)
+        self.buffer = np.array(buffer, dtype=np.float64)
+        self.delay = np.array(delay, dtype=np.float64)
+        self.loss = np.array(loss, dtype=np.float64)
+        self.ack_cost = np.array(ack_cost, dtype=np.float64)
+        self.queue = np.zeros(len(self.port_ids))
+        self.drop = np.zeros(len(self.port_ids))
+
+        # Flows are collected in lists and packed into arrays on the first step after a change
+        self.flow_sources = []
+        self.flow_dests = []
+        self.flow_types = []
+        self.flow_packet_level = []
+        self.flow_ports = []
+        self.flow_reverse_ports = []
+        self.flow_prop_delay = []
+        self.flow_max_rate = []
+        self.flow_acked = []
+        self.flow_weights = []  # flows each row stands for
+        self.packed = False
+        self.tick = 0.0
+        self.samples = []
+        self.reset_stats()
+
+    def add_flow(self, source: str, path: list[str], congestion_control: CongestionControlType = CongestionControlType.RENO,
+                 max_rate_pps: Optional[float] = None, count: int = 1, packet_level: bool = False) -> int:
+        """Adds flows from a host along a fixed path, ACKs return along the reversed path.
+
+        Args:
+            source (str): The string id of the sending host
+            path (list[str]): The devices the data travels, ending with the receiver
+            congestion_control (CongestionControlType, optional): The algorithm of the flows. Defaults to CongestionControlType.RENO.
+            max_rate_pps (Optional[float], optional): The most packets per second the sender offers. Defaults to no limit.
+            count (int, optional): The number of identical flows to add. Defaults to 1.
+            packet_level (bool, optional): If the flow is also simulated packet by packet, its load is left out of handoff. Defaults to False.
+
+        Raises:
+            ValueError: If the path does not follow the network's links or the congestion control is unknown
+
+        Returns:
+            int: The first row of the added flows
+        """
+        try:
+            dynamics = FLUID_DYNAMICS[CongestionControlType(congestion_control)]
+        except (ValueError, KeyError):
+            if not REGISTRY.has(congestion_control):
+                raise ValueError(f"Flow from {source}: unknown congestion control {congestion_control}")
+            # Plugins have no fluid form of their own, they are approximated as loss based
+            dynamics = AIMD
+        return self._append_flows(source, path, dynamics, max_rate_pps, count, packet_level)
+
+    def add_datagram_flow(self, source: str, path: list[str], rate_pps: float, count: int = 1, packet_level: bool = False) -> int:
+        """Adds unreliable flows that send at a fixed rate whatever the network does.
+
+        Args:
+            source (str): The string id of the sending host
+            path (list[str]): The devices the datagrams travel, ending with the receiver
+            rate_pps (float): The datagrams per second of each flow
+            count (int, optional): The number of identical flows to add. Defaults to 1.
+            packet_level (bool, optional): If the flow is also simulated packet by packet, its load is left out of handoff. Defaults to False.
+
+        Raises:
+            ValueError: If the path does not follow the network's links
+
+        Returns:
+            int: The row of the added flows
+        """
+        return self._append_flows(source, path, CONSTANT, rate_pps, count, packet_level)
+
+    def _append_flows(self, source: str, path: list[str], dynamics: int, max_rate_pps: Optional[float], count: int, packet_level: bool) -> int:
+        """Resolves a path to ports and appends the flows to the flow lists.
+
+        Args:
+            source (str): The string id of the sending host
+            path (list[str]): The devices the data travels, ending with the receiver
+            dynamics (int): AIMD, VEGAS, BBR or CONSTANT
+            max_rate_pps (Optional[float]): The most packets per second the sender offers, None for no limit
+            count (int): The number of identical flows to add
+            packet_level (bool): If the flow is also simulated packet by packet
+
+        Raises:
+            ValueError: If the path does not follow the network's links
+
+        Returns:
+            int: The first row of the added flows
+        """
+        hops = [source] + list(path)
+        if len(hops) < 2:
+            raise ValueError(f"Flow from {source} has an empty path")
+        ports = []
+        reverse_ports = []
+        for a, b in zip(hops, hops[1:]):
+            if (a, b) not in self.port_index:
+                raise ValueError(f"Flow from {source}: no link from {a} to {b}")
+            ports.append(self.port_index[(a, b)])
+            reverse_ports.append(self.port_index[(b, a)])
+        processing = sum(getattr(self.network.devices[hop], "processing_delay_ms", 0) for hop in hops[1:-1])
+        prop_delay = 2 * (self.delay[ports].sum() + processing)
+
+        first = len(self.flow_sources)
+        rows = min(count, len(BBR_PROBE_BW_GAINS)) if dynamics == BBR else 1
+        for row in range(rows):
+            self.flow_weights.append(count // rows + (row < count % rows))
+            self.flow_sources.append(source)
+            self.flow_dests.append(hops[-1])
+            self.flow_types.append(dynamics)
+            self.flow_packet_level.append(packet_level)
+            self.flow_ports.append(ports)
+            self.flow_reverse_ports.append(reverse_ports)
+            self.flow_prop_delay.append(max(prop_delay, 1.0))
+            self.flow_max_rate.append(np.inf if max_rate_pps is None else max_rate_pps / 1000)  # 1 tick = 1 ms
+            self.flow_acked.append(dynamics != CONSTANT)
+        self.packed = False
+        return first
+
+    def add_flow_specs(self, specs: list[dict]) -> list[int]:
+        """Adds flows from their config entries.
+
+        Args:
+            specs (list[dict]): Entries with source, path and optionally count, plus congestion_control and max_rate_pps
+                for TCP or "protocol": "udp" and rate_pps for datagrams
+
+        Returns:
+            list[int]: The first row of each entry's flows
+        """
+        rows = []
+        for spec in specs:
+            if spec.get("protocol", Protocol.TCP) == Protocol.UDP:
+                rows.append(self.add_datagram_flow(spec["source"], spec["path"], spec["rate_pps"], spec.get("count", 1)))
+            else:
+                rows.append(self.add_flow(spec["source"], spec["path"], spec.get("congestion_control", CongestionControlType.RENO),
+                                          spec.get("max_rate_pps"), spec.get("count", 1)))
+        return rows
+
+    def add_host_flows(self) -> list[int]:
+        """Adds the flows the hosts of the network send in packet runs, TCP at the rate hosts try to send and every datagram flow.
+
+        Returns:
+            list[int]: The row of each added flow
+        """
+        flows = []
+        for device in self.network.devices.values():
+            if device.device_type != "host":
+                continue
+            if device.id in Host.SENDERS and device.routing_path:
+                # ECMP subflows share the host's send rate, each on the path its label hashes to
+                paths = device.flow_paths()
+                for path in paths:
+                    flows.append(self.add_flow(device.id, path, device.congestion_control_type,
+                                               1000 / Host.SEND_INTERVAL_MS / len(paths), packet_level=True))
+            for flow in device.datagram_flows:
+                # Without a rate the token bucket releases a burst every tick
+                rate_pps = flow.rate_pps if flow.rate_pps is not None else flow.burst * 1000
+                flows.append(self.add_datagram_flow(device.id, flow.path, rate_pps, packet_level=True))
+        return flows
+
+    def _pack(self):
+        """Turns the flow lists into arrays, keeping the state of flows that were already running."""
+        count = len(self.flow_sources)
+        old = len(self.cwnd) if hasattr(self, "cwnd") else 0
+        lengths = np.array([len(p) for p in self.flow_ports], dtype=np.int64)
+        # CSR of the flow paths, flow f uses path_ports[path_ptr[f]:path_ptr[f + 1]]
+        self.path_ptr = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.path_ptr[1:])
+        self.path_ports = np.fromiter((p for ports in self.flow_ports for p in ports), dtype=np.int64, count=self.path_ptr[-1])
+        self.path_reverse = np.fromiter((p for ports in self.flow_reverse_ports for p in ports), dtype=np.int64, count=self.path_ptr[-1])
+        self.path_flow = np.repeat(np.arange(count), lengths)
+        self.path_lengths = lengths
+        self.types = np.array(self.flow_types, dtype=np.int8)
+        self.prop_delay = np.array(self.flow_prop_delay)
+        self.max_rate = np.array(self.flow_max_rate)
+        self.packet_level = np.array(self.flow_packet_level, dtype=bool)
+        self.acked = np.array(self.flow_acked, dtype=bool)
+        self.weights = np.array(self.flow_weights, dtype=np.float64)
+
+        def grow(name: str, fill):
+            values = np.empty(count)
+            values[old:] = fill[old:] if isinstance(fill, np.ndarray) else fill
+            if old:
+                values[:old] = getattr(self, name)
+            setattr(self, name, values)
+
+        grow("cwnd", INITIAL_CWND)
+        grow("ssthresh", INITIAL_SSTHRESH)
+        grow("base_rtt", self.prop_delay)
+        grow("btl_bw", INITIAL_CWND / self.prop_delay)
+        grow("full_bw", 0.0)
+        grow("full_bw_count", 0.0)
+        grow("rounds", 0.0)
+        grow("rate", 0.0)
+        grow("rtt", self.prop_delay)
+        grow("sent", 0.0)
+        grow("delivered", 0.0)
+        grow("rtt_sum", 0.0)
+        grow("loss_rate", 0.0)
+        self.in_startup = np.concatenate([self.in_startup[:old], np.ones(count - old, dtype=bool)]) if old else np.ones(count, dtype=bool)
+        # Spread the BBR gain cycles so flows do not all probe at once
+        self.cycle_offset = np.arange(count) % len(BBR_PROBE_BW_GAINS)
+        self.packed = True
+
+    def reset_stats(self):
+        """Clears the sums behind flow_stats, port_stats and handoff, e.g. after a warm-up."""
+        ports = len(self.port_ids)
+        if hasattr(self, "cwnd"):
+            self.sent[:] = 0.0
+            self.delivered[:] = 0.0
+            self.rtt_sum[:] = 0.0
+        self.elapsed = 0.0
+        self.arrival_sum = np.zeros(ports)
+        self.queue_sum = np.zeros(ports)
+        self.queue_max = np.zeros(ports)
+        self.drop_sum = np.zeros(ports)
+
+    def step(self):
+        """Advances every flow and queue by dt ticks."""
+        if not self.packed:
+            self._pack()
+        dt = self.dt
+        ports = len(self.port_ids)
+        path_ptr = self.path_ptr[:-1]
+
+        # RTT is the propagation delay plus the queueing on the data and ACK paths
+        queue_delay = self.queue / self.capacity
+        rtt = self.prop_delay + np.add.reduceat(queue_delay[self.path_ports] + queue_delay[self.path_reverse], path_ptr)
+
+        bbr = self.types == BBR
+        rate = self.cwnd / rtt
+        # PFTK: a window sees loss events at the last step's loss rate and waits an RTO after most of them
+        p = self.loss_rate
+        rto = rtt + RTO_MARGIN
+        with np.errstate(divide="ignore"):
+            pftk = 1 / (rtt * np.sqrt(2 * p / 3) + rto * np.minimum(1, 3 * np.sqrt(3 * p / 8)) * p * (1 + 32 * p ** 2))
+        rate = np.minimum(rate, pftk)
+        if bbr.any():
+            cycle = (np.floor(self.rounds) + self.cycle_offset).astype(np.int64) % len(BBR_PROBE_BW_GAINS)
+            gain = np.where(self.in_startup, BBR_STARTUP_GAIN, BBR_PROBE_BW_GAINS[cycle])
+            cwnd_cap = BBR_CWND_GAIN * self.btl_bw * self.base_rtt
+            rate = np.where(bbr, np.minimum(gain * self.btl_bw, cwnd_cap / rtt), rate)
+        rate = np.where(self.types == CONSTANT, self.max_rate, np.minimum(rate, self.max_rate))
+
+        # Load of each port, data thinned by the drops of the hops before it and ACKs for what gets through
+        load = rate * self.weights
+        kept = np.log1p(-np.minimum(self.drop, 1 - 1e-12))[self.path_ports]
+        before = np.cumsum(kept) - kept
+        before -= np.repeat(before[path_ptr], self.path_lengths)
+        flow_rate = load[self.path_flow] * np.exp(before)
+        ack_rate = np.where(self.acked, load * (1 - self.loss_rate), 0.0)[self.path_flow]
+        arrivals = np.bincount(self.path_ports, flow_rate, ports) + self.ack_cost * np.bincount(self.path_reverse, ack_rate, ports)
+
+        # A full drop-tail queue drops whatever exceeds the service rate
+        overload = np.maximum(1 - self.capacity / np.maximum(arrivals, 1e-12), 0.0)
+        drop = np.where(self.queue >= self.buffer, overload, 0.0)
+        drop = 1 - (1 - drop) * (1 - self.loss)
+        self.drop = drop
+        survive = np.exp(np.add.reduceat(np.log1p(-np.minimum(drop, 1 - 1e-12))[self.path_ports], path_ptr))
+        loss = 1 - survive
+
+        # Window dynamics, a loss event halves the window at rate rate * loss
+        acks = rate * survive
+        halving = self.cwnd / 2 * rate * loss
+        slow_start = self.cwnd < self.ssthresh
+        growth = np.where(slow_start, acks, acks / self.cwnd)
+        aimd = self.types == AIMD
+        vegas = self.types == VEGAS
+        self.base_rtt = np.where(vegas, np.minimum(self.base_rtt, rtt), self.base_rtt)
+        queued = self.cwnd * (1 - self.base_rtt / rtt)
+        vegas_step = np.where(queued < VEGAS_ALPHA, acks, np.where(queued > VEGAS_BETA, -acks, 0.0))
+        dcwnd = np.where(aimd, growth, np.where(vegas, vegas_step, 0.0)) - halving
+        self.ssthresh = np.where((loss > 0) & slow_start, np.maximum(self.cwnd / 2, 2.0), self.ssthresh)
+        self.cwnd = np.maximum(self.cwnd + dcwnd * dt, 1.0)
+
+        # BBR keeps a decaying max of its delivery rate and leaves startup once it stops growing
+        if bbr.any():
+            # A full queue already shows in survive, a growing one only in the bottleneck share
+            share = np.minimum.reduceat(np.minimum(self.capacity / np.maximum(arrivals, 1e-12), 1.0)[self.path_ports], path_ptr)
+            delivery = rate * np.minimum(share, survive)
+            decay = np.exp(-dt / (BBR_BTL_BW_WINDOW_ROUNDS * rtt))
+            self.btl_bw = np.where(bbr, np.maximum(self.btl_bw * decay, delivery), self.btl_bw)
+            new_round = np.floor(self.rounds + dt / rtt) > np.floor(self.rounds)
+            check = bbr & self.in_startup & new_round
+            grew = self.btl_bw >= 1.25 * self.full_bw
+            self.full_bw = np.where(check & grew, self.btl_bw, self.full_bw)
+            self.full_bw_count = np.where(check, np.where(grew, 0, self.full_bw_count + 1), self.full_bw_count)
+            self.in_startup &= ~(bbr & (self.full_bw_count >= 3))
+            # BBR's window only caps its rate, report what it has in flight
+            self.cwnd = np.where(bbr, rate * rtt, self.cwnd)
+        self.rounds += dt / rtt
+
+        # Queues integrate the difference between arrivals and service
+        self.queue = np.clip(self.queue + (arrivals - self.capacity) * dt, 0.0, self.buffer)
+
+        self.rate = rate
+        self.rtt = rtt
+        self.loss_rate = loss
+        self.sent += rate * dt
+        self.delivered += rate * survive * dt
+        self.rtt_sum += rtt * dt
+        self.elapsed += dt
+        self.arrival_sum += arrivals * dt
+        self.queue_sum += self.queue * dt
+        np.maximum(self.queue_max, self.queue, out=self.queue_max)
+        self.drop_sum += arrivals * drop * dt
+        self.tick += dt
+
+    def run(self, ticks: float, sample_every: float = 100) -> 'FluidModel':
+        """Runs the model for a number of ticks, can be called again to continue.
+
+        Args:
+            ticks (float): The ticks to simulate
+            sample_every (float, optional): Ticks between samples of the port queues and total rate. Defaults to 100.
+
+        Returns:
+            FluidModel: The model, for chaining
+        """
+        end = self.tick + ticks
+        next_sample = self.tick + sample_every
+        while self.tick < end - 1e-9:
+            self.step()
+            if self.tick >= next_sample - 1e-9:
+                self.samples.append((self.tick, float(self.rate @ self.weights) * 1000, self.queue.copy()))
+                next_sample += sample_every
+        return self
+
+    def flow_stats(self) -> list[dict]:
+        """Summarizes every flow since the last reset_stats.
+
+        Returns:
+            list[dict]: Rate, goodput and RTT of each row, per flow it stands for
+        """
+        if not self.packed:
+            self._pack()
+        seconds = max(self.elapsed, 1e-9) / 1000
+        return [{
+            "source": self.flow_sources[f],
+            "dest": self.flow_dests[f],
+            "dynamics": DYNAMICS_NAMES[int(self.types[f])],
+            "count": int(self.weights[f]),
+            "packet_level": bool(self.packet_level[f]),
+            "rate_pps": float(self.sent[f] / seconds),
+            "goodput_pps": float(self.delivered[f] / seconds),
+            "rtt_mean": float(self.rtt_sum[f] / max(self.elapsed, 1e-9)),
+            "cwnd": float(self.cwnd[f]),
+        } for f in range(len(self.flow_sources))]
+
+    def port_stats(self, min_utilization: float = 0.0) -> list[dict]:
+        """Summarizes every port that carried traffic since the last reset_stats.
+
+        Args:
+            min_utilization (float, optional): Leave out ports with a lower mean utilization. Defaults to 0.0.
+
+        Returns:
+            list[dict]: Capacity, utilization, queue and drops of each port
+        """
+        elapsed = max(self.elapsed, 1e-9)
+        utilization = self.arrival_sum / elapsed / self.capacity
+        out = []
+        for i in np.flatnonzero((self.arrival_sum > 0) & (utilization >= min_utilization)):
+            out.append({
+                "port": f"{self.port_ids[i][0]}->{self.port_ids[i][1]}",
+                "capacity_pps": float(self.capacity[i] * 1000),
+                "utilization": float(utilization[i]),
+                "queue_mean": float(self.queue_sum[i] / elapsed),
+                "queue_max": float(self.queue_max[i]),
+                "drop_pps": float(self.drop_sum[i] / elapsed * 1000),
+            })
+        return out
+
+    def bottlenecks(self, top: int = 1) -> list[tuple[str, str]]:
+        """Finds the router ports that are most congested, by mean queue and then utilization.
+
+        Args:
+            top (int, optional): The number of ports to return. Defaults to 1.
+
+        Returns:
+            list[tuple[str, str]]: (router id, next hop id) of each port
+        """
+        elapsed = max(self.elapsed, 1e-9)
+        routers = np.array([self.network.devices[a].device_type == "router" for a, _ in self.port_ids], dtype=bool)
+        utilization = np.where(routers, self.arrival_sum / elapsed / self.capacity, -1.0)
+        order = np.lexsort((-utilization, -np.where(routers, self.queue_sum, -1.0)))
+        return [self.port_ids[i] for i in order[:top] if routers[i] and self.arrival_sum[i] > 0]
+
+    def handoff(self, ports: list[tuple[str, str]]) -> dict:
+        """Hands selected router ports to the packet level simulation of the network.
+        The part of the port's service the fluid only flows got, their data and ACKs, becomes background
+        traffic, while packet level flows queue and drop there as usual.
+
+        Args:
+            ports (list[tuple[str, str]]): (router id, next hop id) of each port
+
+        Raises:
+            ValueError: If a port is not a link out of a router
+
+        Returns:
+            dict: (router id, next hop id) -> background load in packets per second
+        """
+        if not self.packed:
+            self._pack()
+        # Port loads are linear in the flow rates, so the mean rate of each flow gives the mean load
+        elapsed = max(self.elapsed, 1e-9)
+        fluid_only = np.where(self.packet_level, 0.0, self.weights / elapsed)
+        fluid_load = (np.bincount(self.path_ports, (self.sent * fluid_only)[self.path_flow], len(self.port_ids))
+                      + self.ack_cost * np.bincount(self.path_reverse, np.where(self.acked, self.delivered * fluid_only, 0.0)[self.path_flow], len(self.port_ids)))
+        # An overloaded port serves every flow in proportion to its load
+        served = fluid_load * np.minimum(1.0, self.capacity * elapsed / np.maximum(self.arrival_sum, 1e-12))
+        out = {}
+        for router_id, next_hop in ports:
+            router = self.network.devices.get(router_id)
+            if router is None or router.device_type != "router" or (router_id, next_hop) not in self.port_index:
+                raise ValueError(f"{router_id}->{next_hop} is not a router port")
+            load = served[self.port_index[(router_id, next_hop)]]
+            service = load * (self.packet_size_bytes if router.service_in_bytes else 1)
+            router.port_background[next_hop] = min(service, router.service_rate / 1000) / router.time_base.ticks_per_ms
+            out[(router_id, next_hop)] = float(load * 1000)
+        return out
+
+    def save(self, path: str):
+        """Saves the port samples and flow results to an .npz file.
+
+        Args:
+            path (str): The .npz file
+        """
+        flows = self.flow_stats()
+        np.savez(path,
+                 sample_tick=np.array([s[0] for s in self.samples]),
+                 sample_rate_pps=np.array([s[1] for s in self.samples]),
+                 sample_queue=np.array([s[2] for s in self.samples]).reshape(len(self.samples), len(self.port_ids)),
+                 ports=np.array([f"{a}->{b}" for a, b in self.port_ids]),
+                 flow_source=np.array([f["source"] for f in flows]),
+                 flow_dest=np.array([f["dest"] for f in flows]),
+                 flow_count=np.array([f["count"] for f in flows]),
+                 flow_rate_pps=np.array([f["rate_pps"] for f in flows]),
+                 flow_goodput_pps=np.array([f["goodput_pps"] for f in flows]),
+                 flow_rtt_mean=np.array([f["rtt_mean"] for f in flows]))
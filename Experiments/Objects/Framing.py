@@ -0,0 +1,180 @@
+from collections import deque
+
+MAX_SACK_BLOCKS = 4  # the most SACK blocks the 40 bytes of TCP options hold
+
+
+class Framing:
+    """Sizes packets as they occupy the wire.
+    Every packet carries the IP header and its protocol's header, and every frame the link layer's overhead;
+    IP packets shorter than the link's minimum payload are padded. The defaults are TCP and UDP over IPv4 on Ethernet.
+    All sizes are plain ints worked out once, so sizing a packet costs an add and a max.
+    """
+    mtu: int  # the largest IP packet
+    ip_header_bytes: int
+    tcp_header_bytes: int
+    udp_header_bytes: int
+    link_overhead_bytes: int  # link header, trailer, preamble and gap around every frame
+    min_frame_payload_bytes: int  # shorter IP packets are padded to this
+    message_bytes: int  # the size of each message a sending host's application writes
+    aggregate: bool
+    send_buffer_bytes: int
+    mss: int  # the most TCP payload in one packet
+    max_datagram_fragment_bytes: int  # the most UDP payload in one IP packet, larger datagrams are fragmented
+    ack_wire_bytes: tuple[int, ...]  # number of SACK blocks -> wire size of the ACK
+
+    def __init__(self, mtu: int = 1500, ip_header_bytes: int = 20, tcp_header_bytes: int = 20, udp_header_bytes: int = 8,
+                 link_overhead_bytes: int = 38, min_frame_payload_bytes: int = 46, message_bytes: int = 1460, aggregate: bool = True,
+                 send_buffer_bytes: int = 65536):
+        """Constructor for the framing.
+
+        Args:
+            mtu (int, optional): The largest IP packet in bytes. Defaults to 1500.
+            ip_header_bytes (int, optional): The IP header. Defaults to 20.
+            tcp_header_bytes (int, optional): The TCP header without options. Defaults to 20.
+            udp_header_bytes (int, optional): The UDP header. Defaults to 8.
+            link_overhead_bytes (int, optional): Added to every frame, Ethernet's header, FCS, preamble and inter-frame gap by default. Defaults to 38.
+            min_frame_payload_bytes (int, optional): Shorter IP packets are padded to this. Defaults to 46.
+            message_bytes (int, optional): The size of each message a sending host writes, larger ones are segmented. Defaults to 1460.
+            aggregate (bool, optional): Coalesce small messages into full packets, holding a partial packet while data is unACKed
+                as Nagle's algorithm does. Each message starts its own packets otherwise. Defaults to True.
+            send_buffer_bytes (int, optional): The most bytes waiting to be sent, a message that does not fit is dropped. Defaults to 65536.
+
+        Raises:
+            ValueError: When the MTU leaves no room for TCP payload
+        """
+        self.mtu = mtu
+        self.ip_header_bytes = ip_header_bytes
+        self.tcp_header_bytes = tcp_header_bytes
+        self.udp_header_bytes = udp_header_bytes
+        self.link_overhead_bytes = link_overhead_bytes
+        self.min_frame_payload_bytes = min_frame_payload_bytes
+        self.message_bytes = message_bytes
+        self.aggregate = aggregate
+        self.send_buffer_bytes = send_buffer_bytes
+        self.mss = mtu - ip_header_bytes - tcp_header_bytes
+        if self.mss <= 0:
+            raise ValueError(f"An MTU of {mtu} bytes leaves no room for TCP payload")
+        self.max_datagram_fragment_bytes = mtu - ip_header_bytes
+        # SACK option: two NOPs, kind, length and 8 bytes per block
+        self.ack_wire_bytes = tuple(self.wire_bytes(ip_header_bytes + tcp_header_bytes + (4 + 8 * n if n else 0))
+                                    for n in range(MAX_SACK_BLOCKS + 1))
+
+    def wire_bytes(self, ip_bytes: int) -> int:
+        """Gets the bytes an IP packet takes on the link.
+
+        Args:
+            ip_bytes (int): The IP packet, headers included
+
+        Returns:
+            int: The frame with padding and link overhead
+        """
+        return max(ip_bytes, self.min_frame_payload_bytes) + self.link_overhead_bytes
+
+    def tcp_bytes(self, payload_bytes: int) -> int:
+        """Gets the wire size of a TCP segment.
+
+        Args:
+            payload_bytes (int): The segment's payload, at most mss
+
+        Returns:
+            int: The bytes on the link
+        """
+        return max(payload_bytes + self.ip_header_bytes + self.tcp_header_bytes, self.min_frame_payload_bytes) + self.link_overhead_bytes
+
+    def ack_bytes(self, sack_blocks: int) -> int:
+        """Gets the wire size of a pure ACK.
+
+        Args:
+            sack_blocks (int): The SACK blocks it carries
+
+        Returns:
+            int: The bytes on the link
+        """
+        return self.ack_wire_bytes[min(sack_blocks, MAX_SACK_BLOCKS)]
+
+    def datagram_bytes(self, payload_bytes: int) -> int:
+        """Gets the wire size of a UDP datagram, all of its IP fragments together.
+
+        Args:
+            payload_bytes (int): The datagram's payload
+
+        Returns:
+            int: The bytes on the link
+        """
+        remaining = payload_bytes + self.udp_header_bytes
+        total = 0
+        # Fragments carry 8 byte aligned parts of the UDP packet, each with its own IP header
+        fragment = self.max_datagram_fragment_bytes // 8 * 8
+        while remaining > self.max_datagram_fragment_bytes:
+            total += self.wire_bytes(fragment + self.ip_header_bytes)
+            remaining -= fragment
+        return total + self.wire_bytes(remaining + self.ip_header_bytes)
+
+
+class SendBuffer:
+    """Bytes a host's application wrote that have not been sent yet, cut into packet payloads by a Framing."""
+    framing: Framing
+    messages: deque  # bytes left of each message, oldest first
+    queued_bytes: int
+    dropped_messages: int
+
+    def __init__(self, framing: Framing):
+        """Constructor for the send buffer.
+
+        Args:
+            framing (Framing): The framing that sizes the payloads
+        """
+        self.framing = framing
+        self.messages = deque()
+        self.queued_bytes = 0
+        self.dropped_messages = 0
+
+    def write(self, message_bytes: int) -> bool:
+        """Queues a message.
+
+        Args:
+            message_bytes (int): The size of the message
+
+        Returns:
+            bool: False when the buffer is too full and the message was dropped
+        """
+        if self.queued_bytes + message_bytes > self.framing.send_buffer_bytes:
+            self.dropped_messages += 1
+            return False
+        self.messages.append(message_bytes)
+        self.queued_bytes += message_bytes
+        return True
+
+    def next_payload(self, in_flight: int) -> int:
+        """Gets the payload of the next packet, without taking it.
+
+        Args:
+            in_flight (int): The host's packets not yet ACKed
+
+        Returns:
+            int: The payload in bytes, 0 when nothing should be sent now
+        """
+        if not self.queued_bytes:
+            return 0
+        mss = self.framing.mss
+        if not self.framing.aggregate:
+            return min(self.messages[0], mss)
+        if self.queued_bytes < mss and in_flight:
+            # Nagle: wait for the ACKs and send the small messages together
+            return 0
+        return min(self.queued_bytes, mss)
+
+    def take(self, payload_bytes: int):
+        """Removes the bytes of a packet that was sent.
+
+        Args:
+            payload_bytes (int): The packet's payload
+        """
+        self.queued_bytes -= payload_bytes
+        while payload_bytes:
+            head = self.messages[0]
+            if head > payload_bytes:
+                self.messages[0] = head - payload_bytes
+                return
+            self.messages.popleft()
+            payload_bytes -= head
@@ -2,44 +2,116 @@ from Enums.CongestionControlType import CongestionControlType
 from Objects.Device import Device
 from Objects.Packet import Packet
 from Objects.Link import Link
-from Objects.CongestionControl import CongestionControl, RenoCongestionControl, BBRCongestionControl, VegasCongestionControl, RLCongestionControl
-from abc import abstractmethod
+from Objects.CongestionControl import CongestionControl
+from Objects.AckPolicy import AckPolicy, ReceiveState
+from Enums.Protocol import Protocol
+from Enums.TraceEvent import TraceEvent
+from Enums.RoutingMode import RoutingMode
+from Objects.CongestionControlRegistry import REGISTRY, congestion_control_name
+from Objects.TimeBase import TimeBase, NEVER
+from typing import Optional, TYPE_CHECKING
+import copy
+import math
+import os
+
+# Datagram flows, framing, ECMP labels and tracing are only imported by the hosts that use them
+if TYPE_CHECKING:
+    from Objects.DatagramFlow import DatagramFlow
+    from Objects.Framing import Framing, SendBuffer
 
 class Host(Device):
-    """Host implementation extends from Device."""
+    """Host implementation extends from Device.
+    Sends, timeouts and delayed ACKs run on the network's ticks, the congestion controller sees times in ms.
+    """
+    SEND_INTERVAL_MS = 10  # sending hosts try one data packet per interval
+    SENDERS = {"h1": "h4", "h3": "h2", "h4": "h1"}  # sending host id -> destination host id
     next_seq_num: int
+    send_interval: int  # SEND_INTERVAL_MS in ticks
+    next_departure_tick: float
+    paced_backlog: int
     unacked_packets: dict  # seq_num -> (packet, send_tick, retransmit_count)
+    snd_una: int
     congestion_control: CongestionControl
+    congestion_control_type: str  # registry name of the algorithm
+    ack_policy: AckPolicy
+    receive_states: dict  # source host id -> ReceiveState
+    delayed_acks: dict  # source host id -> ReceiveState with an ACK held back
+    datagram_flows: list['DatagramFlow']
+    datagrams_received: int
+    routing: RoutingMode
+    subflows: int
+    flow_labels: list[int]  # one per ECMP subflow, picked on the first send
+    data_route: Optional[tuple]  # the route every data packet carries, set on the first send
+    framing: Optional['Framing']
+    send_buffer: Optional['SendBuffer']  # messages not yet sent, only with framing
 
-    def __init__(self, id: str, routing_path: list[str] = [], congestion_control: CongestionControlType = CongestionControlType.RENO):
+    def __init__(self, id: str, routing_path: list[str] = [], congestion_control: CongestionControlType = CongestionControlType.RENO, ack_policy: Optional[AckPolicy] = None,
+                 routing: RoutingMode = RoutingMode.STATIC, subflows: int = 1, congestion_control_params: Optional[dict] = None):
         """Constructor for a Host.
 
         Args:
             id (str): The string id of the host
             routing_path (list[str], optional): The set routing path of the host to send packets. Defaults to [].
-            congestion_control (CongestionControlType, optional): The congestion control algorithm to use. Defaults to CongestionControlType.RENO.
+            congestion_control (CongestionControlType, optional): The congestion control algorithm to use, any name in the registry. Defaults to CongestionControlType.RENO.
+            ack_policy (Optional[AckPolicy], optional): When this host ACKs received data. Defaults to an ACK per segment.
+            routing (RoutingMode, optional): STATIC follows routing_path, ECMP lets routers pick among equal cost hops toward its last device. Defaults to RoutingMode.STATIC.
+            subflows (int, optional): The number of ECMP subflows, consecutive packets take turns. Defaults to 1.
+            congestion_control_params (Optional[dict], optional): Keyword arguments of the algorithm's constructor. Defaults to None.
 
         Raises:
-            ValueError: When a non valid congestion control algorithm is picked
+            ValueError: When a non valid congestion control algorithm or routing mode is picked
         """
         super().__init__("host", id)
         self.next_seq_num = 0
+        self.next_departure_tick = 0.0
+        self.paced_backlog = 0
         self.unacked_packets = {}
+        self.snd_una = 0
+        self.ack_policy = ack_policy or AckPolicy()
+        self.receive_states = {}
+        self.delayed_acks = {}
+        self.datagram_flows = []
+        self.datagrams_received = 0
         
-        if congestion_control == CongestionControlType.BBR:
-            self.congestion_control = BBRCongestionControl()
-        elif congestion_control == CongestionControlType.VEGAS:
-            self.congestion_control = VegasCongestionControl()
-        elif congestion_control == CongestionControlType.RENO:
-            self.congestion_control = RenoCongestionControl()
-        elif congestion_control == CongestionControlType.RL:
-            self.congestion_control = RLCongestionControl()
-        else:
-            raise ValueError("Not a valid congestion control enum used")
+        self.congestion_control_type = congestion_control_name(congestion_control)
+        self.congestion_control = REGISTRY.create(self.congestion_control_type, congestion_control_params)
         
         self.routing_path = routing_path
+        try:
+            self.routing = RoutingMode(routing)
+        except ValueError:
+            raise ValueError("Not a valid routing mode enum used")
+        self.subflows = max(1, subflows)
+        self.flow_labels = []
+        self.data_route = None
+        self.set_time_base(self.time_base)
+        self.set_framing(None)
         
-        self.file = open(self.id, "w")
+        # Only hosts that send log their cwnd, the file is opened on the first write
+        self.file = None
+        self.cwnd_lines = 0
+
+    def set_time_base(self, time_base: TimeBase):
+        """Sets the length of a tick and the send interval in ticks.
+
+        Args:
+            time_base (TimeBase): The network's time base
+        """
+        super().set_time_base(time_base)
+        self.send_interval = max(time_base.ticks(self.SEND_INTERVAL_MS), 1)
+        self.congestion_control.rtt_estimator.set_time_base(time_base)
+
+    def set_framing(self, framing: Optional['Framing']):
+        """Sets the wire sizes of the host's packets.
+
+        Args:
+            framing (Optional[Framing]): The network's framing, None for 1 byte data packets and 0 byte ACKs
+        """
+        self.framing = framing
+        self.send_buffer = None
+        if framing is not None:
+            from Objects.Framing import SendBuffer
+            self.send_buffer = SendBuffer(framing)
 
     def send_packet(self, packet: Packet):
         """Sends a packet along the set routing path.
@@ -50,61 +122,230 @@ class Host(Device):
         Raises:
             Exception: If the next path taken is not in the forwarding table
         """
-        first_hop = packet.id_sequence[0]
+        if packet.flow_label is not None and self.network is not None:
+            self.network.route(packet, self.id)
+        first_hop = packet.id_sequence[packet.hop]
         if first_hop not in self.forwarding_table:
             raise Exception(f"Invalid path of packet from a host: first_hop {first_hop} not in forwarding table. Available keys: {list(self.forwarding_table.keys())}")
         to_send_link: Link = self.forwarding_table[first_hop]
         to_send_link.packets.append(packet)
+        if self.network is not None and self.network.tracer is not None:
+            self.network.tracer.record(TraceEvent.SEND, packet, self.id, first_hop)
+
+    def intern_route(self, path) -> tuple:
+        """Gets the network's shared copy of a route.
+
+        Args:
+            path: The devices to travel, a list or tuple
+
+        Returns:
+            tuple: The route, a private tuple when the host is not in a network
+        """
+        return self.network.route_cache.intern(path) if self.network is not None else tuple(path)
+
+    def add_datagram_flow(self, dest_id: str, packet_path: list[str], packet_size_bytes: int = 1, rate_pps: Optional[float] = None, burst: int = 1) -> 'DatagramFlow':
+        """Adds an unreliable UDP style flow sent alongside the host's TCP traffic.
+
+        Args:
+            dest_id (str): The string id of the receiving host
+            packet_path (list[str]): The devices the datagrams travel, ending with the receiver
+            packet_size_bytes (int, optional): The size of each datagram. Defaults to 1.
+            rate_pps (Optional[float], optional): Rate limit in datagrams per second, None sends burst datagrams every tick. Defaults to None.
+            burst (int, optional): The most datagrams released in one tick. Defaults to 1.
+
+        Returns:
+            DatagramFlow: The added flow
+        """
+        from Objects.DatagramFlow import DatagramFlow
+        flow = DatagramFlow(dest_id, packet_path, packet_size_bytes, rate_pps, burst)
+        self.datagram_flows.append(flow)
+        return flow
+
+    def get_flow_labels(self) -> list[int]:
+        """Gets the ECMP label of each subflow.
+        Like a multipath transport opening subflows, labels that hash onto a path already taken are skipped
+        until every equal cost path has a subflow.
+
+        Returns:
+            list[int]: The labels, empty for static routing
+        """
+        if self.flow_labels or self.routing != RoutingMode.ECMP or not self.routing_path:
+            return self.flow_labels
+        from Objects.Routing import flow_label
+        dest_id = self.routing_path[-1]
+        routes = self.network.get_routes() if self.network is not None else None
+        path_count = len(routes.paths(self.id, dest_id)) if routes is not None else 1
+        taken = set()
+        candidate = 0
+        while len(self.flow_labels) < self.subflows:
+            label = flow_label(self.id, dest_id, candidate)
+            candidate += 1
+            path = tuple(routes.trace(self.id, dest_id, label)) if routes is not None else ()
+            if path in taken and len(taken) < path_count and candidate < 64 * self.subflows:
+                continue
+            taken.add(path)
+            self.flow_labels.append(label)
+        return self.flow_labels
+
+    def flow_paths(self) -> list[list[str]]:
+        """Gets the path of each subflow the host sends on.
+
+        Returns:
+            list[list[str]]: The routing path, or the path each ECMP flow label hashes to
+        """
+        labels = self.get_flow_labels()
+        if not labels or self.network is None:
+            return [self.routing_path] if self.routing_path else []
+        routes = self.network.get_routes()
+        return [routes.trace(self.id, self.routing_path[-1], label) for label in labels]
 
-    def send_data_packet(self, dest_host_id: str, data_size: int, current_tick: int):
+    def log_cwnd(self):
+        """Writes the current cwnd to the host's file.
+        Under a memory budget a full file is rotated to <host>.1, so at most two files' worth is kept.
+        """
+        budget = self.network.memory_budget if self.network is not None else None
+        if self.file is not None and budget is not None and self.cwnd_lines >= budget.cwnd_log_lines:
+            if hasattr(self.file, "rotate"):
+                self.file.rotate()
+                self.cwnd_lines = 0
+            else:
+                self.file.close()
+                os.replace(self.file.name, self.file.name + ".1")
+                self.file = None
+        if self.file is None:
+            if self.network is None:
+                self.file = open(self.id, "w")
+            elif self.network.writer is not None:
+                # Written and compressed off the simulation thread
+                self.file = self.network.writer.open(os.path.join(self.network.output_dir, self.id))
+            else:
+                self.file = open(os.path.join(self.network.output_dir, self.id), "w")
+            self.cwnd_lines = 0
+        self.file.write(str(self.congestion_control.get_cwnd()) + "\n")
+        self.cwnd_lines += 1
+
+    def send_data_packet(self, dest_host_id: str, data_size: int, current_tick: int) -> bool:
         """Wrapper for send_packet.
         Sends a packet created with the given data.
 
         Args:
             dest_host_id (str): The host destination string ID
-            data_size (int): The size of the packet
+            data_size (int): The payload of the packet, also its size without framing
             current_tick (int): The current tick of the simulation
+
+        Returns:
+            bool: False when the window or a missing path held the packet back
         """
-        if len(self.unacked_packets) >= self.congestion_control.get_cwnd() or len(self.routing_path) <= 0:
-            return
+        in_flight = len(self.unacked_packets) + self.paced_backlog
+        if in_flight >= self.congestion_control.get_cwnd() or len(self.routing_path) <= 0:
+            return False
 
         seq_num = self.next_seq_num
         self.next_seq_num += 1
 
+        labels = self.get_flow_labels()
+        if self.data_route is None:
+            # Routers pick the hops of labelled packets, which only carry their destination
+            self.data_route = self.intern_route(self.routing_path[-1:] if labels else self.routing_path)
+        label = labels[seq_num % len(labels)] if labels else None
+
         p = Packet(
-            id_sequence=self.routing_path,
-            packet_size_bytes=data_size,
+            id_sequence=self.data_route,
+            packet_size_bytes=self.framing.tcp_bytes(data_size) if self.framing is not None else data_size,
+            payload_bytes=data_size,
             seq_num=seq_num,
             source_id=self.id,
-            dest_id=dest_host_id
+            dest_id=dest_host_id,
+            ecn_capable=self.congestion_control.ecn_capable,
+            flow_label=label
         )
 
-        self.unacked_packets[seq_num] = (p, current_tick, 0)
-        self.congestion_control.on_packet_sent(seq_num, current_tick)
-        self.send_packet(p)
-        print(f"Host {self.id} sent packet seq {seq_num}, cwnd={self.congestion_control.get_cwnd():.2f}")
+        # Hand the packet to the shared pacer when the controller paces
+        pacing_rate = self.congestion_control.get_pacing_rate()
+        if pacing_rate and self.network is not None:
+            # Controllers give the rate in packets per ms
+            self.network.pacer.enqueue(self, p, pacing_rate / self.time_base.ticks_per_ms, current_tick)
+        else:
+            self.transmit_packet(p, current_tick)
+        return True
+
+    def send_message(self, dest_host_id: str, message_bytes: int, current_tick: int):
+        """Writes an application message and sends what the framing and the window allow of the send buffer.
+        Messages longer than the MSS leave in several packets, short ones may wait to be sent together.
+
+        Args:
+            dest_host_id (str): The host destination string ID
+            message_bytes (int): The size of the message
+            current_tick (int): The current tick of the simulation
+        """
+        buffer = self.send_buffer
+        buffer.write(message_bytes)
+        while True:
+            payload = buffer.next_payload(len(self.unacked_packets) + self.paced_backlog)
+            if not payload or not self.send_data_packet(dest_host_id, payload, current_tick):
+                return
+            buffer.take(payload)
+
+    def transmit_packet(self, packet: Packet, current_tick: int):
+        """Puts a new data packet on the wire and starts tracking it.
+
+        Args:
+            packet (Packet): The data Packet object
+            current_tick (int): The current tick of the simulation
+        """
+        self.unacked_packets[packet.seq_num] = (packet, current_tick, 0)
+        self.congestion_control.on_packet_sent(packet.seq_num, self.time_base.to_ms(current_tick))
+        self.send_packet(packet)
+        print(f"Host {self.id} sent packet seq {packet.seq_num}, cwnd={self.congestion_control.get_cwnd():.2f}")
 
     def handle_ack(self, ack_packet: Packet, current_tick: int):
-        """Handles an incoming ACK packet.
+        """Handles an incoming cumulative ACK packet and its SACK blocks.
 
         Args:
             ack_packet (Packet): The ACK Packet object
             current_tick (int): The current tick of the simulation
         """
         ack_num = ack_packet.ack_num
+        now_ms = self.time_base.to_ms(current_tick)
+        advanced = ack_num >= self.snd_una
+
+        # Everything up to ack_num arrived, plus whatever the SACK blocks report
+        newly_acked = []
+        for seq_num in range(self.snd_una, ack_num + 1):
+            if seq_num in self.unacked_packets:
+                newly_acked.append(seq_num)
+        self.snd_una = max(self.snd_una, ack_num + 1)
+        for start, end in ack_packet.sack_blocks:
+            for seq_num in range(max(start, self.snd_una), end + 1):
+                if seq_num in self.unacked_packets:
+                    newly_acked.append(seq_num)
+
+        # Let the controller see the congestion mark before the ACK itself
+        if ack_packet.ece and newly_acked:
+            self.congestion_control.on_ecn(newly_acked[-1], now_ms, len(newly_acked))
+
+        for seq_num in newly_acked:
+            packet, send_tick, retransmit_count = self.unacked_packets.pop(seq_num)
+
+            # Only packets sent once give a clean RTT sample (Karn's rule)
+            if retransmit_count == 0:
+                rtt_ms = self.time_base.to_ms(current_tick - send_tick)
+                self.congestion_control.on_rtt_sample(seq_num, rtt_ms, now_ms)
+                if self.network is not None:
+                    self.network.analytics.on_rtt_sample(self.id, packet.dest_id, rtt_ms)
+            if self.network is not None and self.network.tracer is not None:
+                from Objects.PacketTrace import NO_VALUE
+                rtt = current_tick - send_tick if retransmit_count == 0 else NO_VALUE
+                self.network.tracer.record(TraceEvent.ACK, packet, self.id, ack_packet.source_id, rtt)
 
-        if ack_num in self.unacked_packets:
-            # Remove acknowledged packet
-            del self.unacked_packets[ack_num]
-            
             # Handle congestion control
-            new_cwnd = self.congestion_control.on_ack_received(ack_num, current_tick)
+            new_cwnd = self.congestion_control.on_ack_received(seq_num, now_ms)
             if new_cwnd is not None:
-                print(f"Host {self.id} received ACK for seq {ack_num}, cwnd={new_cwnd:.2f}")
+                print(f"Host {self.id} received ACK for seq {seq_num}, cwnd={new_cwnd:.2f}")
 
-        elif ack_num < max(self.unacked_packets.keys(), default=0):
-            # Duplicate ACK
-            new_cwnd = self.congestion_control.on_dup_ack(ack_num, current_tick)
+        if not advanced and self.unacked_packets:
+            # Duplicate ACK, the receiver is still missing ack_num + 1
+            new_cwnd = self.congestion_control.on_dup_ack(ack_num, now_ms)
             if new_cwnd is not None:
                 # Fast retransmit triggered
                 self.retransmit_packet(ack_num + 1, current_tick)
@@ -116,12 +357,18 @@ class Host(Device):
         Args:
             current_tick (int): The current tick of the simulation
         """
+        rto_ticks = self.congestion_control.rtt_estimator.get_rto_ticks()
+        timed_out = False
         for seq_num, (packet, send_tick, retransmit_count) in list(self.unacked_packets.items()):
-            if current_tick - send_tick > self.congestion_control.get_rto():
+            if current_tick - send_tick > rto_ticks:
                 # Timeout occurred
-                new_cwnd = self.congestion_control.on_timeout(seq_num, current_tick)
+                timed_out = True
+                new_cwnd = self.congestion_control.on_timeout(seq_num, self.time_base.to_ms(current_tick))
                 self.retransmit_packet(seq_num, current_tick)
                 print(f"Host {self.id} timeout for seq {seq_num}, cwnd={new_cwnd:.2f}")
+        if timed_out:
+            # Back off once per expiry, not once per packet that expired with it
+            self.congestion_control.rtt_estimator.on_timeout()
 
     def retransmit_packet(self, seq_num: int, current_tick: int):
         """Retransmits a packet.
@@ -131,16 +378,21 @@ class Host(Device):
             current_tick (int): The current tick of the simulation
         """
         if seq_num in self.unacked_packets:
-            packet, _, retransmit_count = self.unacked_packets[seq_num]
+            original, _, retransmit_count = self.unacked_packets[seq_num]
+            # Send a copy, the original may still be in flight somewhere on its path
+            packet = copy.copy(original)
             packet.retransmit_count += 1
-            # Reset the path to original for retransmission
-            packet.id_sequence = packet.original_path.copy()
+            packet.ce = False
+            # Start the path over, the route itself is shared and never changed
+            packet.id_sequence = packet.original_path
+            packet.hop = 0
             self.unacked_packets[seq_num] = (packet, current_tick, retransmit_count + 1)
             self.send_packet(packet)
             print(f"Host {self.id} retransmitted seq {seq_num}")
 
     def receive_packet(self, packet: Packet, current_tick: int):
-        """Handles receiving a non-ACK packet by a host.
+        """Handles receiving a packet by a host.
+        ACKs go to the sender logic, data updates the flow's receive state and may trigger an ACK.
 
         Args:
             packet (Packet): The received Packet object
@@ -148,6 +400,66 @@ class Host(Device):
         """
         if packet.is_ack:
             self.handle_ack(packet, current_tick)
+            return
+        if packet.protocol == Protocol.UDP:
+            # Datagrams are only counted, there is nothing to ACK
+            self.datagrams_received += 1
+            return
+
+        state: ReceiveState = self.receive_states.get(packet.source_id)
+        if state is None:
+            if packet.flow_label is not None:
+                # ACKs of routed data are routed too, under the label of the first segment
+                state = ReceiveState(self.intern_route((packet.source_id,)), packet.flow_label)
+            else:
+                # ACKs retrace the data path in reverse, reversed once for every flow taking it
+                state = ReceiveState(self.network.route_cache.reverse(packet.source_id, packet.original_path))
+            self.receive_states[packet.source_id] = state
+
+        in_order = state.on_segment(packet.seq_num)
+        state.segments_since_ack += 1
+        state.ce_pending = state.ce_pending or packet.ce
+        if self.ack_policy.should_ack_now(state, in_order):
+            self.send_ack(packet.source_id, state)
+        elif state.ack_deadline is None:
+            state.ack_deadline = current_tick + self.time_base.ticks(self.ack_policy.max_delay_ms)
+            self.delayed_acks[packet.source_id] = state
+
+    def send_ack(self, dest_id: str, state: ReceiveState):
+        """Sends a cumulative ACK, with SACK blocks, for everything received from a host.
+
+        Args:
+            dest_id (str): The string id of the host that sent the data
+            state (ReceiveState): The receive state of that host's flow
+        """
+        sack_blocks = state.sack_blocks(self.ack_policy.max_sack_blocks) if self.ack_policy.sack else ()
+        # ACK packets are small, and reused once delivered
+        ack_packet = self.network.ack_pool.acquire(
+            id_sequence=state.ack_path,
+            packet_size_bytes=self.framing.ack_bytes(len(sack_blocks)) if self.framing is not None else 0,
+            ack_num=state.cumulative_ack(),
+            source_id=self.id,
+            dest_id=dest_id,
+            ece=state.ce_pending,  # Echo congestion marks back to the sender
+            sack_blocks=sack_blocks,
+            flow_label=state.flow_label
+        )
+        state.segments_since_ack = 0
+        state.ack_deadline = None
+        state.ce_pending = False
+        self.delayed_acks.pop(dest_id, None)
+        self.send_packet(ack_packet)
+        print(f"Host {self.id} generated ACK for seq {ack_packet.ack_num}")
+
+    def flush_delayed_acks(self, current_tick: int):
+        """Sends the held back ACKs whose delay ran out.
+
+        Args:
+            current_tick (int): The current tick of the simulation
+        """
+        for dest_id, state in list(self.delayed_acks.items()):
+            if current_tick >= state.ack_deadline:
+                self.send_ack(dest_id, state)
 
     def process_tick(self, tick_num: int):
         """Called for each tick during the simulation.
@@ -156,15 +468,39 @@ class Host(Device):
             tick_num (int): The current tick number of the simulation
         """
         self.check_timeouts(tick_num)
+        if self.delayed_acks:
+            self.flush_delayed_acks(tick_num)
+        for flow in self.datagram_flows:
+            flow.process_tick(self, tick_num)
 
         # Send data packets if we're a source host (limit frequency to avoid flooding)
-        if tick_num % 10 == 0:  # Only try to send every 10 ticks
-            if self.id == "h1":
-                self.send_data_packet("h4", 1, tick_num)
-                self.file.write(str(self.congestion_control.get_cwnd()) + "\n")
-            elif self.id == "h3":
-                self.send_data_packet("h2", 1, tick_num)
-                self.file.write(str(self.congestion_control.get_cwnd()) + "\n")
-            elif self.id == "h4":
-                self.send_data_packet("h1", 1, tick_num)
-                self.file.write(str(self.congestion_control.get_cwnd()) + "\n")
\ No newline at end of file
+        if tick_num % self.send_interval == 0:  # Only try to send every 10 ms
+            dest_id = self.SENDERS.get(self.id)
+            if dest_id is not None:
+                if self.send_buffer is None:
+                    self.send_data_packet(dest_id, 1, tick_num)
+                else:
+                    self.send_message(dest_id, self.framing.message_bytes, tick_num)
+                self.log_cwnd()
+
+    def next_event_tick(self, tick_num: int) -> float:
+        """Gets the next tick the host sends, times out, owes a delayed ACK or releases datagrams.
+
+        Args:
+            tick_num (int): The tick just processed
+
+        Returns:
+            float: The tick, NEVER when the host only reacts to arrivals
+        """
+        earliest = NEVER
+        if self.id in self.SENDERS:
+            earliest = (tick_num // self.send_interval + 1) * self.send_interval
+        if self.unacked_packets:
+            # One tick early at worst, rounding the RTO down keeps a timeout from being skipped
+            rto_ticks = math.floor(self.congestion_control.rtt_estimator.get_rto_ticks())
+            earliest = min(earliest, min(send_tick for _, send_tick, _ in self.unacked_packets.values()) + rto_ticks)
+        for state in self.delayed_acks.values():
+            earliest = min(earliest, state.ack_deadline)
+        for flow in self.datagram_flows:
+            earliest = min(earliest, flow.next_event_tick(self, tick_num))
+        return max(earliest, tick_num + 1)
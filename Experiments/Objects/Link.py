@@ -1,14 +1,18 @@
 from Objects.Device import Device
 from Objects.Packet import Packet
+from Enums.TraceEvent import TraceEvent
+from Objects.TimeBase import NEVER
 import random
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from Objects.Network import Network
+    from Objects.PacketTrace import PacketTrace
 
 class Link:
     """Implementation of a link class between Devices."""
-    delay_ms: int
+    delay_ms: float
+    delay_ticks: int
     packets: list[Packet]
     router_out: Device
     router_in: Device
@@ -19,7 +23,7 @@ class Link:
         """Constructor for the Link class.
 
         Args:
-            delay (int): The propagation delay of the link in ms
+            delay (float): The propagation delay of the link in ms, fractions allowed on a finer time base
             bandwidth_in_bytes (int): The max bandwidth of the link in bytes
             loss_rate (float): The packet loss probability as a decimal
             router_in (Device): The Device object on one side of the link
@@ -27,6 +31,7 @@ class Link:
             network (Network, optional): Reference to the Network for throughput tracking
         """
         self.delay_ms = delay
+        self.delay_ticks = network.time_base.ticks(delay) if network is not None else delay
         self.bandwidth_in_bytes = bandwidth_in_bytes
         self.router_in = router_in
         self.router_out = router_out
@@ -35,7 +40,8 @@ class Link:
         self.network = network
 
     def process_tick(self, tick_num: int):
-        """Called each tick during the simulation.
+        """Called on each tick with work during the simulation.
+        Packets carry the absolute tick they arrive, so skipped ticks need no catching up.
 
         Args:
             tick_num (int): The current tick of the simulation
@@ -43,67 +49,92 @@ class Link:
         Raises:
             Exception: If the path could not be found to forward the packet along
         """
+        tracer = self.network.tracer if self.network is not None else None
+
         # Check for bandwidth
         used_bandwidth: int = sum(list(map(lambda x: x.packet_size_bytes, self.packets)))
         while (used_bandwidth > self.bandwidth_in_bytes and len(self.packets) > 0):
             packet: Packet = self.packets.pop(-1)
             used_bandwidth -= packet.packet_size_bytes
+            if tracer is not None:
+                self._trace_drop(tracer, packet)
 
         # Send packets to next device if needed
         i = 0
         while i < len(self.packets):
             packet = self.packets[i]
-            if len(packet.id_sequence) <= 0:
+            if packet.hop >= len(packet.id_sequence):
                 self.packets.pop(i)
                 continue
-            packet.processing_time -= 1
-            if (packet.processing_time <= 0):
+            if packet.arrival_tick <= tick_num:
                 self.packets.pop(i)
 
                 # Lossy Link
                 if random.random() <= self.loss_rate:
+                    if tracer is not None:
+                        self._trace_drop(tracer, packet)
                     continue
 
                 # Add it to the next device
                 to_send_device: Device = None
-                if (self.router_in.id == packet.id_sequence[0]):
+                next_hop = packet.id_sequence[packet.hop]
+                if (self.router_in.id == next_hop):
                     to_send_device = self.router_in
-                elif (self.router_out.id == packet.id_sequence[0]):
+                elif (self.router_out.id == next_hop):
                     to_send_device = self.router_out
                 else:
                     raise Exception("Could not find correct path.")
                 
                 if (to_send_device.device_type == "host"):
                     print("Arrived at host " + str(to_send_device.id))
-                    # Deliver the packet to the host for processing with current tick
+                    if tracer is not None:
+                        tracer.record(TraceEvent.DELIVER, packet, to_send_device.id, self._other_end(to_send_device.id))
+                    # Record data packet delivery for throughput calculation
+                    if not packet.is_ack and self.network:
+                        self.network.record_packet_delivery(packet.packet_size_bytes, tick_num)
+                        self.network.analytics.on_delivery(packet)
+
+                    # Deliver the packet to the host, which handles ACKs both ways
                     to_send_device.receive_packet(packet, tick_num)
-                    
-                    # If this is a data packet (not ACK), generate and send ACK back
-                    if not packet.is_ack:
-                        # Record packet delivery for throughput calculation
-                        if self.network:
-                            self.network.record_packet_delivery(packet.packet_size_bytes, tick_num)
-                        
-                        # Create ACK packet with path back to source
-                        # Use the original_path from the data packet to determine the return path
-                        routers = packet.original_path[:-1]  # Get all routers from the original path
-                        ack_path = routers[::-1]  # Reverse the router order
-                        ack_path.append(packet.source_id)  # Add the source host as destination
-                        ack_packet = Packet(
-                            id_sequence=ack_path,
-                            packet_size_bytes=0,  # ACK packets are small
-                            seq_num=0,
-                            ack_num=packet.seq_num,
-                            is_ack=True,
-                            source_id=to_send_device.id,
-                            dest_id=packet.source_id
-                        )
-                        # Send ACK back through the network
-                        to_send_device.send_packet(ack_packet)
-                        print(f"Host {to_send_device.id} generated ACK for seq {packet.seq_num}")
+                    # Nothing holds on to a handled ACK, it can carry the next one
+                    if packet.is_ack and self.network:
+                        self.network.ack_pool.release(packet)
                 else:
-                    packet.id_sequence = packet.id_sequence[1:len(packet.id_sequence)]
-                    packet.processing_time = to_send_device.processing_delay_ms
-                    to_send_device.queue.push(packet)
+                    packet.hop += 1
+                    to_send_device.enqueue(packet, tick_num)
             else:
                 i += 1
+
+    def next_event_tick(self, tick_num: int) -> float:
+        """Gets the next tick a packet reaches the end of the link.
+
+        Args:
+            tick_num (int): The tick just processed
+
+        Returns:
+            float: The tick, NEVER when the link is empty
+        """
+        if not self.packets:
+            return NEVER
+        return max(min(p.arrival_tick for p in self.packets), tick_num + 1)
+
+    def _other_end(self, device_id: str) -> str:
+        """Gets the id of the device on the other side of the link.
+
+        Args:
+            device_id (str): The id of one end of the link
+
+        Returns:
+            str: The id of the other end
+        """
+        return self.router_out.id if self.router_in.id == device_id else self.router_in.id
+
+    def _trace_drop(self, tracer: 'PacketTrace', packet: Packet):
+        """Traces a packet lost on the link, at the device that sent it.
+
+        Args:
+            tracer (PacketTrace): The network's trace
+            packet (Packet): The lost Packet object
+        """
+        next_hop = packet.id_sequence[packet.hop] if packet.hop < len(packet.id_sequence) else None
+        tracer.record(TraceEvent.DROP, packet, self._other_end(next_hop), next_hop)
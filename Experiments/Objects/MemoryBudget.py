@@ -0,0 +1,132 @@
+from typing import Optional, TYPE_CHECKING
+import os
+import sys
+import types
+
+if TYPE_CHECKING:
+    from Objects.Network import Network
+    from Objects.ResultStore import ResultStore
+
+# Objects never followed when sizing, they are shared code rather than run state
+OPAQUE_TYPES = (type, types.FunctionType, types.BuiltinFunctionType, types.MethodType, types.ModuleType)
+
+
+class MemoryBudget:
+    """Caps on the structures that otherwise grow with the length of a run.
+    With a budget set the memory of a run depends on the topology and these limits, not on the number of ticks.
+    """
+    throughput_window: int
+    result_rows: int
+    cwnd_log_lines: int
+    reorder_window: int
+    report_samples: int
+
+    def __init__(self, throughput_window: int = 1000, result_rows: int = 1 << 16, cwnd_log_lines: int = 1_000_000, reorder_window: int = 4096,
+                 report_samples: int = 1000):
+        """Constructor for the memory budget.
+
+        Args:
+            throughput_window (int, optional): The newest per tick throughput samples kept by the network. Defaults to 1000.
+            result_rows (int, optional): The most rows in the run file, older samples are thinned to every other one when full. Defaults to 65536.
+            cwnd_log_lines (int, optional): Lines per cwnd file before it is rotated to <host>.1. Defaults to 1000000.
+            reorder_window (int, optional): The most out of order seqs a flow's analytics hold, holes behind them count as lost. Defaults to 4096.
+            report_samples (int, optional): The newest memory report samples kept. Defaults to 1000.
+        """
+        self.throughput_window = throughput_window
+        self.result_rows = result_rows
+        self.cwnd_log_lines = cwnd_log_lines
+        self.reorder_window = reorder_window
+        self.report_samples = report_samples
+
+
+def current_rss() -> Optional[int]:
+    """Gets the resident set size of the process.
+
+    Returns:
+        Optional[int]: The RSS in bytes, the peak RSS where the current one cannot be read, None if neither can
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def deep_size(obj, seen: set) -> int:
+    """Sizes an object and everything it references that was not sized before.
+
+    Args:
+        obj (Any): The object to size
+        seen (set): Ids of objects already counted or not to be followed, updated in place
+
+    Returns:
+        int: The size in bytes
+    """
+    total = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, OPAQUE_TYPES):
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)) or type(o).__name__ == "deque":
+            stack.extend(o)
+        elif hasattr(o, "nbytes"):
+            # NumPy arrays count their buffer in getsizeof and hold no Python objects
+            continue
+        else:
+            attributes = getattr(o, "__dict__", None)
+            if attributes is not None:
+                stack.append(attributes)
+            for name in getattr(type(o), "__slots__", ()):
+                if hasattr(o, name):
+                    stack.append(getattr(o, name))
+    return total
+
+
+def memory_report(network: 'Network', results: Optional['ResultStore'] = None) -> dict:
+    """Measures the memory held by each part of a running simulation.
+    Objects are counted once, under the first subsystem that reaches them.
+
+    Args:
+        network (Network): The Network object to measure
+        results (Optional[ResultStore], optional): The run's result store. Defaults to None.
+
+    Returns:
+        dict: The process RSS and the bytes of each subsystem
+    """
+    # Devices, links and the network point at each other, only the state below them is counted
+    seen = {id(network), id(network.devices), id(network.links)}
+    seen.update(id(d) for d in network.devices.values())
+    seen.update(id(l) for l in network.links)
+    hosts = [d for d in network.devices.values() if d.device_type == "host"]
+    routers = [d for d in network.devices.values() if d.device_type != "host"]
+
+    # Every root stays alive until all are sized, a freed one's id could be reused by the next and look already seen
+    roots = {
+        "links": [l.packets for l in network.links],
+        "router_queues": [(r.port_queues, r.port_heads) for r in routers],
+        "hosts": [(h.unacked_packets, h.receive_states, h.delayed_acks, h.datagram_flows) for h in hosts],
+        "congestion_control": [h.congestion_control for h in hosts],
+        "pacer": network.pacer,
+        "analytics": network.analytics,
+        "throughput_stats": network.throughput_stats,
+        "routes": network.routes,
+        "route_cache": network.route_cache,
+        "ack_pool": network.ack_pool,
+        "tracer": network.tracer,
+        "results": results,
+    }
+    subsystems = {name: deep_size(root, seen) if root is not None else 0 for name, root in roots.items()}
+    return {"rss_bytes": current_rss(), "tracked_bytes": sum(subsystems.values()), "subsystems": subsystems}
@@ -2,7 +2,63 @@ from Objects.Host import Host
 from Objects.Router import Router
 from Objects.Link import Link
 from Objects.Device import Device
+from Objects.Pacer import Pacer
+from Objects.FlowAnalytics import FlowAnalytics
+from Objects.Packet import Packet, PacketPool
+from Objects.Routing import RouteCache
+from Objects.AckPolicy import AckPolicy
+from Objects.CongestionControlRegistry import congestion_control_name
 from Enums.CongestionControlType import CongestionControlType
+from Enums.QueueDiscipline import QueueDiscipline
+from Enums.RoutingMode import RoutingMode
+from Enums.EcmpWeighting import EcmpWeighting
+from Enums.TimeUnit import TimeUnit
+from Objects.TimeBase import TimeBase
+from typing import Optional, NamedTuple, TYPE_CHECKING
+
+# NumPy and the neural module are only imported when a run needs them
+if TYPE_CHECKING:
+    import numpy as np
+    from Objects.NeuralCongestionControl import InferenceBatcher
+    from Objects.PacketTrace import PacketTrace
+    from Objects.Routing import RouteTable
+    from Objects.Framing import Framing
+    from Objects.MemoryBudget import MemoryBudget
+    from Objects.AsyncWriter import AsyncWriter
+
+# Field order of tuple or structured array specs given to Network.build
+DEVICE_FIELDS = ("type", "id", "queue_size", "processing_delay_ms")
+LINK_FIELDS = ("link_delay_ms", "bandwidth_in_bytes", "loss_rate", "device_one", "device_two")
+REQUIRED_DEVICE_FIELDS = {"host": ("id",), "router": ("id", "queue_size", "processing_delay_ms")}
+
+
+class Adjacency(NamedTuple):
+    """Device graph in CSR form.
+    The neighbors of device i are neighbors[indptr[i]:indptr[i + 1]], reached over links[link_ids[...]].
+    """
+    device_ids: list[str]
+    index: dict  # device id -> row
+    indptr: 'np.ndarray'
+    neighbors: 'np.ndarray'
+    link_ids: 'np.ndarray'
+
+
+def spec_rows(specs, fields: tuple) -> list[dict]:
+    """Turns device or link specs into dicts keyed by field name.
+
+    Args:
+        specs: Dicts, tuples in fields order or a NumPy structured array
+        fields (tuple): The field names of tuple specs
+
+    Returns:
+        list[dict]: One dict per spec
+    """
+    names = getattr(getattr(specs, "dtype", None), "names", None)
+    if names:
+        # tolist turns the whole structured array into Python tuples in one call
+        return [dict(zip(names, row)) for row in specs.tolist()]
+    return [spec if isinstance(spec, dict) else dict(zip(fields, spec)) for spec in specs]
+
 
 class Network:
     """Contains an implementation of a Network object.
@@ -14,45 +70,122 @@ class Network:
     total_packets_delivered: int
     total_bytes_delivered: int
     simulation_start_tick: int
-    def __init__(self):
-        """Contructor for the Network object."""
+    pacer: Pacer
+    analytics: FlowAnalytics
+    neural_policy: dict
+    output_dir: str
+    inference_batcher: Optional['InferenceBatcher']
+    adjacency: Optional[Adjacency]
+    events_processed: int  # packet steps on links, the simulator's unit of work
+    tracer: Optional['PacketTrace']
+    ecmp_weighting: EcmpWeighting
+    routes: Optional['RouteTable']
+    memory_budget: Optional['MemoryBudget']
+    writer: Optional['AsyncWriter']  # writes the hosts' cwnd files off the simulation thread, None writes them directly
+    congestion_control_params: dict  # algorithm name -> constructor arguments every host using it gets
+    time_base: TimeBase
+    route_cache: RouteCache  # the routes packets carry, shared between them
+    ack_pool: PacketPool  # delivered ACKs, reused for the next ones
+    framing: Optional['Framing']  # wire sizes of the hosts' packets, None keeps their bare sizes
+    def __init__(self, neural_policy: Optional[dict] = None, output_dir: str = ".", ecmp_weighting: EcmpWeighting = EcmpWeighting.EQUAL,
+                 congestion_control_params: Optional[dict] = None, time_unit: TimeUnit = TimeUnit.MS, framing: Optional['Framing'] = None):
+        """Contructor for the Network object.
+
+        Args:
+            neural_policy (Optional[dict], optional): Backend settings for neural hosts, see load_backend. Defaults to None.
+            output_dir (str, optional): The directory hosts write their cwnd files to. Defaults to ".".
+            ecmp_weighting (EcmpWeighting, optional): How ECMP routers split flows over equal cost next hops. Defaults to EcmpWeighting.EQUAL.
+            congestion_control_params (Optional[dict], optional): Constructor arguments per algorithm name, a host's own params override them. Defaults to None.
+            time_unit (TimeUnit, optional): The length of a tick, delays in the config stay in ms. Defaults to TimeUnit.MS.
+            framing (Optional[Framing], optional): Headers, MTU and message sizes of the hosts' packets. Defaults to None, a data packet is 1 byte and an ACK 0.
+        """
         self.devices = {}
         self.links = []
         self.throughput_stats = {}
         self.total_packets_delivered = 0
         self.total_bytes_delivered = 0
         self.simulation_start_tick = 0
+        self.pacer = Pacer()
+        self.analytics = FlowAnalytics()
+        self.neural_policy = neural_policy or {}
+        self.output_dir = output_dir
+        self.inference_batcher = None
+        self.adjacency = None
+        self.events_processed = 0
+        self.tracer = None
+        self.ecmp_weighting = EcmpWeighting(ecmp_weighting)
+        self.routes = None
+        self.memory_budget = None
+        self.writer = None
+        self.congestion_control_params = {congestion_control_name(k): v for k, v in (congestion_control_params or {}).items()}
+        self.time_base = TimeBase(time_unit)
+        self.route_cache = RouteCache()
+        self.ack_pool = PacketPool()
+        self.framing = framing
+        # Running sum of throughput_stats, so the average needs no more than the newest entry
+        self.throughput_sum = 0.0
+        self.throughput_count = 0
+        self.throughput_last = (None, 0.0)  # (tick, throughput) not yet in the sum, the tick may see more deliveries
 
-
-    def add_host(self, id: str, routing_path: list[str] = [], congestion_control: CongestionControlType = CongestionControlType.RENO):
+    def add_host(self, id: str, routing_path: list[str] = [], congestion_control: CongestionControlType = CongestionControlType.RENO, ack_policy: Optional[dict] = None,
+                 udp_flows: Optional[list[dict]] = None, routing: RoutingMode = RoutingMode.STATIC, subflows: int = 1, congestion_control_params: Optional[dict] = None):
         """Adds a host to the network.
 
         Args:
             id (str): The string ID of the host
             routing_path (list[str], optional): The set routing path for the host. Defaults to [].
             congestion_control (CongestionControlType, optional): The congestion control algorithm used for the host. Defaults to CongestionControlType.RENO.
+            ack_policy (Optional[dict], optional): AckPolicy settings for data the host receives. Defaults to an ACK per segment.
+            udp_flows (Optional[list[dict]], optional): Settings of each DatagramFlow the host sends. Defaults to None.
+            routing (RoutingMode, optional): Whether the host's packets follow routing_path or are routed hop by hop. Defaults to RoutingMode.STATIC.
+            subflows (int, optional): The number of ECMP subflows the host spreads its packets over. Defaults to 1.
+            congestion_control_params (Optional[dict], optional): Constructor arguments of the host's algorithm. Defaults to the network's params for it.
         """
         if id in self.devices:
             return
-        self.devices[id] = Host(id, routing_path, congestion_control)
+        params = dict(self.congestion_control_params.get(congestion_control_name(congestion_control), {}), **(congestion_control_params or {}))
+        host = Host(id, routing_path, congestion_control, AckPolicy(**ack_policy) if ack_policy else None, routing, subflows, params)
+        host.network = self
+        host.set_time_base(self.time_base)
+        host.set_framing(self.framing)
+        for flow in udp_flows or []:
+            host.add_datagram_flow(**flow)
+        if congestion_control == CongestionControlType.NEURAL:
+            from Objects.NeuralCongestionControl import InferenceBatcher, load_backend
+            # All neural hosts share one batcher so each tick is a single forward pass
+            if self.inference_batcher is None:
+                self.inference_batcher = InferenceBatcher(load_backend(**self.neural_policy))
+            host.congestion_control.batcher = self.inference_batcher
+        self.devices[id] = host
+        self.adjacency = None
+        self.routes = None
         
-    def add_router(self, queue_size: int, processing_delay_ms: int, id: str):
+    def add_router(self, queue_size: int, processing_delay_ms: float, id: str, queue_discipline: QueueDiscipline = QueueDiscipline.FIFO, queue_params: Optional[dict] = None,
+                   service_rate_pps: Optional[float] = None, service_rate_bytes_per_sec: Optional[float] = None):
         """Adds a router to the network.
 
         Args:
             queue_size (int): The queue size of the router
-            processing_delay_ms (int): The processing delay of the router in ms
+            processing_delay_ms (float): The processing delay of the router in ms
             id (str): The string id of the router
+            queue_discipline (QueueDiscipline, optional): The queue discipline of the router. Defaults to QueueDiscipline.FIFO.
+            queue_params (Optional[dict], optional): Extra settings for the queue discipline. Defaults to None.
+            service_rate_pps (Optional[float], optional): Packets per second forwarded on each outgoing link. Defaults to None.
+            service_rate_bytes_per_sec (Optional[float], optional): Bytes per second forwarded on each outgoing link. Defaults to None.
         """
         if id in self.devices:
             return
-        self.devices[id] = Router(queue_size, processing_delay_ms, id)
+        router = Router(queue_size, processing_delay_ms, id, queue_discipline, queue_params, service_rate_pps, service_rate_bytes_per_sec, self.time_base)
+        router.network = self
+        self.devices[id] = router
+        self.adjacency = None
+        self.routes = None
 
-    def add_link(self, link_delay_ms: int, bandwidth_in_bytes: int, loss_rate: float, device_id_one: str, device_id_two: str):
+    def add_link(self, link_delay_ms: float, bandwidth_in_bytes: int, loss_rate: float, device_id_one: str, device_id_two: str):
         """Adds a link to the network between two devices.
 
         Args:
-            link_delay_ms (int): The propagation delay in ms
+            link_delay_ms (float): The propagation delay in ms
             bandwidth_in_bytes (int): The max bandwidth in bytes
             loss_rate (float): The loss rate of the link as a decimal
             device_id_one (str): The string id of the first device
@@ -75,6 +208,195 @@ class Network:
 
         d1.forwarding_table[device_id_two] = link
         d2.forwarding_table[device_id_one] = link
+        self.adjacency = None
+        self.routes = None
+
+    def add_device(self, spec: dict):
+        """Adds a host or router from its config entry.
+
+        Args:
+            spec (dict): The device data read from the JSON config, "type" picks host or router
+        """
+        if spec["type"] == "host":
+            self.add_host(spec["id"], spec.get("packet_path", []), spec.get("congestion_control", "reno"), spec.get("ack_policy"), spec.get("udp_flows"),
+                          spec.get("routing", "static"), spec.get("subflows", 1), spec.get("congestion_control_params"))
+        else:
+            self.add_router(spec["queue_size"], spec["processing_delay_ms"], spec["id"], spec.get("queue_discipline", "fifo"), spec.get("queue_params", {}),
+                            spec.get("service_rate_pps"), spec.get("service_rate_bytes_per_sec"))
+
+    def build(self, device_specs, link_specs):
+        """Adds many devices and links at once.
+        Every spec is validated before anything is built, so a bad topology leaves the network unchanged.
+
+        Args:
+            device_specs: Device config dicts, (type, id, queue_size, processing_delay_ms) tuples or a structured array with those fields
+            link_specs: Link dicts, (link_delay_ms, bandwidth_in_bytes, loss_rate, device_one, device_two) tuples or a structured array with those fields
+
+        Raises:
+            ValueError: If a device or link lacks a required field, a device id is repeated or already exists,
+                a device type is unknown or a link end does not exist. The message names each bad device and link.
+        """
+        devices = spec_rows(device_specs, DEVICE_FIELDS)
+        links = spec_rows(link_specs, LINK_FIELDS)
+
+        errors = []
+        new_ids = set()
+        for i, spec in enumerate(devices):
+            device_id = spec.get("id", f"#{i}")
+            required = REQUIRED_DEVICE_FIELDS.get(spec.get("type"))
+            if required is None:
+                errors.append(f"Device {device_id} has unknown type {spec.get('type')}")
+                continue
+            missing = [field for field in required if field not in spec]
+            if missing:
+                errors.append(f"{spec['type'].capitalize()} {device_id} is missing {', '.join(missing)}")
+            elif device_id in new_ids or device_id in self.devices:
+                errors.append(f"Device {device_id} is defined twice")
+            new_ids.add(device_id)
+        for i, spec in enumerate(links):
+            missing = [field for field in LINK_FIELDS if field not in spec]
+            if missing:
+                errors.append(f"Link #{i} ({spec.get('device_one')}-{spec.get('device_two')}) is missing {', '.join(missing)}")
+                continue
+            for end in (spec["device_one"], spec["device_two"]):
+                if end not in new_ids and end not in self.devices:
+                    errors.append(f"Link #{i} ({spec['device_one']}-{spec['device_two']}) ends at {end}, which does not exist")
+        if errors:
+            raise ValueError(f"Invalid topology ({len(errors)} errors): " + "; ".join(errors[:10]))
+
+        for spec in devices:
+            self.add_device(spec)
+
+        devices_by_id = self.devices
+        for spec in links:
+            d1: Device = devices_by_id[spec["device_one"]]
+            d2: Device = devices_by_id[spec["device_two"]]
+            link = Link(spec["link_delay_ms"], spec["bandwidth_in_bytes"], spec["loss_rate"], d1, d2, self)
+            self.links.append(link)
+            d1.forwarding_table[d2.id] = link
+            d2.forwarding_table[d1.id] = link
+        # The CSR is built on first use, only ECMP routing needs it and it needs NumPy
+        self.adjacency = None
+        self.routes = None
+
+    def _build_adjacency(self) -> Adjacency:
+        """Builds the CSR adjacency of every device and link.
+
+        Returns:
+            Adjacency: The device graph
+        """
+        import numpy as np
+        device_ids = list(self.devices)
+        index = {device_id: i for i, device_id in enumerate(device_ids)}
+        ends = [(index[l.router_in.id], index[l.router_out.id]) for l in self.links]
+        pairs = np.array(ends, dtype=np.int64).reshape(-1, 2)
+        link_count = len(pairs)
+
+        # Links carry traffic both ways, so each one is an edge in both rows
+        src = np.concatenate([pairs[:, 0], pairs[:, 1]])
+        dst = np.concatenate([pairs[:, 1], pairs[:, 0]])
+        link_ids = np.concatenate([np.arange(link_count), np.arange(link_count)])
+        order = np.argsort(src, kind="stable")
+        indptr = np.zeros(len(device_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=len(device_ids)), out=indptr[1:])
+        return Adjacency(device_ids, index, indptr, dst[order], link_ids[order])
+
+    def get_adjacency(self) -> Adjacency:
+        """Gets the CSR adjacency of the network, built on first use and again only after devices or links change.
+
+        Returns:
+            Adjacency: The device graph
+        """
+        if self.adjacency is None:
+            self.adjacency = self._build_adjacency()
+        return self.adjacency
+
+    def get_routes(self) -> 'RouteTable':
+        """Gets the ECMP route table, rebuilt only after devices or links change.
+        Routes toward the hosts that use ECMP, and back to them, are computed up front.
+
+        Returns:
+            RouteTable: The equal cost next hops of every device
+        """
+        if self.routes is None:
+            from Objects.Routing import RouteTable
+            self.routes = RouteTable(self, self.ecmp_weighting)
+            ecmp_hosts = [d for d in self.devices.values() if d.device_type == "host" and d.routing == RoutingMode.ECMP]
+            self.routes.precompute({h.id for h in ecmp_hosts} | {h.routing_path[-1] for h in ecmp_hosts if h.routing_path})
+        return self.routes
+
+    def set_memory_budget(self, budget: Optional['MemoryBudget']):
+        """Bounds the structures that grow with the length of a run, None lets them grow.
+
+        Args:
+            budget (Optional[MemoryBudget]): The limits to apply
+        """
+        self.memory_budget = budget
+        self.analytics.reorder_window = budget.reorder_window if budget is not None else None
+
+    def route(self, packet: 'Packet', device_id: str) -> Optional[str]:
+        """Points an ECMP packet at the next hop its flow label hashes to.
+        The packet keeps only that hop and its destination, the last device of id_sequence, as a shared route.
+
+        Args:
+            packet (Packet): The Packet object leaving the device
+            device_id (str): The string id of the forwarding device
+
+        Returns:
+            Optional[str]: The next hop, None leaves the packet unchanged as there is no route
+        """
+        dest_id = packet.id_sequence[-1]
+        next_hop = self.get_routes().choose(device_id, dest_id, packet.flow_label)
+        if next_hop is not None:
+            packet.id_sequence = self.route_cache.next_hop_route(next_hop, dest_id)
+            packet.hop = 0
+        return next_hop
+
+    def process_tick(self, tick_num: int):
+        """Runs one tick of the simulation over every device and link.
+
+        Args:
+            tick_num (int): The current tick of the simulation
+        """
+        if self.tracer is not None:
+            self.tracer.tick = tick_num
+
+        # Release paced packets due this tick before hosts queue new ones
+        self.pacer.process_tick(tick_num)
+
+        for d in self.devices.values():
+            d.process_tick(tick_num)
+
+        for l in self.links:
+            self.events_processed += len(l.packets)
+            l.process_tick(tick_num)
+
+        # Answer every model decision requested this tick in one batch
+        if self.inference_batcher is not None:
+            self.inference_batcher.flush(self.time_base.to_ms(tick_num))
+
+    def next_event_tick(self, tick_num: int) -> float:
+        """Gets the next tick anything in the network has work on.
+        Every tick before it would change nothing, so the caller may jump straight to it.
+
+        Args:
+            tick_num (int): The tick just processed
+
+        Returns:
+            float: The tick, NEVER when the network is idle for good
+        """
+        soonest = tick_num + 1
+        earliest = self.pacer.next_event_tick(tick_num)
+        # Devices first, a busy router or sending host usually ends the search
+        for d in self.devices.values():
+            earliest = min(earliest, d.next_event_tick(tick_num))
+            if earliest <= soonest:
+                return soonest
+        for l in self.links:
+            earliest = min(earliest, l.next_event_tick(tick_num))
+            if earliest <= soonest:
+                return soonest
+        return earliest
 
     def record_packet_delivery(self, packet_size_bytes: int, current_tick: int):
         """Record a packet delivery for throughput calculation.
@@ -91,6 +413,14 @@ class Network:
             elapsed_ticks = current_tick - self.simulation_start_tick
             current_throughput = (self.total_bytes_delivered * 8) / elapsed_ticks  # bits per tick
             self.throughput_stats[current_tick] = current_throughput
+            last_tick, last_throughput = self.throughput_last
+            if current_tick != last_tick and last_tick is not None:
+                self.throughput_sum += last_throughput
+                self.throughput_count += 1
+            self.throughput_last = (current_tick, current_throughput)
+            if self.memory_budget is not None and len(self.throughput_stats) > self.memory_budget.throughput_window:
+                # Dicts keep insertion order, the first key is the oldest tick
+                del self.throughput_stats[next(iter(self.throughput_stats))]
 
     def get_average_throughput(self, current_tick: int) -> float:
         """Calculate average throughput in bits per second.
@@ -101,12 +431,12 @@ class Network:
         Returns:
             float: Average throughput in bits per second
         """
-        if current_tick <= self.simulation_start_tick or len(self.throughput_stats) == 0:
+        if current_tick <= self.simulation_start_tick or self.throughput_last[0] is None:
             return 0.0
         
-        # Convert from bits per tick to bits per second (assuming 1 tick = 1ms)
-        total_throughput = sum(self.throughput_stats.values())
-        average_throughput_bps = (total_throughput / len(self.throughput_stats)) * 1000
+        # Convert from bits per tick to bits per second
+        total_throughput = self.throughput_sum + self.throughput_last[1]
+        average_throughput_bps = (total_throughput / (self.throughput_count + 1)) * self.time_base.ticks_per_second
         
         return average_throughput_bps
 
@@ -123,7 +453,7 @@ class Network:
             return 0.0
         
         elapsed_ticks = current_tick - self.simulation_start_tick
-        # Convert from bytes per tick to bits per second (assuming 1 tick = 1ms)
-        current_throughput_bps = ((self.total_bytes_delivered * 8) / elapsed_ticks) * 1000
+        # Convert from bytes per tick to bits per second
+        current_throughput_bps = ((self.total_bytes_delivered * 8) / elapsed_ticks) * self.time_base.ticks_per_second
         
         return current_throughput_bps
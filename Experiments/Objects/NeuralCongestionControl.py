@@ -0,0 +1,332 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+from Objects.CongestionControl import CongestionControl
+import numpy as np
+
+# Order of the columns handed to the policy, one row per host
+FEATURE_NAMES = ["cwnd", "ssthresh", "rtt_ratio", "ack_rate", "loss_events", "dup_acks"]
+
+
+class InferenceBackend(ABC):
+    """Abstract class for a model that maps a batch of host features to cwnd decisions."""
+
+    @abstractmethod
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Runs one forward pass over every pending host.
+
+        Args:
+            features (np.ndarray): A (num_hosts, num_features) float32 array
+
+        Returns:
+            np.ndarray: A (num_hosts,) array of log2 cwnd changes in [-1, 1]
+        """
+        pass
+
+
+class NumpyMLPBackend(InferenceBackend):
+    """Feed forward network evaluated with NumPy on the CPU."""
+
+    def __init__(self, model_path: Optional[str] = None, hidden_size: int = 32, seed: int = 0):
+        """Constructor for the NumPy backend.
+
+        Args:
+            model_path (Optional[str], optional): A .npz file with W0, b0, W1, b1, ... arrays. Defaults to None.
+            hidden_size (int, optional): Hidden layer width when no model is given. Defaults to 32.
+            seed (int, optional): Seed for the random weights when no model is given. Defaults to 0.
+        """
+        self.layers: list[tuple[np.ndarray, np.ndarray]] = []
+        if model_path is not None:
+            weights = np.load(model_path)
+            i = 0
+            while f"W{i}" in weights:
+                self.layers.append((weights[f"W{i}"].astype(np.float32), weights[f"b{i}"].astype(np.float32)))
+                i += 1
+            if not self.layers:
+                raise ValueError(f"No W0/b0 layers found in {model_path}")
+        else:
+            # Untrained policy, small weights keep the cwnd changes near zero
+            rng = np.random.default_rng(seed)
+            sizes = [len(FEATURE_NAMES), hidden_size, 1]
+            for fan_in, fan_out in zip(sizes[:-1], sizes[1:]):
+                w = rng.normal(0.0, 0.1 / np.sqrt(fan_in), (fan_in, fan_out)).astype(np.float32)
+                self.layers.append((w, np.zeros(fan_out, dtype=np.float32)))
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Runs the MLP over the whole batch.
+
+        Args:
+            features (np.ndarray): A (num_hosts, num_features) float32 array
+
+        Returns:
+            np.ndarray: A (num_hosts,) array of log2 cwnd changes in [-1, 1]
+        """
+        x = features
+        for w, b in self.layers[:-1]:
+            x = np.maximum(x @ w + b, 0.0)
+        w, b = self.layers[-1]
+        return np.tanh(x @ w + b).reshape(-1)
+
+
+class TorchBackend(InferenceBackend):
+    """Runs a TorchScript model. torch is only imported when this backend is used."""
+
+    def __init__(self, model_path: str):
+        """Constructor for the torch backend.
+
+        Args:
+            model_path (str): Path to a TorchScript file taking a (num_hosts, num_features) tensor
+        """
+        import torch
+        self.torch = torch
+        self.model = torch.jit.load(model_path, map_location="cpu")
+        self.model.eval()
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Runs the TorchScript model over the whole batch.
+
+        Args:
+            features (np.ndarray): A (num_hosts, num_features) float32 array
+
+        Returns:
+            np.ndarray: A (num_hosts,) array of log2 cwnd changes in [-1, 1]
+        """
+        with self.torch.inference_mode():
+            out = self.model(self.torch.from_numpy(features))
+        return np.clip(out.numpy().reshape(-1), -1.0, 1.0)
+
+
+class OnnxBackend(InferenceBackend):
+    """Runs an ONNX model. onnxruntime is only imported when this backend is used."""
+
+    def __init__(self, model_path: str):
+        """Constructor for the onnxruntime backend.
+
+        Args:
+            model_path (str): Path to an ONNX file with a single (num_hosts, num_features) input
+        """
+        import onnxruntime
+        self.session = onnxruntime.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """Runs the ONNX session over the whole batch.
+
+        Args:
+            features (np.ndarray): A (num_hosts, num_features) float32 array
+
+        Returns:
+            np.ndarray: A (num_hosts,) array of log2 cwnd changes in [-1, 1]
+        """
+        out = self.session.run(None, {self.input_name: features})[0]
+        return np.clip(np.asarray(out).reshape(-1), -1.0, 1.0)
+
+
+def load_backend(backend: str = "numpy", model_path: Optional[str] = None, **kwargs) -> InferenceBackend:
+    """Creates an inference backend by name.
+
+    Args:
+        backend (str, optional): One of "numpy", "torch" or "onnx". Defaults to "numpy".
+        model_path (Optional[str], optional): The model file for the backend. Defaults to None.
+
+    Raises:
+        ValueError: When the backend is unknown or needs a model path
+
+    Returns:
+        InferenceBackend: The created backend
+    """
+    if backend == "numpy":
+        return NumpyMLPBackend(model_path, **kwargs)
+    if model_path is None:
+        raise ValueError(f"The {backend} backend needs a model_path")
+    if backend == "torch":
+        return TorchBackend(model_path)
+    if backend == "onnx":
+        return OnnxBackend(model_path)
+    raise ValueError(f"Not a valid inference backend: {backend}")
+
+
+class InferenceBatcher:
+    """Collects decision requests from every neural host and answers them in one batched call.
+    The rows are in request order, so a graph model can treat the batch as its node set.
+    """
+    backend: InferenceBackend
+    pending: list
+
+    def __init__(self, backend: InferenceBackend):
+        """Constructor for the batcher.
+
+        Args:
+            backend (InferenceBackend): The model used for all hosts
+        """
+        self.backend = backend
+        self.pending = []
+        self.batches_run = 0
+
+    def request(self, controller: "NeuralCongestionControl"):
+        """Queues a controller for the next flush.
+
+        Args:
+            controller (NeuralCongestionControl): The controller that needs a decision
+        """
+        self.pending.append(controller)
+
+    def flush(self, current_tick: int):
+        """Runs one forward pass for all pending controllers and applies the results.
+
+        Args:
+            current_tick (int): The current tick in the simulation
+        """
+        if not self.pending:
+            return
+        controllers = self.pending
+        self.pending = []
+        features = np.array([c.get_features(current_tick) for c in controllers], dtype=np.float32)
+        decisions = self.backend.predict(features)
+        for controller, decision in zip(controllers, decisions):
+            controller.apply_decision(float(decision), current_tick)
+        self.batches_run += 1
+
+
+class NeuralCongestionControl(CongestionControl):
+    """Congestion control that defers the cwnd decision to a model.
+    ACKs only update the features, the cwnd changes when the shared batcher is flushed.
+    """
+
+    def __init__(self, batcher: Optional[InferenceBatcher] = None, max_cwnd: float = 1000.0):
+        """Constructor for the neural controller.
+
+        Args:
+            batcher (Optional[InferenceBatcher], optional): The shared batcher. When None an unbatched NumPy policy is used. Defaults to None.
+            max_cwnd (float, optional): Upper bound on the cwnd. Defaults to 1000.0.
+        """
+        super().__init__()
+        self.batcher = batcher
+        self.private_batcher = False
+        self.max_cwnd = max_cwnd
+        self.last_rtt = float('inf')
+        self.min_rtt = float('inf')
+        self.acks_since_decision = 0
+        self.losses_since_decision = 0
+        self.dup_acks_since_decision = 0
+        self.last_decision_tick = 0
+        self.decision_pending = False
+
+    def get_features(self, current_tick: int) -> list[float]:
+        """Builds the feature row for this host, see FEATURE_NAMES.
+
+        Args:
+            current_tick (int): The current tick in the simulation
+
+        Returns:
+            list[float]: The features of the host
+        """
+        rtt_ratio = 1.0
+        if self.last_rtt != float('inf') and self.min_rtt > 0:
+            rtt_ratio = self.last_rtt / self.min_rtt
+        elapsed = max(current_tick - self.last_decision_tick, 1)
+        return [
+            np.log2(self.cwnd),
+            np.log2(max(self.ssthresh, 1)),
+            rtt_ratio,
+            self.acks_since_decision / elapsed,
+            float(self.losses_since_decision),
+            float(self.dup_acks_since_decision),
+        ]
+
+    def apply_decision(self, decision: float, current_tick: int):
+        """Applies a model output to the cwnd.
+
+        Args:
+            decision (float): The log2 cwnd change in [-1, 1]
+            current_tick (int): The current tick in the simulation
+        """
+        self.cwnd = min(max(self.cwnd * 2.0 ** decision, 1.0), self.max_cwnd)
+        self.acks_since_decision = 0
+        self.losses_since_decision = 0
+        self.dup_acks_since_decision = 0
+        self.last_decision_tick = current_tick
+        self.decision_pending = False
+
+    def _request_decision(self, current_tick: int):
+        """Asks for a new cwnd, at most once per flush.
+
+        Args:
+            current_tick (int): The current tick in the simulation
+        """
+        if self.decision_pending:
+            return
+        if self.batcher is None:
+            # Standalone use outside a Network, run the default policy inline
+            self.batcher = InferenceBatcher(NumpyMLPBackend())
+            self.private_batcher = True
+        self.decision_pending = True
+        self.batcher.request(self)
+        if self.private_batcher:
+            # Nothing else flushes a batcher of our own
+            self.batcher.flush(current_tick)
+
+    def on_packet_sent(self, seq_num: int, current_tick: int):
+        """No events on packet sent, RTT samples come from on_rtt_sample.
+
+        Args:
+            seq_num (int): The sequence number of the sent packet
+            current_tick (int): The current tick in the simulation
+        """
+        pass
+
+    def on_rtt_sample(self, seq_num: int, rtt: float, current_tick: int):
+        """Updates the RTT features.
+
+        Args:
+            seq_num (int): The seq number of the ACKed packet
+            rtt (float): The RTT of the packet in ticks
+            current_tick (int): The current tick in the simulation
+        """
+        super().on_rtt_sample(seq_num, rtt, current_tick)
+        self.last_rtt = rtt
+        self.min_rtt = min(self.min_rtt, rtt)
+
+    def on_ack_received(self, ack_num: int, current_tick: int) -> Optional[float]:
+        """Updates the features and queues a decision.
+
+        Args:
+            ack_num (int): The ACK number received
+            current_tick (int): The current tick in the simulation
+
+        Returns:
+            Optional[float]: The CWND, unchanged until the batcher is flushed
+        """
+        self.last_ack_tick = current_tick
+        self.acks_since_decision += 1
+        self._request_decision(current_tick)
+        return self.cwnd
+
+    def on_timeout(self, seq_num: int, current_tick: int) -> Optional[float]:
+        """Collapses the window like the other controllers and queues a decision.
+
+        Args:
+            seq_num (int): The sequence number of the timed out packet
+            current_tick (int): The current tick in the simulation
+
+        Returns:
+            Optional[float]: The new CWND after a timeout
+        """
+        self.losses_since_decision += 1
+        self.ssthresh = max(self.cwnd / 2, 2)
+        self.cwnd = 1.0
+        self._request_decision(current_tick)
+        return self.cwnd
+
+    def on_dup_ack(self, ack_num: int, current_tick: int) -> Optional[float]:
+        """Counts the duplicate ACK for the next decision.
+
+        Args:
+            ack_num (int): The ACK number of the duplicate ACK
+            current_tick (int): The current tick in the simulation
+
+        Returns:
+            Optional[float]: None, the model decides on the next flush
+        """
+        self.dup_acks_since_decision += 1
+        self._request_decision(current_tick)
+        return None
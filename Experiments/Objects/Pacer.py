@@ -0,0 +1,108 @@
+import math
+from typing import TYPE_CHECKING
+from Objects.Packet import Packet
+from Objects.TimeBase import NEVER
+
+if TYPE_CHECKING:
+    from Objects.Host import Host
+
+
+class CalendarQueue:
+    """Calendar queue with one bucket per tick.
+    Scheduling and releasing a bucket are both O(1), no matter how many hosts are paced.
+    """
+    buckets: dict  # tick -> list of items
+
+    def __init__(self):
+        """Constructor for the calendar queue."""
+        self.buckets = {}
+        self.size = 0
+
+    def schedule(self, tick: int, item):
+        """Adds an item to the bucket of a tick.
+
+        Args:
+            tick (int): The tick the item is due
+            item (Any): The item to release
+        """
+        bucket = self.buckets.get(tick)
+        if bucket is None:
+            self.buckets[tick] = [item]
+        else:
+            bucket.append(item)
+        self.size += 1
+
+    def pop_due(self, tick: int) -> list:
+        """Removes and returns everything due on a tick.
+
+        Args:
+            tick (int): The current tick
+
+        Returns:
+            list: The due items in the order they were scheduled
+        """
+        bucket = self.buckets.pop(tick, None)
+        if bucket is None:
+            return []
+        self.size -= len(bucket)
+        return bucket
+
+    def length(self) -> int:
+        """Returns the number of scheduled items.
+
+        Returns:
+            int: The number of scheduled items
+        """
+        return self.size
+
+
+class Pacer:
+    """Shared pacing scheduler for every host in a Network.
+    Each host keeps its own next departure time from its controller's pacing rate,
+    the packets themselves wait in one calendar queue.
+    """
+    calendar: CalendarQueue
+
+    def __init__(self):
+        """Constructor for the pacer."""
+        self.calendar = CalendarQueue()
+
+    def enqueue(self, host: 'Host', packet: Packet, pacing_rate: float, current_tick: int):
+        """Schedules a packet at the host's next departure time.
+
+        Args:
+            host (Host): The sending host
+            packet (Packet): The packet to release
+            pacing_rate (float): The host's pacing rate in packets per tick
+            current_tick (int): The current tick of the simulation
+        """
+        departure = max(float(current_tick), host.next_departure_tick)
+        host.next_departure_tick = departure + 1.0 / pacing_rate
+        departure_tick = math.ceil(departure)
+        if departure_tick <= current_tick:
+            # This tick's bucket was already released
+            host.transmit_packet(packet, current_tick)
+            return
+        host.paced_backlog += 1
+        self.calendar.schedule(departure_tick, (host, packet))
+
+    def process_tick(self, tick_num: int):
+        """Releases every packet due on this tick.
+
+        Args:
+            tick_num (int): The current tick of the simulation
+        """
+        for host, packet in self.calendar.pop_due(tick_num):
+            host.paced_backlog -= 1
+            host.transmit_packet(packet, tick_num)
+
+    def next_event_tick(self, tick_num: int) -> float:
+        """Gets the next tick a paced packet is due.
+
+        Args:
+            tick_num (int): The tick just processed
+
+        Returns:
+            float: The tick, NEVER when nothing is scheduled
+        """
+        return min(self.calendar.buckets) if self.calendar.buckets else NEVER
@@ -1,35 +1,126 @@
+from typing import Optional
+from Enums.Protocol import Protocol
+
 class Packet:
     """Implements a Packet class."""
-    packet_size_bytes: int
-    processing_time: int
-    id_sequence: list
-    original_path: list
+    packet_size_bytes: int  # the bytes the packet takes on a link
+    payload_bytes: int  # the application bytes it carries
+    arrival_tick: int  # the tick the packet reaches the end of its current link
+    id_sequence: tuple  # shared by every packet of the flow, never changed in place
+    hop: int  # the index in id_sequence of the next device to reach
+    original_path: tuple
     seq_num: int
     ack_num: int
     is_ack: bool
     source_id: str
     dest_id: str
     retransmit_count: int
+    enqueue_tick: int
+    priority: int
+    ecn_capable: bool
+    ce: bool
+    ece: bool
+    sack_blocks: tuple
+    protocol: Protocol
+    flow_label: Optional[int]
 
-    def __init__(self, id_sequence: list[str], packet_size_bytes: int, seq_num: int = 0, ack_num: int = 0, is_ack: bool = False, source_id: str = "", dest_id: str = ""):
+    def __init__(self, id_sequence: tuple[str, ...], packet_size_bytes: int, seq_num: int = 0, ack_num: int = 0, is_ack: bool = False, source_id: str = "", dest_id: str = "", priority: Optional[int] = None, ecn_capable: bool = False, ece: bool = False, sack_blocks: tuple = (), protocol: Protocol = Protocol.TCP,
+                 flow_label: Optional[int] = None, payload_bytes: Optional[int] = None):
         """Constructor for the Packet object.
 
         Args:
-            id_sequence (list[str]): The sequence of devices to travel.
-            packet_size_bytes (int): The size of the packet in bytes
+            id_sequence (tuple[str, ...]): The sequence of devices to travel, usually interned by the network's RouteCache.
+            packet_size_bytes (int): The size of the packet in bytes, headers included when the network has framing
             seq_num (int, optional): The sequence number of the packet. Defaults to 0.
             ack_num (int, optional): The ACK number of an ACK packet. Defaults to 0.
             is_ack (bool, optional): If the packet is an ACK packet. Defaults to False.
             source_id (str, optional): The string id of the host that sent the packet. Defaults to "".
             dest_id (str, optional): The string id of the destination device. Defaults to "".
+            priority (Optional[int], optional): The priority band, 0 is highest. Defaults to 0 for ACKs and 1 for data.
+            ecn_capable (bool, optional): If routers may CE mark the packet instead of dropping it. Defaults to False.
+            ece (bool, optional): If an ACK echoes a CE mark back to the sender. Defaults to False.
+            sack_blocks (tuple, optional): Inclusive (start, end) seq ranges an ACK reports above ack_num. Defaults to ().
+            protocol (Protocol, optional): TCP packets are ACKed and retransmitted, UDP ones are not. Defaults to Protocol.TCP.
+            flow_label (Optional[int], optional): ECMP label routers hash to pick the next hop, None follows id_sequence as given. Defaults to None.
+            payload_bytes (Optional[int], optional): The application bytes carried. Defaults to packet_size_bytes.
         """
         self.id_sequence = id_sequence
-        self.original_path = id_sequence.copy()  # For retransmission
-        self.processing_time = 0
+        self.hop = 0
+        # For retransmission, packets walk the path by index so it never needs a copy
+        self.original_path = id_sequence
+        self.arrival_tick = 0
         self.packet_size_bytes = packet_size_bytes
+        self.payload_bytes = packet_size_bytes if payload_bytes is None else payload_bytes
         self.seq_num = seq_num
         self.ack_num = ack_num
         self.is_ack = is_ack
         self.source_id = source_id
         self.dest_id = dest_id
-        self.retransmit_count = 0
\ No newline at end of file
+        self.retransmit_count = 0
+        self.enqueue_tick = 0
+        self.priority = priority if priority is not None else (0 if is_ack else 1)
+        self.ecn_capable = ecn_capable
+        self.ce = False
+        self.ece = ece
+        self.sack_blocks = sack_blocks
+        self.protocol = protocol
+        self.flow_label = flow_label
+
+
+class PacketPool:
+    """Recycles ACK packets, which are created and delivered far more often than data is.
+    A delivered ACK is handed back and reinitialized for the next one instead of a new Packet being allocated.
+    ACKs lost on the way are never returned and are simply collected.
+    """
+    free: list[Packet]
+    max_size: int
+    allocated: int
+    reused: int
+
+    def __init__(self, max_size: int = 4096):
+        """Constructor for the pool.
+
+        Args:
+            max_size (int, optional): The most idle packets kept, more are left to the garbage collector. Defaults to 4096.
+        """
+        self.free = []
+        self.max_size = max_size
+        self.allocated = 0
+        self.reused = 0
+
+    def acquire(self, id_sequence: tuple[str, ...], ack_num: int, source_id: str, dest_id: str, packet_size_bytes: int = 0, ece: bool = False,
+                sack_blocks: tuple = (), flow_label: Optional[int] = None) -> Packet:
+        """Gets an ACK packet, reusing an idle one when there is any.
+
+        Args:
+            id_sequence (tuple[str, ...]): The devices the ACK travels, ending with the data's sender
+            ack_num (int): The cumulative ACK number
+            source_id (str): The string id of the host sending the ACK
+            dest_id (str): The string id of the host the ACK goes to
+            packet_size_bytes (int, optional): The size of the ACK on the wire. Defaults to 0.
+            ece (bool, optional): If the ACK echoes a CE mark. Defaults to False.
+            sack_blocks (tuple, optional): Inclusive (start, end) seq ranges received above ack_num. Defaults to ().
+            flow_label (Optional[int], optional): ECMP label of the ACK. Defaults to None.
+
+        Returns:
+            Packet: The ACK, in the state a new Packet with these arguments would have
+        """
+        if self.free:
+            packet = self.free.pop()
+            # Running the constructor again resets every field, including ones added later
+            packet.__init__(id_sequence, packet_size_bytes, ack_num=ack_num, is_ack=True, source_id=source_id, dest_id=dest_id, ece=ece,
+                            sack_blocks=sack_blocks, flow_label=flow_label, payload_bytes=0)
+            self.reused += 1
+            return packet
+        self.allocated += 1
+        return Packet(id_sequence, packet_size_bytes, ack_num=ack_num, is_ack=True, source_id=source_id, dest_id=dest_id, ece=ece,
+                      sack_blocks=sack_blocks, flow_label=flow_label, payload_bytes=0)
+
+    def release(self, packet: Packet):
+        """Takes back an ACK once it was delivered and handled. The caller must not keep a reference to it.
+
+        Args:
+            packet (Packet): The delivered ACK
+        """
+        if len(self.free) < self.max_size:
+            self.free.append(packet)
@@ -0,0 +1,126 @@
+from typing import Optional, TYPE_CHECKING
+from Enums.TraceEvent import TraceEvent
+from Enums.Protocol import Protocol
+import json
+import struct
+
+if TYPE_CHECKING:
+    import numpy as np
+    from Objects.Packet import Packet
+
+MAGIC = b"NSTRACE1"
+# tick, event, flags, node, peer, source, dest, seq, size, value
+RECORD = struct.Struct("<IBBHHHHIII")
+NO_DEVICE = 0xFFFF
+NO_VALUE = 0xFFFFFFFF
+
+# Bits of the flags field
+FLAG_ACK = 1
+FLAG_CE = 2
+FLAG_RETRANSMIT = 4
+FLAG_UDP = 8
+FLAG_ECN_CAPABLE = 16
+
+# NumPy layout of one record, for readers
+RECORD_FIELDS = [("tick", "<u4"), ("event", "u1"), ("flags", "u1"), ("node", "<u2"), ("peer", "<u2"), ("source", "<u2"),
+                 ("dest", "<u2"), ("seq", "<u4"), ("size", "<u4"), ("value", "<u4")]
+
+
+class PacketTrace:
+    """Compact binary trace with one fixed size record per packet event.
+    Records are packed into a preallocated buffer that is written out only when full.
+
+    The file starts with MAGIC, a 4 byte header length and a JSON header with the device names,
+    then RECORD sized records. Devices are stored as their index in the header's device list.
+    The value field is the queue length after an ENQUEUE, the queueing delay of a DEQUEUE and the RTT of an ACK, NO_VALUE when unknown.
+    """
+    path: str
+    tick: int
+    count: int
+
+    def __init__(self, path: str, device_ids: list[str], meta: Optional[dict] = None, buffer_records: int = 65536):
+        """Constructor for the trace, writes the header.
+
+        Args:
+            path (str): The trace file
+            device_ids (list[str]): Every device of the network, at most 65535
+            meta (Optional[dict], optional): Run settings stored in the header. Defaults to None.
+            buffer_records (int, optional): Records held in memory between writes. Defaults to 65536.
+
+        Raises:
+            ValueError: When there are too many devices for the record format
+        """
+        if len(device_ids) >= NO_DEVICE:
+            raise ValueError(f"A trace holds at most {NO_DEVICE - 1} devices")
+        self.path = path
+        self.index = {device_id: i for i, device_id in enumerate(device_ids)}
+        self.buffer = bytearray(RECORD.size * buffer_records)
+        self.offset = 0
+        self.tick = 0
+        self.count = 0
+        self.file = open(path, "wb")
+        header = json.dumps({"devices": list(device_ids), "meta": meta or {}, "record_size": RECORD.size}).encode()
+        self.file.write(MAGIC + struct.pack("<I", len(header)) + header)
+
+    def record(self, event: TraceEvent, packet: 'Packet', node_id: str, peer_id: Optional[str] = None, value: int = NO_VALUE):
+        """Appends one event at the current tick.
+
+        Args:
+            event (TraceEvent): What happened
+            packet (Packet): The packet it happened to
+            node_id (str): The device the event happened at
+            peer_id (Optional[str], optional): The other end of the link involved. Defaults to None.
+            value (int, optional): Event specific value, see the class docstring. Defaults to NO_VALUE.
+        """
+        if self.offset >= len(self.buffer):
+            self.flush()
+        flags = FLAG_ACK if packet.is_ack else 0
+        if packet.ce:
+            flags |= FLAG_CE
+        if packet.retransmit_count:
+            flags |= FLAG_RETRANSMIT
+        if packet.protocol == Protocol.UDP:
+            flags |= FLAG_UDP
+        if packet.ecn_capable:
+            flags |= FLAG_ECN_CAPABLE
+        index = self.index
+        RECORD.pack_into(self.buffer, self.offset, self.tick, event, flags, index.get(node_id, NO_DEVICE), index.get(peer_id, NO_DEVICE),
+                         index.get(packet.source_id, NO_DEVICE), index.get(packet.dest_id, NO_DEVICE),
+                         (packet.ack_num if packet.is_ack else packet.seq_num) & NO_VALUE, packet.packet_size_bytes, int(value) & NO_VALUE)
+        self.offset += RECORD.size
+        self.count += 1
+
+    def flush(self):
+        """Writes the buffered records to the file."""
+        if self.offset:
+            self.file.write(memoryview(self.buffer)[:self.offset])
+            self.offset = 0
+
+    def close(self):
+        """Writes the remaining records and closes the file."""
+        self.flush()
+        self.file.close()
+
+
+def load_trace(path: str) -> tuple[list[str], dict, 'np.ndarray']:
+    """Reads a trace written by PacketTrace.
+
+    Args:
+        path (str): The trace file
+
+    Raises:
+        ValueError: When the file is not a packet trace
+
+    Returns:
+        tuple[list[str], dict, np.ndarray]: The device ids, the run settings and the records as a structured array with RECORD_FIELDS
+    """
+    import numpy as np
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a packet trace")
+        (header_length,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_length))
+        data = f.read()
+    usable = len(data) - len(data) % RECORD.size
+    records = np.frombuffer(data[:usable], dtype=np.dtype(RECORD_FIELDS))
+    return header["devices"], header["meta"], records
@@ -1,35 +1,516 @@
-# TODO - More queues!!!
+from collections import deque
+from typing import Optional
+from Enums.QueueDiscipline import QueueDiscipline
+import math
+import random
+import zlib
+
+FQ_QUANTUM_BYTES = 1514  # one full Ethernet frame, Linux fq_codel's default quantum
+
+
 class FIFOQueue:
-    """Implementation of a simple FIFO queue."""
-    queue: list
-    def __init__(self):
-        """The constructor for the queue."""
-        self.queue = []
+    """Implementation of a simple FIFO queue.
+    Tail drops once capacity packets are waiting, and can ECN mark above a threshold like DCTCP's K.
+    """
+    queue: deque
+    capacity: Optional[int]
+    mark_threshold: Optional[int]
+    drops: int
+    marks: int
+
+    def __init__(self, capacity: Optional[int] = None, mark_threshold: Optional[int] = None):
+        """The constructor for the queue.
+
+        Args:
+            capacity (Optional[int], optional): Max packets held, None for no limit. Defaults to None.
+            mark_threshold (Optional[int], optional): Queue length at which ECN capable arrivals are marked. Defaults to None.
+        """
+        self.queue = deque()
+        self.capacity = capacity
+        self.mark_threshold = mark_threshold
+        self.drops = 0
+        self.marks = 0
+
+    def _mark_or_drop(self, obj) -> bool:
+        """Signals congestion on a packet, with a CE mark when it is ECN capable.
+
+        Args:
+            obj (Any): The packet picked by the queue discipline
 
-    def pop(self):
+        Returns:
+            bool: True if the packet was marked and should still be delivered, False if it is dropped
+        """
+        if getattr(obj, "ecn_capable", False):
+            obj.ce = True
+            self.marks += 1
+            return True
+        self.drops += 1
+        return False
+
+    def pop(self, current_tick: int = 0):
         """Pops off 😎 from the queue."""
         if (len(self.queue) <= 0):
             return None
-        return self.queue.pop(0)
-    
-    def push(self, obj):
-        """Pushes onto the queue."""
+        return self.queue.popleft()
+
+    def push(self, obj, current_tick: int = 0) -> bool:
+        """Pushes onto the queue.
+
+        Returns:
+            bool: False if the object was dropped
+        """
+        if self.capacity is not None and len(self.queue) >= self.capacity:
+            self.drops += 1
+            return False
+        if self.mark_threshold is not None and len(self.queue) >= self.mark_threshold and getattr(obj, "ecn_capable", False):
+            obj.ce = True
+            self.marks += 1
         self.queue.append(obj)
+        return True
 
     def clear(self):
         """Clears the queue."""
-        self.queue = []
+        self.queue = deque()
 
     def peak(self):
         """Peak at the next value in the queue."""
         if (len(self.queue) <= 0):
             return None
         return self.queue[0]
-    
+
     def length(self) -> int:
         """Returns the length of the queue.
 
         Returns:
             int: The length of the queue
         """
-        return len(self.queue)
\ No newline at end of file
+        return len(self.queue)
+
+
+class REDQueue(FIFOQueue):
+    """Random Early Detection (Floyd and Jacobson).
+    Drops, or ECN marks, arrivals with a probability that grows with the average queue length.
+    """
+
+    def __init__(self, capacity: Optional[int] = None, min_threshold: Optional[float] = None, max_threshold: Optional[float] = None,
+                 max_p: float = 0.1, weight: float = 0.02):
+        """The constructor for the RED queue.
+
+        Args:
+            capacity (Optional[int], optional): Max packets held, None for no limit. Defaults to None.
+            min_threshold (Optional[float], optional): Average length where early drops start. Defaults to a quarter of capacity.
+            max_threshold (Optional[float], optional): Average length where every arrival drops. Defaults to three quarters of capacity.
+            max_p (float, optional): Drop probability at max_threshold. Defaults to 0.1.
+            weight (float, optional): EWMA weight of the average queue length. Defaults to 0.02.
+        """
+        super().__init__(capacity)
+        limit = capacity if capacity is not None else 100
+        self.min_threshold = min_threshold if min_threshold is not None else max(limit * 0.25, 1)
+        self.max_threshold = max_threshold if max_threshold is not None else max(limit * 0.75, self.min_threshold + 1)
+        self.max_p = max_p
+        self.weight = weight
+        self.avg = 0.0
+        self.count = -1
+
+    def should_drop(self) -> bool:
+        """Updates the average queue length and decides if the arrival is dropped.
+
+        Returns:
+            bool: If the arriving packet should be dropped
+        """
+        self.avg += self.weight * (len(self.queue) - self.avg)
+        if self.avg < self.min_threshold:
+            self.count = -1
+            return False
+        if self.avg >= self.max_threshold:
+            self.count = 0
+            return True
+        self.count += 1
+        p_b = self.max_p * (self.avg - self.min_threshold) / (self.max_threshold - self.min_threshold)
+        # Spread the drops out evenly instead of in clusters
+        p_a = 1.0 if self.count * p_b >= 1 else p_b / (1 - self.count * p_b)
+        if random.random() < p_a:
+            self.count = 0
+            return True
+        return False
+
+    def push(self, obj, current_tick: int = 0) -> bool:
+        """Pushes onto the queue unless RED or the capacity drops it.
+
+        Returns:
+            bool: False if the object was dropped
+        """
+        if self.should_drop():
+            if self.avg >= self.max_threshold:
+                # Past max_threshold RED drops even ECN capable packets
+                self.drops += 1
+                return False
+            if not self._mark_or_drop(obj):
+                return False
+        return super().push(obj, current_tick)
+
+
+class CoDelQueue(FIFOQueue):
+    """Controlled Delay AQM (RFC 8289).
+    Drops, or ECN marks, at dequeue once the sojourn time stays above target for a whole interval.
+    """
+
+    def __init__(self, capacity: Optional[int] = None, target: float = 5, interval: float = 100):
+        """The constructor for the CoDel queue.
+
+        Args:
+            capacity (Optional[int], optional): Max packets held, None for no limit. Defaults to None.
+            target (float, optional): Acceptable standing sojourn time in ticks. Defaults to 5.
+            interval (float, optional): Sliding window for the sojourn time in ticks. Defaults to 100.
+        """
+        super().__init__(capacity)
+        self.target = target
+        self.interval = interval
+        self.on_drop = None  # called with each packet dropped at dequeue
+        self.first_above_time = 0
+        self.drop_next = 0
+        self.count = 0
+        self.last_count = 0
+        self.dropping = False
+
+    def push(self, obj, current_tick: int = 0) -> bool:
+        """Pushes onto the queue with its arrival time.
+
+        Returns:
+            bool: False if the object was dropped
+        """
+        return super().push((current_tick, obj), current_tick)
+
+    def peak(self):
+        """Peak at the next value in the queue."""
+        if (len(self.queue) <= 0):
+            return None
+        return self.queue[0][1]
+
+    def _control_law(self, t: float) -> float:
+        """Gets the time of the next drop, closer together the more drops in a row.
+
+        Args:
+            t (float): The time of the current drop
+
+        Returns:
+            float: The time of the next drop
+        """
+        return t + self.interval / math.sqrt(self.count)
+
+    def _do_dequeue(self, current_tick: int) -> tuple:
+        """Pops the head and checks its sojourn time.
+
+        Args:
+            current_tick (int): The current tick of the simulation
+
+        Returns:
+            tuple: The object, or None, and if it is ok to drop it
+        """
+        if not self.queue:
+            self.first_above_time = 0
+            return None, False
+        enqueue_tick, obj = self.queue.popleft()
+        sojourn = current_tick - enqueue_tick
+        if sojourn < self.target or not self.queue:
+            self.first_above_time = 0
+            return obj, False
+        if self.first_above_time == 0:
+            self.first_above_time = current_tick + self.interval
+            return obj, False
+        return obj, current_tick >= self.first_above_time
+
+    def pop(self, current_tick: int = 0):
+        """Pops off the queue, dropping heads per the CoDel control law."""
+        obj, ok_to_drop = self._do_dequeue(current_tick)
+        if self.dropping:
+            if not ok_to_drop:
+                self.dropping = False
+            while self.dropping and obj is not None and current_tick >= self.drop_next:
+                self.count += 1
+                if self._mark_or_drop(obj):
+                    # A marked packet is still delivered
+                    self.drop_next = self._control_law(self.drop_next)
+                    break
+                if self.on_drop is not None:
+                    self.on_drop(obj)
+                obj, ok_to_drop = self._do_dequeue(current_tick)
+                if not ok_to_drop:
+                    self.dropping = False
+                else:
+                    self.drop_next = self._control_law(self.drop_next)
+        elif ok_to_drop:
+            if not self._mark_or_drop(obj):
+                if self.on_drop is not None:
+                    self.on_drop(obj)
+                obj, _ = self._do_dequeue(current_tick)
+            self.dropping = True
+            # Start near the last drop rate if we were dropping recently
+            delta = self.count - self.last_count
+            self.count = delta if delta > 1 and current_tick - self.drop_next < 16 * self.interval else 1
+            self.drop_next = self._control_law(current_tick)
+            self.last_count = self.count
+        return obj
+
+
+class FQCoDelQueue:
+    """Flow queueing with CoDel (RFC 8290).
+    Packets are hashed by (source, destination) into sub-queues, each running its own CoDel,
+    served by deficit round robin with new flows ahead of old ones.
+    When full, the head of the flow with the most packets waiting is dropped, so one flow cannot take the whole buffer.
+    Flows are kept grouped by backlog, so finding that flow is O(1) rather than a scan of every bucket.
+    """
+    capacity: Optional[int]
+    drops: int
+
+    def __init__(self, capacity: Optional[int] = None, flows: int = 1024, quantum: int = FQ_QUANTUM_BYTES, target: float = 5, interval: float = 100):
+        """The constructor for the FQ-CoDel queue.
+
+        Args:
+            capacity (Optional[int], optional): Max packets held over all flows, None for no limit. Defaults to None.
+            flows (int, optional): The number of flow buckets. Defaults to 1024.
+            quantum (int, optional): Bytes a flow may send per round, one full packet to be fair. Defaults to 1514.
+            target (float, optional): CoDel target in ticks. Defaults to 5.
+            interval (float, optional): CoDel interval in ticks. Defaults to 100.
+        """
+        self.capacity = capacity
+        self.flow_count = flows
+        self.quantum = quantum
+        self.target = target
+        self.interval = interval
+        self.buckets = {}  # bucket index -> CoDelQueue
+        self.deficits = {}  # bucket index -> deficit
+        self.new_flows = deque()
+        self.old_flows = deque()
+        self.active = set()
+        self.by_backlog = {}  # packets waiting -> indexes of the buckets with that backlog, empty buckets left out
+        self.fattest_backlog = 0
+        self.size = 0
+        self.drops = 0
+        self.marks = 0
+        self.on_drop = None  # called with each packet a flow's CoDel drops at dequeue, or an overflow drops in place of the arrival
+
+    def _bucket(self, packet) -> int:
+        """Hashes a packet's flow to a bucket, stable across runs.
+
+        Args:
+            packet (Packet): The packet
+
+        Returns:
+            int: The bucket index
+        """
+        key = f"{packet.source_id}>{packet.dest_id}".encode()
+        return zlib.crc32(key) % self.flow_count
+
+    def _set_backlog(self, index: int, before: int, after: int):
+        """Moves a bucket to the group of its new backlog.
+        The largest backlog only falls as far as the backlogs do, so keeping it is O(1) amortized.
+
+        Args:
+            index (int): The bucket index
+            before (int): The packets the bucket held
+            after (int): The packets it holds now
+        """
+        if before:
+            group = self.by_backlog[before]
+            group.discard(index)
+            if not group:
+                del self.by_backlog[before]
+        if after:
+            self.by_backlog.setdefault(after, set()).add(index)
+        if after > self.fattest_backlog:
+            self.fattest_backlog = after
+        while self.fattest_backlog and self.fattest_backlog not in self.by_backlog:
+            self.fattest_backlog -= 1
+
+    def push(self, obj, current_tick: int = 0) -> bool:
+        """Pushes onto the packet's flow queue, dropping from the fattest flow when full.
+
+        Returns:
+            bool: False if the object was dropped
+        """
+        index = self._bucket(obj)
+        flow = self.buckets.get(index)
+        if flow is None:
+            flow = CoDelQueue(None, self.target, self.interval)
+            flow.on_drop = self.on_drop
+            self.buckets[index] = flow
+        flow.push(obj, current_tick)
+        self.size += 1
+        self._set_backlog(index, flow.length() - 1, flow.length())
+        if index not in self.active:
+            self.active.add(index)
+            self.deficits[index] = self.quantum
+            self.new_flows.append(index)
+        if self.capacity is not None and self.size > self.capacity:
+            dropped = self._drop_fattest()
+            if dropped is obj:
+                return False
+            if self.on_drop is not None:
+                self.on_drop(dropped)
+        return True
+
+    def _drop_fattest(self):
+        """Drops the head of the flow with the most packets waiting.
+        An emptied flow stays listed, the next pop retires it.
+
+        Returns:
+            The dropped object
+        """
+        # Any of the flows tied for the largest backlog will do
+        index = next(iter(self.by_backlog[self.fattest_backlog]))
+        fattest = self.buckets[index]
+        _, dropped = fattest.queue.popleft()
+        self._set_backlog(index, fattest.length() + 1, fattest.length())
+        self.size -= 1
+        self.drops += 1
+        return dropped
+
+    def pop(self, current_tick: int = 0):
+        """Pops off the next flow in deficit round robin order."""
+        while True:
+            if self.new_flows:
+                flows = self.new_flows
+            elif self.old_flows:
+                flows = self.old_flows
+            else:
+                return None
+            index = flows[0]
+            if self.deficits[index] <= 0:
+                self.deficits[index] += self.quantum
+                flows.popleft()
+                self.old_flows.append(index)
+                continue
+
+            flow = self.buckets[index]
+            before = flow.length()
+            marks_before = flow.marks
+            obj = flow.pop(current_tick)
+            removed = before - flow.length()
+            if removed:
+                self._set_backlog(index, before, flow.length())
+            self.size -= removed
+            self.drops += removed - (1 if obj is not None else 0)
+            self.marks += flow.marks - marks_before
+            if obj is None:
+                flows.popleft()
+                if flows is self.new_flows and self.old_flows:
+                    # Let an emptied new flow age into the old list once
+                    self.old_flows.append(index)
+                else:
+                    self.active.discard(index)
+                    del self.buckets[index]
+                continue
+            self.deficits[index] -= max(obj.packet_size_bytes, 1)
+            return obj
+
+    def clear(self):
+        """Clears the queue."""
+        self.__init__(self.capacity, self.flow_count, self.quantum, self.target, self.interval)
+
+    def peak(self):
+        """Peak at the head of the flow that would be served next."""
+        for index in list(self.new_flows) + list(self.old_flows):
+            head = self.buckets[index].peak()
+            if head is not None:
+                return head
+        return None
+
+    def length(self) -> int:
+        """Returns the number of packets over all flows.
+
+        Returns:
+            int: The length of the queue
+        """
+        return self.size
+
+
+class StrictPriorityQueue:
+    """Strict priority over FIFO bands, band 0 is always served first.
+    Packets pick their band by packet.priority.
+    """
+    capacity: Optional[int]
+    drops: int
+
+    def __init__(self, capacity: Optional[int] = None, bands: int = 3):
+        """The constructor for the priority queue.
+
+        Args:
+            capacity (Optional[int], optional): Max packets held over all bands, None for no limit. Defaults to None.
+            bands (int, optional): The number of priority bands. Defaults to 3.
+        """
+        self.capacity = capacity
+        self.bands = [deque() for _ in range(bands)]
+        self.size = 0
+        self.drops = 0
+        self.marks = 0
+
+    def push(self, obj, current_tick: int = 0) -> bool:
+        """Pushes onto the band of the packet's priority.
+
+        Returns:
+            bool: False if the object was dropped
+        """
+        if self.capacity is not None and self.size >= self.capacity:
+            self.drops += 1
+            return False
+        band = min(max(obj.priority, 0), len(self.bands) - 1)
+        self.bands[band].append(obj)
+        self.size += 1
+        return True
+
+    def pop(self, current_tick: int = 0):
+        """Pops off the highest priority non-empty band."""
+        for band in self.bands:
+            if band:
+                self.size -= 1
+                return band.popleft()
+        return None
+
+    def clear(self):
+        """Clears the queue."""
+        self.bands = [deque() for _ in self.bands]
+        self.size = 0
+
+    def peak(self):
+        """Peak at the next value in the queue."""
+        for band in self.bands:
+            if band:
+                return band[0]
+        return None
+
+    def length(self) -> int:
+        """Returns the number of packets over all bands.
+
+        Returns:
+            int: The length of the queue
+        """
+        return self.size
+
+
+def make_queue(discipline: QueueDiscipline = QueueDiscipline.FIFO, capacity: Optional[int] = None, params: Optional[dict] = None):
+    """Creates a queue for a discipline.
+
+    Args:
+        discipline (QueueDiscipline, optional): The queue discipline. Defaults to QueueDiscipline.FIFO.
+        capacity (Optional[int], optional): Max packets held, None for no limit. Defaults to None.
+        params (Optional[dict], optional): Extra settings passed to the queue constructor. Defaults to None.
+
+    Raises:
+        ValueError: When a non valid queue discipline is picked
+
+    Returns:
+        The created queue
+    """
+    params = params or {}
+    if discipline == QueueDiscipline.FIFO:
+        return FIFOQueue(capacity, **params)
+    elif discipline == QueueDiscipline.RED:
+        return REDQueue(capacity, **params)
+    elif discipline == QueueDiscipline.CODEL:
+        return CoDelQueue(capacity, **params)
+    elif discipline == QueueDiscipline.FQ_CODEL:
+        return FQCoDelQueue(capacity, **params)
+    elif discipline == QueueDiscipline.PRIORITY:
+        return StrictPriorityQueue(capacity, **params)
+    raise ValueError("Not a valid queue discipline enum used")
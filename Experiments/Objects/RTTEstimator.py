@@ -0,0 +1,87 @@
+from typing import Optional
+from Objects.TimeBase import TimeBase, MILLISECONDS
+
+
+class RTTEstimator:
+    """Jacobson/Karels retransmission timeout estimator (RFC 6298).
+    Only fed samples from packets sent once (Karn's rule), and doubles the RTO on every timeout until a new sample arrives.
+    Like Linux, the variance term is at least min_rto, links here have fixed delays so RTTVAR alone decays to almost 0.
+    Times are in ms like everything the controllers see, the time base turns the RTO into ticks for the host's timers.
+    """
+    time_base: TimeBase
+    granularity: float  # the clock granularity G of RFC 6298, one tick in ms
+    srtt: Optional[float]
+    rttvar: Optional[float]
+    latest: Optional[float]
+    backoff: int
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+    K = 4
+
+    def __init__(self, initial_rto: float = 1000, min_rto: float = 200, max_rto: float = 60000, time_base: TimeBase = MILLISECONDS):
+        """Constructor for the estimator.
+
+        Args:
+            initial_rto (float, optional): The RTO in ms before the first sample. Defaults to 1000.
+            min_rto (float, optional): The lowest margin in ms the RTO keeps above SRTT. Defaults to 200.
+            max_rto (float, optional): The highest RTO in ms, backoff included. Defaults to 60000.
+            time_base (TimeBase, optional): The length of a tick of the host's network. Defaults to MILLISECONDS.
+        """
+        self.initial_rto = initial_rto
+        self.min_rto = min_rto
+        self.max_rto = max_rto
+        self.set_time_base(time_base)
+        self.srtt = None
+        self.rttvar = None
+        self.latest = None
+        self.backoff = 1
+
+    def set_time_base(self, time_base: TimeBase):
+        """Sets the length of a tick, the clock granularity and the conversion of the RTO follow from it.
+
+        Args:
+            time_base (TimeBase): The network's time base
+        """
+        self.time_base = time_base
+        self.granularity = time_base.to_ms(1)
+
+    def add_sample(self, rtt: float):
+        """Updates SRTT and RTTVAR with an RTT sample and clears the backoff.
+
+        Args:
+            rtt (float): The RTT in ms of a packet that was not retransmitted
+        """
+        self.latest = rtt
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt
+        self.backoff = 1
+
+    def on_timeout(self):
+        """Doubles the RTO, the doubling sticks until the next clean sample."""
+        if self.get_rto() < self.max_rto:
+            self.backoff *= 2
+
+    def get_rto(self) -> float:
+        """Gets the retransmission timeout.
+
+        Returns:
+            float: The RTO in ms
+        """
+        if self.srtt is None:
+            rto = self.initial_rto
+        else:
+            rto = self.srtt + max(self.granularity, self.K * self.rttvar, self.min_rto)
+        return min(rto * self.backoff, self.max_rto)
+
+    def get_rto_ticks(self) -> float:
+        """Gets the retransmission timeout on the network's clock.
+
+        Returns:
+            float: The RTO in ticks, fractions kept
+        """
+        return self.time_base.from_ms(self.get_rto())
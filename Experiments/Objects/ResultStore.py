@@ -0,0 +1,173 @@
+from typing import Optional, TYPE_CHECKING
+import json
+import numpy as np
+
+if TYPE_CHECKING:
+    from Objects.Network import Network
+
+# (name, dtype) of every column in a run file
+COLUMNS = [
+    ("tick", np.int64),
+    ("host", np.int32),
+    ("cwnd", np.float32),
+    ("rtt", np.float32),
+    ("queue_depth", np.int32),
+    ("throughput", np.float32),
+]
+
+
+class ResultStore:
+    """Collects per-host samples of a run into growable NumPy columns.
+    Saved as one uncompressed .npz per run, one array per column, so loading never parses text.
+    """
+    path: str
+    host_ids: list[str]
+    columns: dict
+    size: int
+    max_rows: Optional[int]
+    stride: int  # record_network keeps one sample in stride
+    samples_seen: int
+
+    def __init__(self, path: str, host_ids: list[str], capacity: int = 4096, meta: dict = None, max_rows: Optional[int] = None):
+        """Constructor for the result store.
+
+        Args:
+            path (str): The .npz file to save to
+            host_ids (list[str]): The hosts that will be sampled, their index is stored in the host column
+            capacity (int, optional): The starting number of rows. Defaults to 4096.
+            meta (dict, optional): Run settings saved alongside the columns. Defaults to None.
+            max_rows (Optional[int], optional): Thin the samples to every other tick instead of growing past this. Defaults to no limit.
+        """
+        self.path = path
+        self.host_ids = list(host_ids)
+        self.host_index = {host_id: i for i, host_id in enumerate(self.host_ids)}
+        self.meta = meta or {}
+        self.max_rows = max_rows
+        if max_rows is not None:
+            capacity = min(capacity, max_rows)
+        self.columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in COLUMNS}
+        self.size = 0
+        self.stride = 1
+        self.samples_seen = 0
+
+    def _grow(self):
+        """Doubles the capacity of every column."""
+        for name, column in self.columns.items():
+            capacity = len(column) * 2 if self.max_rows is None else max(min(len(column) * 2, self.max_rows), self.size + 1)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+
+    def _thin(self):
+        """Keeps every other sampled tick and doubles the stride, so the store covers the whole run in max_rows."""
+        ticks = self.columns["tick"][:self.size]
+        keep = np.isin(ticks, np.unique(ticks)[::2])
+        kept = int(keep.sum())
+        for column in self.columns.values():
+            column[:kept] = column[:self.size][keep]
+        self.size = kept
+        self.stride *= 2
+
+    def record(self, tick: int, host_id: str, cwnd: float, rtt: float, queue_depth: int, throughput: float):
+        """Appends one row.
+
+        Args:
+            tick (int): The tick of the sample
+            host_id (str): The string id of the host
+            cwnd (float): The host's cwnd
+            rtt (float): The host's RTT in ticks, NaN when unknown
+            queue_depth (int): The queue length of the host's first hop router
+            throughput (float): The network throughput in bps
+        """
+        if self.size >= len(self.columns["tick"]):
+            self._grow()
+        i = self.size
+        c = self.columns
+        c["tick"][i] = tick
+        c["host"][i] = self.host_index[host_id]
+        c["cwnd"][i] = cwnd
+        c["rtt"][i] = rtt
+        c["queue_depth"][i] = queue_depth
+        c["throughput"][i] = throughput
+        self.size += 1
+
+    def record_network(self, network: 'Network', tick: int):
+        """Samples every tracked host of a network, stored under the time in ms whatever the network's time base.
+
+        Args:
+            network (Network): The Network object to sample
+            tick (int): The current tick of the simulation
+        """
+        sample = self.samples_seen
+        self.samples_seen += 1
+        if self.max_rows is not None and sample % self.stride == 0 and self.size + len(self.host_ids) > self.max_rows:
+            self._thin()
+        if sample % self.stride != 0:
+            return
+        throughput = network.get_current_throughput(tick)
+        ms = int(network.time_base.to_ms(tick))
+        for host_id in self.host_ids:
+            host = network.devices[host_id]
+            rtt = host.congestion_control.get_smoothed_rtt()
+            first_hop = network.devices.get(host.routing_path[0]) if host.routing_path else None
+            queue_depth = first_hop.queue_length() if first_hop is not None and first_hop.device_type == "router" else 0
+            self.record(ms, host_id, host.congestion_control.get_cwnd(), np.nan if rtt is None else rtt, queue_depth, throughput)
+
+    def save(self):
+        """Writes the run to its .npz file."""
+        arrays = {name: column[:self.size] for name, column in self.columns.items()}
+        np.savez(self.path, host_ids=np.array(self.host_ids), meta=np.array(json.dumps(self.meta)), **arrays)
+
+
+class RunResult:
+    """A loaded run. Columns are read from the file the first time they are used."""
+
+    def __init__(self, path: str):
+        """Constructor for a loaded run.
+
+        Args:
+            path (str): The .npz file of the run
+        """
+        self.path = path
+        self.file = np.load(path)
+        self.host_ids = [str(h) for h in self.file["host_ids"]]
+        self.meta = json.loads(str(self.file["meta"]))
+        self.cache = {}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """Gets a column.
+
+        Args:
+            name (str): The column name, see COLUMNS
+
+        Returns:
+            np.ndarray: The whole column
+        """
+        if name not in self.cache:
+            self.cache[name] = self.file[name]
+        return self.cache[name]
+
+    def host_series(self, host_id: str, name: str) -> tuple[np.ndarray, np.ndarray]:
+        """Gets the ticks and values of one column for one host.
+
+        Args:
+            host_id (str): The string id of the host
+            name (str): The column name
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The ticks and the values
+        """
+        mask = self["host"] == self.host_ids.index(host_id)
+        return self["tick"][mask], self[name][mask]
+
+
+def load_run(path: str) -> RunResult:
+    """Loads a run saved by ResultStore.
+
+    Args:
+        path (str): The .npz file of the run
+
+    Returns:
+        RunResult: The loaded run
+    """
+    return RunResult(path)
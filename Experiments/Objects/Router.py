@@ -1,47 +1,212 @@
-from Objects.Queue import FIFOQueue
+from Objects.Queue import make_queue
 from Objects.Device import Device
 from Objects.Packet import Packet
 from Objects.Link import Link
+from Enums.QueueDiscipline import QueueDiscipline
+from Enums.TraceEvent import TraceEvent
+from Objects.TimeBase import TimeBase, MILLISECONDS, NEVER
+from typing import Optional
+import math
 from abc import abstractmethod
 
 class Router(Device):
-    """Implementation of a Router."""
+    """Implementation of a Router.
+    Every outgoing link has its own queue and service budget, so a busy port never blocks the others.
+    """
     queue_size: int
-    processing_delay_ms: int
-    queue: FIFOQueue
+    processing_delay_ms: float
+    processing_delay_ticks: int
+    port_queues: dict  # next hop id -> queue
+    port_credit: dict  # next hop id -> packets or bytes that may still leave
+    port_heads: dict  # next hop id -> packet dequeued but still being processed
+    port_background: dict  # next hop id -> service per tick taken by fluid cross traffic
+    service_per_tick: float
+    service_in_bytes: bool
+    last_tick: int  # the last tick processed, credit accrues over the ticks skipped since
     id: str
 
-    def __init__(self, queue_size: int, processing_delay_ms: int, id: str):
+    def __init__(self, queue_size: int, processing_delay_ms: float, id: str, queue_discipline: QueueDiscipline = QueueDiscipline.FIFO, queue_params: Optional[dict] = None,
+                 service_rate_pps: Optional[float] = None, service_rate_bytes_per_sec: Optional[float] = None, time_base: TimeBase = MILLISECONDS):
         """Constructor for a router.
 
         Args:
-            queue_size (int): The queue size in number of packets
-            processing_delay_ms (int): The processing delay of the router in ms
+            queue_size (int): The queue size in number of packets, per outgoing link
+            processing_delay_ms (float): The processing delay of the router in ms
             id (str): The string id of the router
+            queue_discipline (QueueDiscipline, optional): The queue discipline used for drops. Defaults to QueueDiscipline.FIFO.
+            queue_params (Optional[dict], optional): Extra settings for the queue discipline. Defaults to None.
+            service_rate_pps (Optional[float], optional): Packets per second forwarded on each outgoing link. Defaults to 1000, one per tick.
+            service_rate_bytes_per_sec (Optional[float], optional): Bytes per second forwarded on each outgoing link, used instead of service_rate_pps. Defaults to None.
+            time_base (TimeBase, optional): The length of a tick. Defaults to MILLISECONDS.
+
+        Raises:
+            ValueError: When both service rates are given
         """
         super().__init__("router", id)
+        if service_rate_pps is not None and service_rate_bytes_per_sec is not None:
+            raise ValueError("Only one of service_rate_pps and service_rate_bytes_per_sec can be set")
         self.queue_size = queue_size
         self.processing_delay_ms = processing_delay_ms
-        self.queue = FIFOQueue()
+        self.queue_discipline = QueueDiscipline(queue_discipline)
+        self.queue_params = queue_params
+        self.service_in_bytes = service_rate_bytes_per_sec is not None
+        self.service_rate = service_rate_bytes_per_sec if self.service_in_bytes else (service_rate_pps or 1000)
+        self.set_time_base(time_base)
+        self.last_tick = 0
+        self.port_queues = {}
+        self.port_credit = {}
+        self.port_heads = {}
+        self.port_background = {}
+        self.unroutable_drops = 0
+
+    def set_time_base(self, time_base: TimeBase):
+        """Sets the length of a tick and the processing delay and service per tick that follow from it.
+
+        Args:
+            time_base (TimeBase): The network's time base
+        """
+        super().set_time_base(time_base)
+        self.processing_delay_ticks = time_base.ticks(self.processing_delay_ms)
+        self.service_per_tick = time_base.per_tick(self.service_rate)
+        self.max_credit = max(self.service_per_tick, 1)
+
+    def enqueue(self, packet: Packet, tick_num: int) -> bool:
+        """Hands an arriving packet to the queue of its outgoing link.
+
+        Args:
+            packet (Packet): The arriving Packet object
+            tick_num (int): The current tick number of the simulation
+
+        Returns:
+            bool: False if the packet was dropped
+        """
+        tracer = self.network.tracer if self.network is not None else None
+        remaining = packet.hop < len(packet.id_sequence)
+        if packet.flow_label is not None and remaining and self.network is not None:
+            self.network.route(packet, self.id)
+        next_hop = packet.id_sequence[packet.hop] if remaining else None
+        if next_hop not in self.forwarding_table:
+            self.unroutable_drops += 1
+            if tracer is not None:
+                tracer.record(TraceEvent.DROP, packet, self.id, next_hop)
+            return False
+        queue = self.port_queues.get(next_hop)
+        if queue is None:
+            queue_size = self.queue_size
+            if next_hop in self.port_background:
+                # Fluid cross traffic holds its share of the buffer as well as of the service
+                queue_size = max(1, round(queue_size * (1 - self.port_background[next_hop] / self.service_per_tick)))
+            queue = make_queue(self.queue_discipline, queue_size, self.port_queue_params())
+            if tracer is not None and hasattr(queue, "on_drop"):
+                # CoDel drops at dequeue, out of sight of the router
+                queue.on_drop = lambda dropped, hop=next_hop: tracer.record(TraceEvent.DROP, dropped, self.id, hop)
+            self.port_queues[next_hop] = queue
+            self.port_credit[next_hop] = 0.0
+        packet.enqueue_tick = tick_num
+        accepted = queue.push(packet, self.time_base.to_ms(tick_num))
+        if tracer is not None:
+            if accepted:
+                tracer.record(TraceEvent.ENQUEUE, packet, self.id, next_hop, queue.length())
+            else:
+                tracer.record(TraceEvent.DROP, packet, self.id, next_hop)
+        return accepted
+
+    def port_queue_params(self) -> Optional[dict]:
+        """Gets the settings of a new port queue.
+        FQ-CoDel's quantum defaults to one full packet of this network: the framing's largest frame,
+        or 1 byte without framing, where that is the size of a data packet.
+
+        Returns:
+            Optional[dict]: The queue_params, with the quantum filled in for FQ-CoDel
+        """
+        params = self.queue_params or {}
+        if self.queue_discipline != QueueDiscipline.FQ_CODEL or "quantum" in params:
+            return self.queue_params
+        framing = self.network.framing if self.network is not None else None
+        return {**params, "quantum": framing.wire_bytes(framing.mtu) if framing is not None else 1}
+
+    def queue_length(self) -> int:
+        """Gets the packets waiting over all outgoing links.
+
+        Returns:
+            int: The number of queued packets
+        """
+        return sum(q.length() for q in self.port_queues.values()) + len(self.port_heads)
+
+    def get_drops(self) -> int:
+        """Gets the packets dropped by the queues or for having no route.
+
+        Returns:
+            int: The number of dropped packets
+        """
+        return sum(q.drops for q in self.port_queues.values()) + self.unroutable_drops
 
     def process_tick(self, tick_num: int):
-        """Called each tick of the simulation.
-        Forwards a packet each tick
+        """Called on each tick with work during the simulation.
+        Forwards as many packets on each outgoing link as its service budget allows, the budget of skipped ticks included.
 
         Args:
             tick_num (int): The current tick number of the simulation
         """
-        while (self.queue.length() > self.queue_size):
-            self.queue.queue.pop(-1)
-
-        packet: Packet = self.queue.peak()
-        if (packet == None):
-            return
-        packet.processing_time-=1
-        if packet.processing_time <= 0:
-            next_hop = packet.id_sequence[0] if packet.id_sequence else None
-            if next_hop and next_hop in self.forwarding_table:
-                to_send_to: Link = self.forwarding_table[next_hop]
-                packet.processing_time = to_send_to.delay_ms
+        elapsed = tick_num - self.last_tick
+        self.last_tick = tick_num
+        now_ms = self.time_base.to_ms(tick_num)
+        for next_hop, queue in self.port_queues.items():
+            head = self.port_heads.get(next_hop)
+            if head is None and queue.length() == 0:
+                # Idle ports do not bank credit
+                self.port_credit[next_hop] = 0.0
+                continue
+            if elapsed == 1:
+                credit = min(self.port_credit[next_hop] + self.service_per_tick - self.port_background.get(next_hop, 0.0), self.max_credit)
+            else:
+                credit = min(self.port_credit[next_hop] + elapsed * (self.service_per_tick - self.port_background.get(next_hop, 0.0)), self.max_credit)
+            to_send_to: Link = self.forwarding_table[next_hop]
+            while credit >= 1:
+                packet: Packet = head if head is not None else queue.pop(now_ms)
+                head = None
+                if packet is None:
+                    break
+                if tick_num - packet.enqueue_tick < self.processing_delay_ticks:
+                    # Still being processed, keep it at the head of the port
+                    head = packet
+                    break
+                # Same tick arrival for a delay of 0 or 1, as the link is processed after the router
+                packet.arrival_tick = tick_num + max(to_send_to.delay_ticks, 1) - 1
                 to_send_to.packets.append(packet)
-                self.queue.pop()
\ No newline at end of file
+                credit -= max(packet.packet_size_bytes, 1) if self.service_in_bytes else 1
+                if self.network is not None:
+                    self.network.analytics.on_queue_delay(self.id, self.time_base.to_ms(tick_num - packet.enqueue_tick))
+                    if self.network.tracer is not None:
+                        self.network.tracer.record(TraceEvent.DEQUEUE, packet, self.id, next_hop, tick_num - packet.enqueue_tick)
+            if head is None:
+                self.port_heads.pop(next_hop, None)
+            else:
+                self.port_heads[next_hop] = head
+            self.port_credit[next_hop] = credit
+
+    def next_event_tick(self, tick_num: int) -> float:
+        """Gets the next tick a port can forward, once its credit reaches a packet and its head is processed.
+
+        Args:
+            tick_num (int): The tick just processed
+
+        Returns:
+            float: The tick, NEVER when every port is idle
+        """
+        earliest = NEVER
+        for next_hop, queue in self.port_queues.items():
+            head = self.port_heads.get(next_hop)
+            if head is None and queue.length() == 0:
+                continue
+            gain = self.service_per_tick - self.port_background.get(next_hop, 0.0)
+            if gain <= 0:
+                continue
+            credit = self.port_credit[next_hop]
+            tick = tick_num + max(1, math.ceil((1 - credit) / gain))
+            if head is not None:
+                tick = max(tick, head.enqueue_tick + self.processing_delay_ticks)
+            if tick <= tick_num + 1:
+                return tick_num + 1
+            earliest = min(earliest, tick)
+        return earliest
@@ -0,0 +1,273 @@
+from Enums.EcmpWeighting import EcmpWeighting
+from typing import Optional, TYPE_CHECKING
+import zlib
+from bisect import bisect_right
+
+if TYPE_CHECKING:
+    import numpy as np
+    from Objects.Network import Network
+
+HASH_MULTIPLIER = 0x9E3779B1  # Knuth's multiplicative hash, spreads nearby labels apart
+
+
+def flow_label(source_id: str, dest_id: str, subflow: int = 0) -> int:
+    """Gets the label routers hash to keep a flow on one path.
+
+    Args:
+        source_id (str): The string id of the sending host
+        dest_id (str): The string id of the receiving host
+        subflow (int, optional): The subflow of a multipath flow. Defaults to 0.
+
+    Returns:
+        int: A 32 bit label
+    """
+    return zlib.crc32(f"{source_id}>{dest_id}/{subflow}".encode())
+
+
+class RouteCache:
+    """Interns the routes packets carry, so every packet between the same hosts shares one immutable tuple.
+    Packets walk a route by index instead of slicing it, and the route back to a sender is reversed
+    once per forward route rather than once per ACK.
+    """
+    routes: dict  # route -> the shared tuple equal to it
+    reverse_routes: dict  # (sender id, forward route) -> the route back to the sender
+    hop_routes: dict  # destination id -> next hop id -> the route an ECMP packet carries
+
+    def __init__(self):
+        """Constructor for the route cache."""
+        self.routes = {}
+        self.reverse_routes = {}
+        self.hop_routes = {}
+
+    def intern(self, path) -> tuple[str, ...]:
+        """Gets the shared route equal to a path.
+
+        Args:
+            path: The devices to travel, a list or tuple
+
+        Returns:
+            tuple[str, ...]: The interned route
+        """
+        route = tuple(path)
+        return self.routes.setdefault(route, route)
+
+    def reverse(self, source_id: str, forward: tuple[str, ...]) -> tuple[str, ...]:
+        """Gets the route ACKs take back along a forward route.
+
+        Args:
+            source_id (str): The string id of the host the forward route starts at
+            forward (tuple[str, ...]): The devices after the source, ending with the receiver
+
+        Returns:
+            tuple[str, ...]: The devices after the receiver, ending with source_id
+        """
+        key = (source_id, forward)
+        route = self.reverse_routes.get(key)
+        if route is None:
+            route = self.intern(forward[-2::-1] + (source_id,))
+            self.reverse_routes[key] = route
+        return route
+
+    def next_hop_route(self, next_hop: str, dest_id: str) -> tuple[str, ...]:
+        """Gets the route an ECMP routed packet carries, its next hop and destination.
+
+        Args:
+            next_hop (str): The string id of the hop the flow label picked
+            dest_id (str): The string id of the destination host
+
+        Returns:
+            tuple[str, ...]: (next_hop,) when it is the destination, (next_hop, dest_id) otherwise
+        """
+        hops = self.hop_routes.get(dest_id)
+        if hops is None:
+            hops = self.hop_routes[dest_id] = {}
+        route = hops.get(next_hop)
+        if route is None:
+            route = hops[next_hop] = self.intern((next_hop,) if next_hop == dest_id else (next_hop, dest_id))
+        return route
+
+
+class RouteTable:
+    """Equal cost next hops of every device toward each host.
+    Each destination is computed once, by a breadth first search over the network's CSR adjacency,
+    and kept as its own CSR: the next hops of device i are hops[ptr[i]:ptr[i + 1]] with running weights cum_weights.
+    Hosts only ever start or end a path, they never forward.
+    """
+    weighting: EcmpWeighting
+    tables: dict  # destination row -> (ptr, hops, cum_weights)
+    lookups: dict  # (device id, destination id) -> (next hop ids, running weights)
+
+    def __init__(self, network: 'Network', weighting: EcmpWeighting = EcmpWeighting.EQUAL):
+        """Constructor for the route table.
+
+        Args:
+            network (Network): The network to route over
+            weighting (EcmpWeighting, optional): How traffic splits over the next hops. Defaults to EcmpWeighting.EQUAL.
+
+        Raises:
+            ValueError: When a non valid weighting is picked
+        """
+        import numpy as np
+        try:
+            self.weighting = EcmpWeighting(weighting)
+        except ValueError:
+            raise ValueError("Not a valid ECMP weighting enum used")
+        self.adjacency = network.get_adjacency()
+        adj = self.adjacency
+        self.is_router = np.array([network.devices[d].device_type != "host" for d in adj.device_ids], dtype=bool)
+        self.edge_src = np.repeat(np.arange(len(adj.device_ids)), np.diff(adj.indptr))
+        if self.weighting == EcmpWeighting.BANDWIDTH:
+            bandwidth = np.array([l.bandwidth_in_bytes for l in network.links], dtype=np.float64)
+            self.edge_weights = bandwidth[adj.link_ids] if len(adj.link_ids) else np.zeros(0)
+        else:
+            self.edge_weights = np.ones(len(adj.neighbors))
+        self.salts = [zlib.crc32(device_id.encode()) for device_id in adj.device_ids]
+        self.tables = {}
+        self.lookups = {}
+
+    def precompute(self, dest_ids):
+        """Builds the next hops toward each of the given hosts.
+
+        Args:
+            dest_ids: The string ids of the destinations
+        """
+        for dest_id in dest_ids:
+            if dest_id in self.adjacency.index:
+                self._table(self.adjacency.index[dest_id])
+
+    def _table(self, dest: int) -> tuple:
+        """Gets the next hop CSR toward one destination, building it the first time.
+
+        Args:
+            dest (int): The row of the destination
+
+        Returns:
+            tuple: (ptr, hops, cum_weights) arrays
+        """
+        table = self.tables.get(dest)
+        if table is not None:
+            return table
+        import numpy as np
+        adj = self.adjacency
+        size = len(adj.device_ids)
+        dist = np.full(size, -1, dtype=np.int32)
+        dist[dest] = 0
+        frontier = np.array([dest], dtype=np.int64)
+        level = 0
+        while frontier.size:
+            level += 1
+            # Gather the neighbors of the whole frontier at once
+            starts = adj.indptr[frontier]
+            counts = adj.indptr[frontier + 1] - starts
+            offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            reached = adj.neighbors[offsets]
+            reached = np.unique(reached[dist[reached] < 0])
+            dist[reached] = level
+            frontier = reached[self.is_router[reached]]
+
+        src, dst = self.edge_src, adj.neighbors
+        keep = (dist[src] > 0) & (dist[dst] == dist[src] - 1) & (self.is_router[dst] | (dst == dest))
+        hops = dst[keep].astype(np.int32)
+        weights = self.edge_weights[keep]
+        ptr = np.zeros(size + 1, dtype=np.int32)
+        np.cumsum(np.bincount(src[keep], minlength=size), out=ptr[1:])
+        # Running weights restart at each device's first next hop
+        running = np.cumsum(weights)
+        before = np.concatenate([[0.0], running])[ptr[:-1]]
+        cum_weights = (running - np.repeat(before, np.diff(ptr))).astype(np.float32)
+        table = (ptr, hops, cum_weights)
+        self.tables[dest] = table
+        return table
+
+    def next_hops(self, device_id: str, dest_id: str) -> tuple[list[str], list[float]]:
+        """Gets the equal cost next hops of a device toward a host.
+
+        Args:
+            device_id (str): The string id of the forwarding device
+            dest_id (str): The string id of the destination host
+
+        Returns:
+            tuple[list[str], list[float]]: The next hop ids and their running weights, empty without a route
+        """
+        key = (device_id, dest_id)
+        entry = self.lookups.get(key)
+        if entry is None:
+            index = self.adjacency.index
+            if device_id not in index or dest_id not in index:
+                entry = ([], [])
+            else:
+                ptr, hops, cum_weights = self._table(index[dest_id])
+                row = index[device_id]
+                start, end = ptr[row], ptr[row + 1]
+                entry = ([self.adjacency.device_ids[h] for h in hops[start:end]], cum_weights[start:end].tolist())
+            self.lookups[key] = entry
+        return entry
+
+    def choose(self, device_id: str, dest_id: str, label: int) -> Optional[str]:
+        """Picks the next hop of a flow, the same one for every packet with its label.
+
+        Args:
+            device_id (str): The string id of the forwarding device
+            dest_id (str): The string id of the destination host
+            label (int): The flow label of the packet
+
+        Returns:
+            Optional[str]: The next hop id, None without a route
+        """
+        hops, cum_weights = self.next_hops(device_id, dest_id)
+        if len(hops) <= 1:
+            return hops[0] if hops else None
+        # Salting with the device keeps the choices of consecutive hops independent
+        mixed = ((label ^ self.salts[self.adjacency.index[device_id]]) * HASH_MULTIPLIER) & 0xFFFFFFFF
+        position = mixed / 2 ** 32 * cum_weights[-1]
+        return hops[min(bisect_right(cum_weights, position), len(hops) - 1)]
+
+    def trace(self, source_id: str, dest_id: str, label: int) -> list[str]:
+        """Follows the hops a flow label takes, the path in the format of a host's packet_path.
+
+        Args:
+            source_id (str): The string id of the sending host
+            dest_id (str): The string id of the receiving host
+            label (int): The flow label
+
+        Returns:
+            list[str]: The devices after the source, ending with dest_id, empty without a route
+        """
+        path = []
+        device_id = source_id
+        while device_id != dest_id:
+            device_id = self.choose(device_id, dest_id, label)
+            if device_id is None:
+                return []
+            path.append(device_id)
+        return path
+
+    def paths(self, source_id: str, dest_id: str, limit: int = 64) -> list[list[str]]:
+        """Lists the equal cost paths between two hosts.
+
+        Args:
+            source_id (str): The string id of the sending host
+            dest_id (str): The string id of the receiving host
+            limit (int, optional): The most paths to list. Defaults to 64.
+
+        Returns:
+            list[list[str]]: Each path in the format of a host's packet_path
+        """
+        found = []
+        stack = [(source_id, [])]
+        while stack and len(found) < limit:
+            device_id, path = stack.pop()
+            if device_id == dest_id:
+                found.append(path)
+                continue
+            for hop in reversed(self.next_hops(device_id, dest_id)[0]):
+                stack.append((hop, path + [hop]))
+        return found
+
+    def memory_bytes(self) -> int:
+        """Gets the size of the precomputed tables.
+
+        Returns:
+            int: The bytes held by the CSR arrays
+        """
+        return sum(a.nbytes for table in self.tables.values() for a in table)
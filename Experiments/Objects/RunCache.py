@@ -0,0 +1,238 @@
+from typing import Optional
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+ENTRY_FILE = "entry.json"  # what an entry was run with and the files it holds, its mtime is the last use
+DEFAULT_MAX_BYTES = 2 << 30
+CACHE_DIR_VARIABLE = "EXPERIMENTS_CACHE"  # overrides the default cache directory
+IGNORED_CONFIG_KEYS = ("description",)  # config keys that do not change a run
+
+# The simulator's code, any change to it gives every run a new key
+SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_DIRS = ("Objects", "Enums")
+SOURCE_FILES = ("main.py",)
+
+_version: Optional[str] = None
+
+
+def simulator_version() -> str:
+    """Gets the version of the simulator, a digest of its source.
+    Editing any module makes it a different simulator, without anyone having to bump a number.
+
+    Returns:
+        str: The hex digest, computed once per process
+    """
+    global _version
+    if _version is None:
+        digest = hashlib.sha256()
+        paths = [os.path.join(SOURCE_ROOT, name) for name in SOURCE_FILES]
+        for directory in SOURCE_DIRS:
+            for parent, _, names in os.walk(os.path.join(SOURCE_ROOT, directory)):
+                paths += [os.path.join(parent, name) for name in names if name.endswith(".py")]
+        for path in sorted(paths):
+            digest.update(os.path.relpath(path, SOURCE_ROOT).encode() + b"\0")
+            with open(path, "rb") as f:
+                digest.update(f.read())
+            digest.update(b"\0")
+        _version = digest.hexdigest()
+    return _version
+
+
+def normalized_config(config_path: str) -> dict:
+    """Reads a config as the simulator sees it, so formatting, key order and descriptions do not change its key.
+
+    Args:
+        config_path (str): The JSON network config
+
+    Returns:
+        dict: The config without the keys that do not change a run
+    """
+    with open(config_path) as f:
+        data = json.load(f)
+    return {k: v for k, v in data.items() if k not in IGNORED_CONFIG_KEYS}
+
+
+def default_cache_dir() -> str:
+    """Gets the cache directory used when none is given.
+
+    Returns:
+        str: $EXPERIMENTS_CACHE, else ~/.cache/experiments/runs
+    """
+    return os.environ.get(CACHE_DIR_VARIABLE) or os.path.join(os.path.expanduser("~"), ".cache", "experiments", "runs")
+
+
+class RunCache:
+    """Content addressed store of run files, shared by every run on the machine.
+    A run's key hashes its normalized config, the simulator version, the seed and every parameter that changes its files,
+    so identical runs map to one entry no matter where their config lives or who asks.
+    The directory is kept under max_bytes by evicting the least recently used entries.
+    Entries are built in a scratch directory and renamed into place, so concurrent runs never see half an entry.
+    """
+    root: str
+    max_bytes: int
+    hits: int
+    misses: int
+
+    def __init__(self, root: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """Constructor for the cache.
+
+        Args:
+            root (Optional[str], optional): The cache directory, created when missing. Defaults to default_cache_dir().
+            max_bytes (int, optional): The most bytes of run files kept. Defaults to 2 GiB.
+        """
+        self.root = root or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, config_path: str, parameters: dict) -> str:
+        """Gets the key of a run.
+
+        Args:
+            config_path (str): The JSON network config
+            parameters (dict): Every run parameter that changes the run files, the seed included
+
+        Returns:
+            str: The hex digest identifying the run
+        """
+        inputs = {"config": normalized_config(config_path), "version": simulator_version(), "parameters": parameters}
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True, separators=(",", ":"), default=str).encode()).hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        """Gets the directory of an entry.
+
+        Args:
+            key (str): The key of the run
+
+        Returns:
+            str: The path, whether or not the entry exists
+        """
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key: str, output_dir: str) -> bool:
+        """Copies the files of a cached run to a directory.
+
+        Args:
+            key (str): The key of the run
+            output_dir (str): The directory to copy the run files to
+
+        Returns:
+            bool: False when the run is not cached, output_dir is left untouched
+        """
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, ENTRY_FILE)) as f:
+                entry = json.load(f)
+            os.makedirs(output_dir, exist_ok=True)
+            for name in entry["files"]:
+                target = os.path.join(output_dir, name)
+                os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+                shutil.copyfile(os.path.join(entry_dir, name), target)
+            # The entry's mtime orders the eviction
+            os.utime(os.path.join(entry_dir, ENTRY_FILE))
+        except (OSError, ValueError, KeyError):
+            # Not cached, or evicted by another process while copying
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def put(self, key: str, output_dir: str, files: list[str], inputs: Optional[dict] = None) -> bool:
+        """Stores the files of a finished run.
+
+        Args:
+            key (str): The key of the run
+            output_dir (str): The directory the run wrote its files to
+            files (list[str]): The run files, relative to output_dir, missing ones are skipped
+            inputs (Optional[dict], optional): What the run was started with, kept in the entry for people looking at it. Defaults to None.
+
+        Returns:
+            bool: False when the run is larger than the whole cache and was not stored
+        """
+        files = [name for name in files if os.path.isfile(os.path.join(output_dir, name))]
+        size = sum(os.path.getsize(os.path.join(output_dir, name)) for name in files)
+        if size > self.max_bytes:
+            return False
+        entry_dir = self._entry_dir(key)
+        scratch = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        try:
+            for name in files:
+                target = os.path.join(scratch, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copyfile(os.path.join(output_dir, name), target)
+            os.makedirs(scratch, exist_ok=True)
+            with open(os.path.join(scratch, ENTRY_FILE), "w") as f:
+                json.dump({"key": key, "files": files, "bytes": size, "created": time.time(), "inputs": inputs or {}}, f, indent=4, default=str)
+            os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+            try:
+                os.rename(scratch, entry_dir)
+            except OSError:
+                # Another process stored the same run first, its files are the same
+                pass
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+        self.evict()
+        return True
+
+    def entries(self) -> list[dict]:
+        """Lists the cached runs.
+
+        Returns:
+            list[dict]: The key, bytes, last use and path of each entry, least recently used first
+        """
+        found = []
+        for shard in os.listdir(self.root):
+            shard_dir = os.path.join(self.root, shard)
+            if shard.startswith(".") or not os.path.isdir(shard_dir):
+                continue
+            for key in os.listdir(shard_dir):
+                entry_file = os.path.join(shard_dir, key, ENTRY_FILE)
+                try:
+                    with open(entry_file) as f:
+                        size = json.load(f)["bytes"]
+                    used = os.path.getmtime(entry_file)
+                except (OSError, ValueError, KeyError):
+                    continue
+                found.append({"key": key, "bytes": size, "last_used": used, "path": os.path.join(shard_dir, key)})
+        return sorted(found, key=lambda e: e["last_used"])
+
+    def size(self) -> int:
+        """Gets the bytes of run files held.
+
+        Returns:
+            int: The total over every entry
+        """
+        return sum(e["bytes"] for e in self.entries())
+
+    def evict(self):
+        """Deletes the least recently used entries until the cache fits max_bytes."""
+        entries = self.entries()
+        total = sum(e["bytes"] for e in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(entry["path"])
+            total -= entry["bytes"]
+
+    def clear(self):
+        """Deletes every entry."""
+        for entry in self.entries():
+            self._remove(entry["path"])
+
+    def _remove(self, entry_dir: str):
+        """Deletes an entry, and its shard directory once empty.
+
+        Args:
+            entry_dir (str): The directory of the entry
+        """
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        try:
+            os.rmdir(os.path.dirname(entry_dir))
+        except OSError:
+            # Other entries share the shard
+            pass
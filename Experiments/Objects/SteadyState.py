@@ -0,0 +1,254 @@
+from typing import Optional, TYPE_CHECKING
+from statistics import NormalDist
+import numpy as np
+
+if TYPE_CHECKING:
+    from Objects.Network import Network
+
+TOTAL = "total"  # metric name of the network wide throughput
+
+
+def t_quantile(confidence: float, dof: int) -> float:
+    """Gets the two sided Student t quantile, by the Cornish-Fisher expansion around the normal one.
+
+    Args:
+        confidence (float): The confidence level, e.g. 0.95
+        dof (int): The degrees of freedom
+
+    Returns:
+        float: The quantile, within 0.1% of the exact value from 5 degrees of freedom up
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    v = max(dof, 1)
+    return (z + (z ** 3 + z) / (4 * v) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * v ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * v ** 3))
+
+
+def mser_truncation(values: np.ndarray, batch: int = 5) -> int:
+    """Finds the warm-up to drop with MSER-5 (White, 1997).
+    Picks the truncation that minimizes the squared standard error of the mean of what is left,
+    only looking at the first half so the estimate always keeps enough data.
+
+    Args:
+        values (np.ndarray): The observations in order
+        batch (int, optional): Observations averaged together before the search. Defaults to 5.
+
+    Returns:
+        int: The number of leading observations to drop
+    """
+    n = len(values) // batch
+    if n < 4:
+        return 0
+    means = values[:n * batch].reshape(n, batch).mean(axis=1)
+    # Sums over every suffix means[d:], computed at once from the reversed cumulative sums
+    suffix_sum = np.cumsum(means[::-1])[::-1]
+    suffix_sq = np.cumsum((means * means)[::-1])[::-1]
+    left = n - np.arange(n)
+    variance_sum = suffix_sq - suffix_sum ** 2 / left
+    mser = variance_sum / left ** 2
+    d = int(np.argmin(mser[:n // 2 + 1]))
+    return d * batch
+
+
+def batch_means_interval(values: np.ndarray, batches: int = 20, confidence: float = 0.95) -> tuple[float, float, float]:
+    """Estimates the mean of a correlated series and the half width of its confidence interval.
+    Contiguous batches of a long enough series are nearly independent, so their means give the interval.
+    The lag 1 autocorrelation of the batch means tells whether the batches were long enough for that.
+
+    Args:
+        values (np.ndarray): The observations after the warm-up
+        batches (int, optional): The number of batches. Defaults to 20.
+        confidence (float, optional): The confidence level. Defaults to 0.95.
+
+    Returns:
+        tuple[float, float, float]: The mean, the half width and the lag 1 autocorrelation, inf and 1 without enough observations
+    """
+    size = len(values) // batches
+    if size < 1:
+        return float(values.mean()) if len(values) else 0.0, float("inf"), 1.0
+    means = values[:size * batches].reshape(batches, size).mean(axis=1)
+    half_width = t_quantile(confidence, batches - 1) * means.std(ddof=1) / np.sqrt(batches)
+    centered = means - means.mean()
+    square_sum = float(centered @ centered)
+    lag1 = float(centered[:-1] @ centered[1:]) / square_sum if square_sum > 0 else 0.0
+    return float(means.mean()), float(half_width), lag1
+
+
+class MetricSeries:
+    """Observations of one metric at a fixed interval, bounded in length.
+    When full, neighbouring observations are averaged in pairs and the interval doubles.
+    """
+    values: np.ndarray
+    size: int
+    interval: int  # ticks per stored observation
+    pending: list[float]
+    merge: int  # raw observations averaged into each stored one
+
+    def __init__(self, interval: int, capacity: int = 4096):
+        """Constructor for the series.
+
+        Args:
+            interval (int): Ticks per observation
+            capacity (int, optional): The most stored observations, even. Defaults to 4096.
+        """
+        self.values = np.empty(capacity)
+        self.size = 0
+        self.interval = interval
+        self.pending = []
+        self.merge = 1
+
+    def add(self, value: float):
+        """Adds an observation.
+
+        Args:
+            value (float): The metric over the last interval
+        """
+        self.pending.append(value)
+        if len(self.pending) < self.merge:
+            return
+        if self.size == len(self.values):
+            half = self.size // 2
+            self.values[:half] = self.values[:half * 2].reshape(half, 2).mean(axis=1)
+            self.size = half
+            self.merge *= 2
+            self.interval *= 2
+            if len(self.pending) < self.merge:
+                return
+        self.values[self.size] = sum(self.pending) / len(self.pending)
+        self.size += 1
+        self.pending = []
+
+    def observations(self) -> np.ndarray:
+        """Gets the stored observations.
+
+        Returns:
+            np.ndarray: The observations in order
+        """
+        return self.values[:self.size]
+
+
+class SteadyStateDetector:
+    """Decides when a run has reached steady state and its means are known well enough to stop.
+    Samples the network wide throughput and the goodput of every flow each interval.
+    At each check the warm-up of every series is cut with MSER-5 and batch means give a confidence interval
+    on what is left. The run may stop once every interval is narrower than the target precision.
+    """
+    interval: int
+    precision: float
+    confidence: float
+    min_ticks: int
+    batches: int
+    min_flow_share: float
+    max_autocorrelation: float
+    series: dict  # metric name -> MetricSeries
+    estimates: dict  # metric name -> the last estimate
+    steady_tick: Optional[int]
+    last_bytes: dict  # metric name -> bytes delivered at the last observation
+    samples: int
+
+    def __init__(self, interval: int = 100, precision: float = 0.05, confidence: float = 0.95, min_ticks: int = 10000, batches: int = 20,
+                 min_flow_share: float = 0.05, max_autocorrelation: float = 0.2):
+        """Constructor for the detector.
+
+        Args:
+            interval (int, optional): Ticks per observation. Defaults to 100.
+            precision (float, optional): The largest allowed ratio of the interval's half width to the mean. Defaults to 0.05.
+            confidence (float, optional): The confidence level of the intervals. Defaults to 0.95.
+            min_ticks (int, optional): Never stop before this tick. Defaults to 10000.
+            batches (int, optional): The number of batches of the batch means. Defaults to 20.
+            min_flow_share (float, optional): Flows slower than this share of the total throughput are held to the precision of one this fast,
+                so starved flows do not keep a run going. Defaults to 0.05.
+            max_autocorrelation (float, optional): The largest lag 1 autocorrelation of the batch means, above it the batches are
+                too short to be independent and the interval is not trusted. Defaults to 0.2.
+        """
+        self.interval = interval
+        self.precision = precision
+        self.confidence = confidence
+        self.min_ticks = min_ticks
+        self.batches = batches
+        self.min_flow_share = min_flow_share
+        self.max_autocorrelation = max_autocorrelation
+        self.series = {}
+        self.estimates = {}
+        self.steady_tick = None
+        self.last_bytes = {}
+        self.samples = 0
+
+    def record(self, network: 'Network', tick: int):
+        """Takes the observations of the last interval. Called every interval ticks.
+
+        Args:
+            network (Network): The Network object to sample
+            tick (int): The current tick of the simulation
+        """
+        delivered = {TOTAL: network.total_bytes_delivered}
+        for (source_id, dest_id, protocol), flow in network.analytics.flows.items():
+            delivered[f"{source_id}>{dest_id}/{protocol.value}"] = flow.goodput_bytes
+        for name, total in delivered.items():
+            series = self.series.get(name)
+            if series is None:
+                series = MetricSeries(self.interval)
+                # Flows seen late were silent until now
+                for _ in range(self.samples):
+                    series.add(0.0)
+                self.series[name] = series
+            # bps over the interval, 1 tick = 1 ms
+            series.add((total - self.last_bytes.get(name, 0)) * 8 * 1000 / self.interval)
+            self.last_bytes[name] = total
+        self.samples += 1
+
+    def estimate(self, name: str) -> dict:
+        """Estimates the steady state mean of one metric.
+
+        Args:
+            name (str): The metric, TOTAL or source>dest/protocol
+
+        Returns:
+            dict: The warm-up cut in ticks, the mean and half width in bps and the observations left
+        """
+        series = self.series[name]
+        values = series.observations()
+        warmup = mser_truncation(values)
+        mean, half_width, lag1 = batch_means_interval(values[warmup:], self.batches, self.confidence)
+        return {"warmup_ticks": warmup * series.interval, "mean_bps": mean, "half_width_bps": half_width, "lag1_autocorrelation": lag1,
+                "observations": len(values) - warmup}
+
+    def check(self, tick: int) -> bool:
+        """Estimates every metric and tells whether the run can stop.
+
+        Args:
+            tick (int): The current tick of the simulation
+
+        Returns:
+            bool: True once every metric is precise enough and min_ticks have run
+        """
+        if TOTAL not in self.series:
+            return False
+        self.estimates = {name: self.estimate(name) for name in self.series}
+        floor = self.min_flow_share * abs(self.estimates[TOTAL]["mean_bps"])
+        converged = True
+        for name, estimate in self.estimates.items():
+            scale = abs(estimate["mean_bps"]) if name == TOTAL else max(abs(estimate["mean_bps"]), floor)
+            estimate["relative_half_width"] = estimate["half_width_bps"] / scale if scale > 0 else float("inf")
+            estimate["converged"] = (estimate["relative_half_width"] <= self.precision and estimate["observations"] >= 2 * self.batches
+                                     and estimate["lag1_autocorrelation"] <= self.max_autocorrelation)
+            converged = converged and estimate["converged"]
+        if converged and tick >= self.min_ticks:
+            self.steady_tick = tick
+            return True
+        return False
+
+    def summary(self) -> dict:
+        """Summarizes the detector's settings and its last estimates.
+
+        Returns:
+            dict: The tick steady state was reached, None if never, and each metric's estimate
+        """
+        return {
+            "steady_tick": self.steady_tick,
+            "precision": self.precision,
+            "confidence": self.confidence,
+            "batches": self.batches,
+            "warmup_method": "MSER-5",
+            "metrics": self.estimates,
+        }
@@ -0,0 +1,234 @@
+from typing import Optional, TYPE_CHECKING
+import asyncio
+import json
+import os
+import threading
+import time
+
+if TYPE_CHECKING:
+    from Objects.Network import Network
+
+
+def take_snapshot(network: 'Network', tick: int) -> dict:
+    """Reads the live metrics of a network.
+
+    Args:
+        network (Network): The Network object to read
+        tick (int): The current tick of the network
+
+    Returns:
+        dict: The tick in ms like the run files and max_ticks, throughput, packets delivered, each host's cwnd and each router's queue depth and drops
+    """
+    cwnds = {}
+    queues = {}
+    drops = {}
+    for device in network.devices.values():
+        if device.device_type == "host":
+            cwnds[device.id] = round(device.congestion_control.get_cwnd(), 2)
+        else:
+            queues[device.id] = device.queue_length()
+            drops[device.id] = device.get_drops()
+    return {
+        "tick": int(network.time_base.to_ms(tick)),
+        "throughput_bps": round(network.get_current_throughput(tick), 2),
+        "packets_delivered": network.total_packets_delivered,
+        "events": network.events_processed,
+        "cwnd": cwnds,
+        "queue_depth": queues,
+        "drops": drops,
+    }
+
+
+class TelemetryServer:
+    """Streams run snapshots to local clients from a background asyncio thread.
+    The simulation only swaps in a new encoded snapshot, sending happens off the sim thread.
+
+    A Unix socket streams one JSON line per snapshot to every client.
+    Over TCP it speaks plain HTTP: GET / returns the latest snapshot, GET /stream streams JSON lines.
+    """
+    port: Optional[int]
+    unix_path: Optional[str]
+    interval: float
+    latest: bytes
+    version: int
+    finished: bool
+
+    def __init__(self, port: Optional[int] = None, unix_path: Optional[str] = None, host: str = "127.0.0.1", interval: float = 0.5, meta: Optional[dict] = None):
+        """Constructor for the telemetry server.
+
+        Args:
+            port (Optional[int], optional): TCP port for the HTTP endpoint, 0 picks a free one. Defaults to None.
+            unix_path (Optional[str], optional): Path of the Unix socket, used instead of port. Defaults to None.
+            host (str, optional): The address the HTTP endpoint binds to. Defaults to "127.0.0.1".
+            interval (float, optional): Seconds between pushes to stream clients. Defaults to 0.5.
+            meta (Optional[dict], optional): Run settings sent with every snapshot. Defaults to None.
+
+        Raises:
+            ValueError: When neither or both of port and unix_path are given
+        """
+        if (port is None) == (unix_path is None):
+            raise ValueError("Exactly one of port and unix_path must be set")
+        self.port = port
+        self.unix_path = unix_path
+        self.host = host
+        self.interval = interval
+        self.meta = meta or {}
+        self.latest = b"{}\n"
+        self.version = 0
+        self.finished = False
+        self.started_at = time.monotonic()
+        self.last_rate = (self.started_at, 0, 0)  # (wall time, ms tick, events) of the last snapshot
+        self.loop = asyncio.new_event_loop()
+        self.server = None
+        self.address = None
+        self.clients = set()
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+
+    def start(self) -> str:
+        """Starts serving in the background.
+
+        Returns:
+            str: The address clients connect to, unix:<path> or http://<host>:<port>
+        """
+        self.thread.start()
+        self.ready.wait()
+        if self.server is None:
+            raise OSError(f"Could not start the telemetry server on {self.unix_path or self.port}")
+        return self.address
+
+    def publish(self, network: 'Network', tick: int):
+        """Takes a snapshot for the clients. Called from the simulation loop, never blocks on a client.
+
+        Args:
+            network (Network): The Network object to read
+            tick (int): The current tick of the network, snapshots count it in ms
+        """
+        now = time.monotonic()
+        last_time, last_tick, last_events = self.last_rate
+        elapsed = max(now - last_time, 1e-9)
+        snapshot = take_snapshot(network, tick)
+        snapshot.update(self.meta)
+        snapshot["wall_seconds"] = round(now - self.started_at, 3)
+        snapshot["ticks_per_sec"] = round((snapshot["tick"] - last_tick) / elapsed, 1)
+        snapshot["events_per_sec"] = round((snapshot["events"] - last_events) / elapsed, 1)
+        self.last_rate = (now, snapshot["tick"], snapshot["events"])
+        # One reference swap, the server thread only ever reads whole snapshots
+        self.latest = (json.dumps(snapshot) + "\n").encode()
+        self.version += 1
+
+    def close(self, network: Optional['Network'] = None, tick: Optional[int] = None):
+        """Sends a final snapshot to the clients and stops the server.
+
+        Args:
+            network (Optional[Network], optional): The network for the final snapshot. Defaults to None.
+            tick (Optional[int], optional): The last tick of the network. Defaults to None.
+        """
+        if network is not None and tick is not None and int(network.time_base.to_ms(tick)) != self.last_rate[1]:
+            self.publish(network, tick)
+        if not self.thread.is_alive():
+            return
+        self.finished = True
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout=self.interval + 2)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=2)
+
+    def _run(self):
+        """Runs the event loop of the server thread."""
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._start())
+        except OSError:
+            self.ready.set()
+            return
+        self.ready.set()
+        self.loop.run_forever()
+        self.loop.close()
+
+    async def _start(self):
+        """Opens the listening socket."""
+        if self.unix_path is not None:
+            if os.path.exists(self.unix_path):
+                os.remove(self.unix_path)
+            self.server = await asyncio.start_unix_server(self._handle_unix, path=self.unix_path)
+            self.address = f"unix:{self.unix_path}"
+        else:
+            self.server = await asyncio.start_server(self._handle_http, self.host, self.port)
+            port = self.server.sockets[0].getsockname()[1]
+            self.address = f"http://{self.host}:{port}"
+
+    async def _shutdown(self):
+        """Lets the stream clients get the final snapshot, then closes every connection."""
+        await asyncio.sleep(self.interval + 0.05)
+        self.server.close()
+        for writer in list(self.clients):
+            writer.close()
+        if self.unix_path is not None and os.path.exists(self.unix_path):
+            os.remove(self.unix_path)
+
+    async def _stream(self, writer: asyncio.StreamWriter):
+        """Writes every new snapshot to one client until the run ends or the client leaves.
+
+        Args:
+            writer (asyncio.StreamWriter): The client connection
+        """
+        self.clients.add(writer)
+        sent_version = -1
+        try:
+            while True:
+                finished = self.finished
+                if self.version != sent_version:
+                    sent_version = self.version
+                    writer.write(self.latest)
+                    await writer.drain()
+                if finished:
+                    break
+                await asyncio.sleep(self.interval)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    async def _handle_unix(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Streams snapshots to a Unix socket client.
+
+        Args:
+            reader (asyncio.StreamReader): The client's reader, unused
+            writer (asyncio.StreamWriter): The client's writer
+        """
+        await self._stream(writer)
+
+    async def _handle_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answers one HTTP request, GET / for the latest snapshot and GET /stream for a stream.
+
+        Args:
+            reader (asyncio.StreamReader): The client's reader
+            writer (asyncio.StreamWriter): The client's writer
+        """
+        try:
+            request_line = (await reader.readline()).decode(errors="replace").split()
+            # Skip the headers
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+        except (ConnectionError, OSError):
+            writer.close()
+            return
+        path = request_line[1] if len(request_line) > 1 else "/"
+        if path.startswith("/stream"):
+            writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: application/x-ndjson\r\nCache-Control: no-cache\r\n\r\n")
+            await self._stream(writer)
+            return
+        if path in ("/", "/snapshot"):
+            body = self.latest
+            writer.write(b"HTTP/1.0 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+        else:
+            writer.write(b"HTTP/1.0 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+        try:
+            await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        writer.close()
@@ -0,0 +1,79 @@
+from Enums.TimeUnit import TimeUnit
+import math
+
+TICKS_PER_MS = {TimeUnit.MS: 1, TimeUnit.US: 1000, TimeUnit.NS: 1000000}
+NEVER = math.inf  # next event tick of something with nothing scheduled
+
+
+class TimeBase:
+    """Length of one tick of the simulation.
+    Ticks stay integers whatever the unit. Configs, controllers and output keep their times in ms,
+    converted at the edge of the engine, so a ms network runs exactly as before and a us network only differs in resolution.
+    """
+    unit: TimeUnit
+    ticks_per_ms: int
+    ticks_per_second: int
+
+    def __init__(self, unit: TimeUnit = TimeUnit.MS):
+        """Constructor for the time base.
+
+        Args:
+            unit (TimeUnit, optional): The length of a tick. Defaults to TimeUnit.MS.
+
+        Raises:
+            ValueError: When a non valid time unit is picked
+        """
+        try:
+            self.unit = TimeUnit(unit)
+        except ValueError:
+            raise ValueError("Not a valid time unit enum used")
+        self.ticks_per_ms = TICKS_PER_MS[self.unit]
+        self.ticks_per_second = self.ticks_per_ms * 1000
+
+    def ticks(self, ms: float) -> int:
+        """Converts a duration to whole ticks.
+
+        Args:
+            ms (float): The duration in ms, fractions allowed
+
+        Returns:
+            int: The nearest number of ticks
+        """
+        return round(ms * self.ticks_per_ms)
+
+    def from_ms(self, ms: float) -> float:
+        """Converts ms to ticks without rounding.
+
+        Args:
+            ms (float): A time or a duration in ms
+
+        Returns:
+            float: The time in ticks, ms itself on a ms base so integer arithmetic stays integer
+        """
+        return ms if self.ticks_per_ms == 1 else ms * self.ticks_per_ms
+
+    def to_ms(self, ticks: float) -> float:
+        """Converts ticks to ms.
+
+        Args:
+            ticks (float): A tick or a number of ticks
+
+        Returns:
+            float: The time in ms, ticks itself on a ms base so integer arithmetic stays integer
+        """
+        return ticks if self.ticks_per_ms == 1 else ticks / self.ticks_per_ms
+
+    def per_tick(self, rate_per_second: float) -> float:
+        """Converts a rate to the amount per tick.
+
+        Args:
+            rate_per_second (float): The rate per second
+
+        Returns:
+            float: The rate per tick
+        """
+        return rate_per_second / self.ticks_per_second
+
+
+# Time base of devices outside a network, and of every config without a time_unit
+MILLISECONDS = TimeBase()
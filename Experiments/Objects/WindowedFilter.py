@@ -0,0 +1,99 @@
+class WindowedFilter:
+    """Kathleen Nichols' windowed min/max filter.
+    Keeps the best, second best and third best samples of the window so each update is O(1).
+    """
+    window: float
+    is_max: bool
+    samples: list  # [(value, time)] * 3, best first
+
+    def __init__(self, window: float, is_max: bool = True):
+        """Constructor for the filter.
+
+        Args:
+            window (float): The length of the window, in whatever unit the times are given
+            is_max (bool, optional): True for a max filter, False for a min filter. Defaults to True.
+        """
+        self.window = window
+        self.is_max = is_max
+        self.samples = []
+
+    def _better(self, a: float, b: float) -> bool:
+        """Checks if a is at least as good as b for this filter.
+
+        Args:
+            a (float): The new value
+            b (float): The stored value
+
+        Returns:
+            bool: If a should replace b
+        """
+        return a >= b if self.is_max else a <= b
+
+    def reset(self, value: float, time: float) -> float:
+        """Forgets every sample and starts again from one.
+
+        Args:
+            value (float): The sample value
+            time (float): The time of the sample
+
+        Returns:
+            float: The new best value
+        """
+        self.samples = [(value, time)] * 3
+        return value
+
+    def update(self, value: float, time: float) -> float:
+        """Adds a sample to the filter.
+
+        Args:
+            value (float): The sample value
+            time (float): The time of the sample
+
+        Returns:
+            float: The best value in the window
+        """
+        s = self.samples
+        if not s or self._better(value, s[0][0]) or time - s[2][1] > self.window:
+            return self.reset(value, time)
+
+        if self._better(value, s[1][0]):
+            s[1] = s[2] = (value, time)
+        elif self._better(value, s[2][0]):
+            s[2] = (value, time)
+
+        # Expire old samples, promoting the next best
+        dt = time - s[0][1]
+        if dt > self.window:
+            s[0], s[1], s[2] = s[1], s[2], (value, time)
+            if time - s[0][1] > self.window:
+                s[0], s[1] = s[1], s[2]
+        elif s[1][1] == s[0][1] and dt > self.window / 4:
+            # A quarter of the window passed without a new second best
+            s[1] = s[2] = (value, time)
+        elif s[2][1] == s[1][1] and dt > self.window / 2:
+            # Half of the window passed without a new third best
+            s[2] = (value, time)
+        return s[0][0]
+
+    def get(self, default: float = 0.0) -> float:
+        """Gets the best value in the window.
+
+        Args:
+            default (float, optional): Returned when there are no samples. Defaults to 0.0.
+
+        Returns:
+            float: The best value
+        """
+        if not self.samples:
+            return default
+        return self.samples[0][0]
+
+    def get_time(self) -> float:
+        """Gets the time of the best sample.
+
+        Returns:
+            float: The time the best value was seen, 0 when empty
+        """
+        if not self.samples:
+            return 0
+        return self.samples[0][1]
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Dashboard.py
+
+Terminal dashboard for runs started with main.py --telemetry-port or --telemetry-socket.
+
+Usage:
+  python Results/Dashboard.py http://127.0.0.1:8765                  # one run, with cwnds and queues
+  python Results/Dashboard.py unix:/tmp/run1.sock unix:/tmp/run2.sock  # one line per run of a sweep
+  python Results/Dashboard.py http://127.0.0.1:8765 --once           # print the latest snapshot as JSON
+
+Notes:
+ - Only the standard library is used, the dashboard starts instantly.
+ - A run is flagged STALLED when no new snapshot arrived for --stall-after seconds.
+"""
+import argparse
+import json
+import socket
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+CLEAR = "\x1b[H\x1b[2J"
+
+
+def connect(target: str, path: str) -> socket.socket:
+    """Opens a connection to a telemetry server and sends the HTTP request if needed.
+
+    Args:
+        target (str): unix:<path>, http://<host>:<port> or <host>:<port>
+        path (str): The HTTP path to request, ignored for Unix sockets
+
+    Returns:
+        socket.socket: The connected socket, positioned at the first JSON line
+    """
+    if target.startswith("unix:"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(target[len("unix:"):])
+        return sock
+    url = urlparse(target if "://" in target else f"http://{target}")
+    sock = socket.create_connection((url.hostname or "127.0.0.1", url.port or 80))
+    sock.sendall(f"GET {path} HTTP/1.0\r\nHost: {url.hostname}\r\n\r\n".encode())
+    return sock
+
+
+def read_lines(sock: socket.socket, skip_headers: bool):
+    """Yields the JSON lines a server sends.
+
+    Args:
+        sock (socket.socket): The connected socket
+        skip_headers (bool): If an HTTP response header comes first
+
+    Yields:
+        dict: Each snapshot
+    """
+    buffer = b""
+    in_headers = skip_headers
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return
+        buffer += chunk
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            if in_headers:
+                in_headers = line.strip() != b""
+                continue
+            if line.strip():
+                yield json.loads(line)
+
+
+class RunView:
+    """The latest state of one watched run, filled by a reader thread."""
+
+    def __init__(self, target: str):
+        """Constructor for a watched run.
+
+        Args:
+            target (str): The address of the run's telemetry server
+        """
+        self.target = target
+        self.snapshot = None
+        self.updated_at = time.monotonic()
+        self.status = "CONNECTING"
+
+    def follow(self):
+        """Reads snapshots until the run ends. Runs in its own thread."""
+        try:
+            sock = connect(self.target, "/stream")
+        except OSError as e:
+            self.status = f"ERROR {e.strerror or e}"
+            return
+        self.status = "RUNNING"
+        try:
+            for snapshot in read_lines(sock, not self.target.startswith("unix:")):
+                self.snapshot = snapshot
+                self.updated_at = time.monotonic()
+            done = self.snapshot is not None and self.snapshot.get("tick", 0) >= (self.snapshot.get("max_ticks") or 0)
+            self.status = "DONE" if done else "CLOSED"
+        except (OSError, ValueError) as e:
+            self.status = f"ERROR {e}"
+        finally:
+            sock.close()
+
+    def state(self, stall_after: float) -> str:
+        """Gets the run's status, RUNNING runs without recent snapshots are STALLED.
+
+        Args:
+            stall_after (float): Seconds without a snapshot before a run counts as stalled
+
+        Returns:
+            str: The status
+        """
+        if self.status == "RUNNING" and time.monotonic() - self.updated_at > stall_after:
+            return "STALLED"
+        return self.status
+
+
+def format_eta(snapshot: dict) -> str:
+    """Estimates the time left of a run.
+
+    Args:
+        snapshot (dict): The latest snapshot
+
+    Returns:
+        str: The ETA as m:ss, - when unknown
+    """
+    rate = snapshot.get("ticks_per_sec") or 0
+    max_ticks = snapshot.get("max_ticks")
+    if not rate or not max_ticks:
+        return "-"
+    seconds = int((max_ticks - snapshot["tick"]) / rate)
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def render_table(views: list[RunView], stall_after: float) -> list[str]:
+    """Formats one line per run.
+
+    Args:
+        views (list[RunView]): The watched runs
+        stall_after (float): Seconds without a snapshot before a run counts as stalled
+
+    Returns:
+        list[str]: The lines to print
+    """
+    lines = [f"{'run':<28} {'status':<10} {'tick':>14} {'%':>5} {'ticks/s':>9} {'events/s':>10} {'bps':>10} {'ETA':>6}"]
+    for view in views:
+        s = view.snapshot or {}
+        max_ticks = s.get("max_ticks") or 0
+        progress = f"{100 * s.get('tick', 0) / max_ticks:.0f}" if max_ticks else "-"
+        lines.append(f"{view.target[-28:]:<28} {view.state(stall_after):<10} {str(s.get('tick', '-')) + '/' + str(max_ticks or '-'):>14} {progress:>5} "
+                     f"{s.get('ticks_per_sec', '-'):>9} {s.get('events_per_sec', '-'):>10} {s.get('throughput_bps', '-'):>10} {format_eta(s) if s else '-':>6}")
+    return lines
+
+
+def render_detail(snapshot: dict, width: int = 40) -> list[str]:
+    """Formats the cwnd of each host and the queue of each router of one run.
+
+    Args:
+        snapshot (dict): The latest snapshot
+        width (int, optional): The width of the longest bar. Defaults to 40.
+
+    Returns:
+        list[str]: The lines to print
+    """
+    lines = [f"config {snapshot.get('config')}  seed {snapshot.get('seed')}  delivered {snapshot.get('packets_delivered')}  wall {snapshot.get('wall_seconds')} s", ""]
+    for title, values in (("cwnd", snapshot.get("cwnd", {})), ("queue", snapshot.get("queue_depth", {}))):
+        if not values:
+            continue
+        top = max(max(values.values()), 1)
+        lines.append(title)
+        for name, value in values.items():
+            extra = f"  drops {snapshot['drops'][name]}" if title == "queue" else ""
+            lines.append(f"  {name:<8} {'#' * int(width * value / top):<{width}} {value}{extra}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch live simulator runs.")
+    parser.add_argument("targets", nargs="+", help="unix:<path> or http://<host>:<port> of each run.")
+    parser.add_argument("--once", action="store_true", help="Print the latest snapshot of each run as JSON and exit.")
+    parser.add_argument("--refresh", type=float, default=0.5, help="Seconds between redraws.")
+    parser.add_argument("--stall-after", type=float, default=5.0, help="Seconds without a snapshot before a run is flagged STALLED.")
+    args = parser.parse_args()
+
+    if args.once:
+        for target in args.targets:
+            try:
+                sock = connect(target, "/")
+            except OSError as e:
+                print(f"Could not reach {target}: {e.strerror or e}", file=sys.stderr)
+                sys.exit(1)
+            try:
+                print(json.dumps(next(read_lines(sock, not target.startswith("unix:")), None)))
+            finally:
+                sock.close()
+        return
+
+    views = [RunView(target) for target in args.targets]
+    for view in views:
+        threading.Thread(target=view.follow, daemon=True).start()
+    try:
+        while True:
+            lines = render_table(views, args.stall_after)
+            if len(views) == 1 and views[0].snapshot:
+                lines += [""] + render_detail(views[0].snapshot)
+            sys.stdout.write(CLEAR + "\n".join(lines) + "\n")
+            sys.stdout.flush()
+            if all(view.status not in ("CONNECTING", "RUNNING") for view in views):
+                return
+            time.sleep(args.refresh)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
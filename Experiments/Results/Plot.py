@@ -12,13 +12,24 @@ Usage:
 Notes:
  - Blank lines and lines starting with '#' are ignored.
  - Non-numeric lines are skipped with a warning printed to stderr.
+ - Files ending in .gz, or .zst with the zstandard package installed, are decompressed as they are read.
 """
 import argparse
 import sys
 
+def open_text(path):
+    if path.endswith('.gz'):
+        import gzip
+        return gzip.open(path, 'rt')
+    if path.endswith('.zst'):
+        import io
+        import zstandard
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True))
+    return open(path, 'r')
+
 def read_numbers(path):
     nums = []
-    with open(path, 'r') as f:
+    with open_text(path) as f:
         for lineno, line in enumerate(f, start=1):
             s = line.strip()
             if not s or s.startswith('#'):
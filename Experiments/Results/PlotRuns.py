@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+PlotRuns.py
+
+Plots run files written by Objects/ResultStore.py (one .npz per run).
+
+Usage:
+  python Results/PlotRuns.py run.npz -o cwnd.png                        # cwnd of every host
+  python Results/PlotRuns.py runs/*/run.npz --metric cwnd rtt --hosts h1 h4 -o overlay.png
+  python Results/PlotRuns.py runs/*/run.npz --sweep -o sweep.png        # one summary point per run
+  python Results/PlotRuns.py run.npz --max-points 2000 --show
+
+Notes:
+ - Every run is loaded once, all figures are built from the loaded columns.
+ - Series longer than --max-points are reduced with min/max decimation so peaks stay visible.
+ - Directories are accepted and resolved to <dir>/run.npz.
+"""
+import argparse
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Objects.ResultStore import COLUMNS, load_run
+
+METRICS = [name for name, _ in COLUMNS if name not in ("tick", "host")]
+
+
+def minmax_decimate(x: np.ndarray, y: np.ndarray, max_points: int) -> tuple[np.ndarray, np.ndarray]:
+    """Reduces a series to about max_points by keeping the min and max of each bucket.
+
+    Args:
+        x (np.ndarray): The x values, sorted
+        y (np.ndarray): The y values
+        max_points (int): The number of points to keep
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The decimated x and y values
+    """
+    n = len(y)
+    buckets = max(max_points // 2, 1)
+    if n <= max_points or n < 2 * buckets:
+        return x, y
+    per_bucket = n // buckets
+    usable = per_bucket * buckets
+    yb = y[:usable].reshape(buckets, per_bucket)
+    offsets = np.arange(buckets) * per_bucket
+    lo = offsets + np.nanargmin(np.nan_to_num(yb, nan=np.inf), axis=1)
+    hi = offsets + np.nanargmax(np.nan_to_num(yb, nan=-np.inf), axis=1)
+    idx = np.sort(np.concatenate([lo, hi, np.arange(usable, n)]))
+    return x[idx], y[idx]
+
+
+def resolve_paths(paths: list[str]) -> list[str]:
+    """Turns run directories into their run.npz files.
+
+    Args:
+        paths (list[str]): The paths given on the command line
+
+    Returns:
+        list[str]: The run files
+    """
+    return [os.path.join(p, "run.npz") if os.path.isdir(p) else p for p in paths]
+
+
+def run_label(path: str, run_count: int) -> str:
+    """Gets a short label for a run.
+
+    Args:
+        path (str): The run file
+        run_count (int): The number of runs plotted
+
+    Returns:
+        str: The label, empty when only one run is plotted
+    """
+    if run_count == 1:
+        return ""
+    if os.path.basename(path) == "run.npz":
+        return os.path.basename(os.path.dirname(os.path.abspath(path)))
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def plot_series(plt, runs: list, metrics: list[str], hosts: list[str], max_points: int):
+    """Overlays every selected host of every run, one subplot per metric.
+
+    Args:
+        plt (module): matplotlib.pyplot
+        runs (list): (path, RunResult) pairs
+        metrics (list[str]): The metrics to plot
+        hosts (list[str]): The hosts to plot, empty for all
+        max_points (int): The max points per series
+    """
+    _, axes = plt.subplots(len(metrics), 1, sharex=True, squeeze=False, figsize=(10, 3 * len(metrics)))
+    for path, run in runs:
+        label = run_label(path, len(runs))
+        ticks, host_col = run["tick"], run["host"]
+        for metric, ax in zip(metrics, axes[:, 0]):
+            values = run[metric]
+            for i, host_id in enumerate(run.host_ids):
+                if hosts and host_id not in hosts:
+                    continue
+                mask = host_col == i
+                x, y = minmax_decimate(ticks[mask], values[mask], max_points)
+                ax.plot(x, y, linewidth=0.8, label=f"{label} {host_id}".strip())
+    for metric, ax in zip(metrics, axes[:, 0]):
+        ax.set_ylabel(metric)
+        ax.grid(True)
+    axes[0, 0].legend(fontsize="small", ncol=4)
+    axes[-1, 0].set_xlabel("Tick")
+
+
+def plot_sweep(plt, runs: list, metrics: list[str], hosts: list[str]):
+    """Builds one comparison figure with the mean and 5-95% range of each metric per run.
+
+    Args:
+        plt (module): matplotlib.pyplot
+        runs (list): (path, RunResult) pairs
+        metrics (list[str]): The metrics to compare
+        hosts (list[str]): The hosts to include, empty for all
+    """
+    labels = [run_label(path, len(runs)) or os.path.basename(path) for path, _ in runs]
+    _, axes = plt.subplots(len(metrics), 1, sharex=True, squeeze=False, figsize=(max(6, len(runs) * 0.4), 3 * len(metrics)))
+    x = np.arange(len(runs))
+    for metric, ax in zip(metrics, axes[:, 0]):
+        stats = np.full((len(runs), 3), np.nan)
+        for r, (_, run) in enumerate(runs):
+            values = run[metric]
+            if hosts:
+                keep = [i for i, h in enumerate(run.host_ids) if h in hosts]
+                values = values[np.isin(run["host"], keep)]
+            values = values[np.isfinite(values)]
+            if len(values):
+                stats[r] = [values.mean(), *np.percentile(values, [5, 95])]
+        ax.errorbar(x, stats[:, 0], yerr=[stats[:, 0] - stats[:, 1], stats[:, 2] - stats[:, 0]], fmt="o", capsize=3)
+        ax.set_ylabel(metric)
+        ax.grid(True)
+    axes[-1, 0].set_xticks(x)
+    axes[-1, 0].set_xticklabels(labels, rotation=90, fontsize="small")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plot run files written by ResultStore.")
+    parser.add_argument("runs", nargs="+", help="Run .npz files or run directories.")
+    parser.add_argument("--metric", nargs="+", default=["cwnd"], choices=METRICS, help="Metrics to plot, one subplot each.")
+    parser.add_argument("--hosts", nargs="*", default=[], help="Only plot these host ids.")
+    parser.add_argument("--max-points", type=int, default=4000, help="Max points per series after min/max decimation.")
+    parser.add_argument("--sweep", action="store_true", help="Compare runs with one summary point each instead of time series.")
+    parser.add_argument("--title", default=None, help="Figure title.")
+    parser.add_argument("-o", "--output", help="Path to save the figure (e.g. plot.png).")
+    parser.add_argument("--show", action="store_true", help="Show the figure interactively.")
+    args = parser.parse_args()
+
+    paths = resolve_paths(args.runs)
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        print(f"Run files not found: {', '.join(missing)}", file=sys.stderr)
+        sys.exit(2)
+    runs = [(p, load_run(p)) for p in paths]
+
+    import matplotlib
+    if not args.show:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    if args.sweep:
+        plot_sweep(plt, runs, args.metric, args.hosts)
+    else:
+        plot_series(plt, runs, args.metric, args.hosts, args.max_points)
+    if args.title:
+        plt.suptitle(args.title)
+    plt.tight_layout()
+
+    if args.output:
+        plt.savefig(args.output, bbox_inches='tight')
+        print(f"Saved plot to {args.output}")
+
+    if args.show:
+        plt.show()
+
+if __name__ == "__main__":
+    main()
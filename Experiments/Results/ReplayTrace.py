@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+ReplayTrace.py
+
+Rebuilds per-link, per-router-port and per-flow metrics from a packet trace written by main.py --trace.
+
+Usage:
+  python Results/ReplayTrace.py runs/aqm/trace.bin                       # tables on stdout
+  python Results/ReplayTrace.py runs/aqm/trace.bin --from 10000 --to 20000
+  python Results/ReplayTrace.py runs/aqm/trace.bin --json metrics.json
+  python Results/ReplayTrace.py runs/aqm/trace.bin --dump 20             # first 20 records, decoded
+
+Notes:
+ - The simulator is not run, every metric comes from the trace records.
+ - Links are directional, a -> b counts packets sent from a toward b.
+ - Ticks are the network's, 1 ms unless the run's config set a finer time_unit; delays are in ticks.
+"""
+import argparse
+import json
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Enums.TraceEvent import TraceEvent
+from Objects.PacketTrace import load_trace, FLAG_ACK, FLAG_CE, FLAG_RETRANSMIT, FLAG_UDP, NO_VALUE
+from Objects.TimeBase import TimeBase
+
+
+def delay_stats(values: np.ndarray) -> dict:
+    """Summarizes delays.
+
+    Args:
+        values (np.ndarray): The delays in ticks
+
+    Returns:
+        dict: The count, mean, p50, p99 and max, None values without samples
+    """
+    if len(values) == 0:
+        return {"count": 0, "mean": None, "p50": None, "p99": None, "max": None}
+    p50, p99 = np.percentile(values, [50, 99])
+    return {"count": int(len(values)), "mean": float(values.mean()), "p50": float(p50), "p99": float(p99), "max": float(values.max())}
+
+
+def group_rows(a: np.ndarray, b: np.ndarray) -> list[tuple[int, int, np.ndarray]]:
+    """Groups record indices by a pair of device columns.
+
+    Args:
+        a (np.ndarray): The first device column
+        b (np.ndarray): The second device column
+
+    Returns:
+        list[tuple[int, int, np.ndarray]]: (a, b, indices) for each distinct pair
+    """
+    if len(a) == 0:
+        return []
+    keys = a.astype(np.int64) << 16 | b.astype(np.int64)
+    order = np.argsort(keys, kind="stable")
+    unique, starts = np.unique(keys[order], return_index=True)
+    ends = np.append(starts[1:], len(order))
+    return [(int(k >> 16), int(k & 0xFFFF), order[s:e]) for k, s, e in zip(unique, starts, ends)]
+
+
+def link_metrics(records: np.ndarray, devices: list[str], seconds: float) -> list[dict]:
+    """Computes what each directional link carried and lost.
+
+    Args:
+        records (np.ndarray): The trace records
+        devices (list[str]): The device ids of the trace
+        seconds (float): The length of the window in seconds
+
+    Returns:
+        list[dict]: One entry per link
+    """
+    sent = records[np.isin(records["event"], [TraceEvent.SEND, TraceEvent.DEQUEUE])]
+    drops = records[records["event"] == TraceEvent.DROP]
+    drop_counts = {(a, b): len(idx) for a, b, idx in group_rows(drops["node"], drops["peer"])}
+    out = []
+    for a, b, idx in group_rows(sent["node"], sent["peer"]):
+        rows = sent[idx]
+        data = (rows["flags"] & FLAG_ACK) == 0
+        out.append({
+            "link": f"{devices[a]}->{devices[b]}",
+            "packets": int(len(rows)),
+            "data_packets": int(data.sum()),
+            "bytes": int(rows["size"].sum()),
+            "bps": float(rows["size"].sum() * 8 / seconds),
+            "drops": int(drop_counts.get((a, b), 0)),
+        })
+    return out
+
+
+def port_metrics(records: np.ndarray, devices: list[str]) -> list[dict]:
+    """Computes the queueing of each router port.
+
+    Args:
+        records (np.ndarray): The trace records
+        devices (list[str]): The device ids of the trace
+
+    Returns:
+        list[dict]: One entry per router and next hop
+    """
+    enqueued = records[records["event"] == TraceEvent.ENQUEUE]
+    dequeued = records[records["event"] == TraceEvent.DEQUEUE]
+    max_depth = {(a, b): int(enqueued["value"][idx].max()) for a, b, idx in group_rows(enqueued["node"], enqueued["peer"])}
+    out = []
+    for a, b, idx in group_rows(dequeued["node"], dequeued["peer"]):
+        entry = {"port": f"{devices[a]}->{devices[b]}", "max_depth": max_depth.get((a, b))}
+        entry["queue_delay"] = delay_stats(dequeued["value"][idx].astype(np.float64))
+        out.append(entry)
+    return out
+
+
+def flow_metrics(records: np.ndarray, devices: list[str], seconds: float) -> list[dict]:
+    """Computes delivery, loss and RTT of each (source, destination, protocol) flow.
+
+    Args:
+        records (np.ndarray): The trace records
+        devices (list[str]): The device ids of the trace
+        seconds (float): The length of the window in seconds
+
+    Returns:
+        list[dict]: One entry per flow
+    """
+    data = records[(records["flags"] & FLAG_ACK) == 0]
+    delivered = data[data["event"] == TraceEvent.DELIVER]
+    sent = data[data["event"] == TraceEvent.SEND]
+    drops = data[data["event"] == TraceEvent.DROP]
+    acks = records[records["event"] == TraceEvent.ACK]
+
+    by_flow = {}
+    for name, rows in (("delivered", delivered), ("sent", sent), ("drops", drops), ("acks", acks)):
+        for protocol in ("tcp", "udp"):
+            is_udp = (rows["flags"] & FLAG_UDP) != 0
+            subset = rows[is_udp] if protocol == "udp" else rows[~is_udp]
+            for a, b, idx in group_rows(subset["source"], subset["dest"]):
+                by_flow.setdefault((a, b, protocol), {})[name] = subset[idx]
+
+    empty = records[:0]
+    out = []
+    for (a, b, protocol), rows in sorted(by_flow.items()):
+        got = rows.get("delivered", empty)
+        unique = np.unique(got["seq"])
+        goodput_bytes = int(got["size"][np.unique(got["seq"], return_index=True)[1]].sum()) if len(got) else 0
+        rtts = rows.get("acks", empty)["value"]
+        out.append({
+            "source": devices[a] if a < len(devices) else None,
+            "dest": devices[b] if b < len(devices) else None,
+            "protocol": protocol,
+            "sent": int(len(rows.get("sent", empty))),
+            "retransmits": int(((rows.get("sent", empty)["flags"] & FLAG_RETRANSMIT) != 0).sum()),
+            "drops": int(len(rows.get("drops", empty))),
+            "packets_delivered": int(len(got)),
+            "duplicate_packets": int(len(got) - len(unique)),
+            "ce_marked": int(((got["flags"] & FLAG_CE) != 0).sum()),
+            "throughput_bps": float(got["size"].sum() * 8 / seconds),
+            "goodput_bps": float(goodput_bytes * 8 / seconds),
+            "rtt": delay_stats(rtts[rtts != NO_VALUE].astype(np.float64)),
+        })
+    return out
+
+
+def replay(path: str, start: int = None, end: int = None) -> dict:
+    """Rebuilds the metrics of a run from its trace.
+
+    Args:
+        path (str): The trace file
+        start (int, optional): First tick to include. Defaults to the first record.
+        end (int, optional): Last tick to include. Defaults to the last record.
+
+    Returns:
+        dict: Run settings, event counts and link, port and flow metrics
+    """
+    devices, meta, records = load_trace(path)
+    if start is not None:
+        records = records[records["tick"] >= start]
+    if end is not None:
+        records = records[records["tick"] <= end]
+    first = int(records["tick"].min()) if len(records) else 0
+    last = int(records["tick"].max()) if len(records) else 0
+    seconds = max(last - first + 1, 1) / TimeBase(meta.get("time_unit", "ms")).ticks_per_second
+    counts = np.bincount(records["event"], minlength=len(TraceEvent))
+    return {
+        "meta": meta,
+        "records": int(len(records)),
+        "ticks": [first, last],
+        "events": {event.name.lower(): int(counts[event]) for event in TraceEvent},
+        "links": link_metrics(records, devices, seconds),
+        "ports": port_metrics(records, devices),
+        "flows": flow_metrics(records, devices, seconds),
+    }
+
+
+def print_tables(result: dict):
+    """Prints the metrics as plain text tables.
+
+    Args:
+        result (dict): The output of replay
+    """
+    print(f"{result['records']} records, ticks {result['ticks'][0]}-{result['ticks'][1]}, " + ", ".join(f"{k} {v}" for k, v in result["events"].items()))
+    print(f"\n{'link':<16} {'packets':>8} {'data':>8} {'bytes':>9} {'bps':>10} {'drops':>6}")
+    for l in result["links"]:
+        print(f"{l['link']:<16} {l['packets']:>8} {l['data_packets']:>8} {l['bytes']:>9} {l['bps']:>10.1f} {l['drops']:>6}")
+    print(f"\n{'port':<16} {'max_q':>6} {'delay_mean':>10} {'p50':>6} {'p99':>6} {'max':>6}")
+    for p in result["ports"]:
+        d = p["queue_delay"]
+        print(f"{p['port']:<16} {p['max_depth'] or 0:>6} {d['mean'] or 0:>10.2f} {d['p50'] or 0:>6.0f} {d['p99'] or 0:>6.0f} {d['max'] or 0:>6.0f}")
+    print(f"\n{'flow':<12} {'proto':<5} {'sent':>6} {'retx':>5} {'drops':>6} {'deliv':>6} {'dup':>5} {'ce':>5} {'goodput':>9} {'rtt_mean':>8} {'rtt_p99':>8}")
+    for f in result["flows"]:
+        r = f["rtt"]
+        print(f"{str(f['source']) + '>' + str(f['dest']):<12} {f['protocol']:<5} {f['sent']:>6} {f['retransmits']:>5} {f['drops']:>6} {f['packets_delivered']:>6} "
+              f"{f['duplicate_packets']:>5} {f['ce_marked']:>5} {f['goodput_bps']:>9.1f} {r['mean'] or 0:>8.1f} {r['p99'] or 0:>8.1f}")
+
+
+def dump(path: str, limit: int):
+    """Prints the first records of a trace, decoded.
+
+    Args:
+        path (str): The trace file
+        limit (int): The number of records to print
+    """
+    devices, _, records = load_trace(path)
+    name = lambda i: devices[i] if i < len(devices) else "-"
+    for r in records[:limit]:
+        value = "-" if r["value"] == NO_VALUE else int(r["value"])
+        print(f"{r['tick']:>8} {TraceEvent(r['event']).name:<8} {name(r['node']):>5} -> {name(r['peer']):<5} {name(r['source'])}>{name(r['dest'])} "
+              f"seq {r['seq']} size {r['size']} flags {r['flags']:#04x} value {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild run metrics from a packet trace.")
+    parser.add_argument("trace", help="Trace file written by main.py --trace.")
+    parser.add_argument("--from", dest="start", type=int, default=None, help="First tick to include.")
+    parser.add_argument("--to", dest="end", type=int, default=None, help="Last tick to include.")
+    parser.add_argument("--json", default=None, help="Write the metrics to this JSON file instead of printing tables.")
+    parser.add_argument("--dump", type=int, default=None, metavar="N", help="Print the first N records and exit.")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.trace):
+        print(f"Trace file not found: {args.trace}", file=sys.stderr)
+        sys.exit(2)
+    if args.dump is not None:
+        dump(args.trace, args.dump)
+        return
+    result = replay(args.trace, args.start, args.end)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=4)
+        print(f"Saved metrics to {args.json}")
+    else:
+        print_tables(result)
+
+if __name__ == "__main__":
+    main()
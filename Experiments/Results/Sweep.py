@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Sweep.py
+
+Runs every combination of configs, congestion controls and seeds, reusing the runs already in the result cache.
+
+Usage:
+  python Results/Sweep.py Configs/Tree.json Configs/AQM.json --cc reno cubic bbr --seeds 1 2 3 -t 20000 -o runs/sweep
+  python Results/Sweep.py Configs/Bus.json --seeds 1 2 3 4 --jobs 4 --plot sweep.png --metric cwnd rtt
+  python Results/Sweep.py Configs/Bus.json --seeds 1 --no-cache        # always simulate
+
+Notes:
+ - Run it from the Experiments directory, config paths are resolved like main.py's.
+ - Each run's files go to <output-dir>/<config>-<cc>-s<seed>. A run identical to one made before, by a sweep or by
+   main.py --cache, is copied from the cache instead of simulated; see main.py for what makes runs identical.
+ - The per packet prints of the simulator are discarded, only the summary table is printed.
+ - --plot draws the same figure as Results/PlotRuns.py --sweep over the runs, in sweep order.
+"""
+import argparse
+import contextlib
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from Objects.RunCache import DEFAULT_MAX_BYTES
+
+
+def run_name(config_path: str, congestion_control: Optional[str], seed: int) -> str:
+    """Gets the directory name of one run of the sweep.
+
+    Args:
+        config_path (str): The JSON network config
+        congestion_control (Optional[str]): The algorithm every host uses, None for the config's
+        seed (int): The seed of the run
+
+    Returns:
+        str: <config>-<cc>-s<seed>
+    """
+    config = os.path.splitext(os.path.basename(config_path))[0]
+    return f"{config}-{congestion_control or 'config'}-s{seed}"
+
+
+def run_one(spec: dict) -> tuple[str, bool, float]:
+    """Makes one run of the sweep, in a worker process.
+
+    Args:
+        spec (dict): The run's config, cc, seed, ticks and output dir, and the cache settings
+
+    Returns:
+        tuple[str, bool, float]: The run's output dir, whether it came from the cache and the seconds it took
+    """
+    import main
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if spec["cache_dir"] is None:
+            main.run(spec["config"], spec["ticks"], spec["seed"], spec["output_dir"], spec["cc"], quiet=True, **spec["options"])
+            hit = False
+        else:
+            from Objects.RunCache import RunCache
+            cache = RunCache(spec["cache_dir"] or None, spec["cache_bytes"])
+            hit = main.run_cached(cache, spec["config"], spec["ticks"], spec["seed"], spec["output_dir"], spec["cc"], quiet=True, **spec["options"])
+    return spec["output_dir"], hit, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a grid of simulations through the result cache.")
+    parser.add_argument("configs", nargs="+", help="JSON network configs.")
+    parser.add_argument("--cc", nargs="+", default=[None], help="Congestion controls every host uses, one run each. Defaults to each config's own.")
+    parser.add_argument("--seeds", nargs="+", type=int, default=[1], help="Seeds, one run each.")
+    parser.add_argument("-t", "--ticks", type=int, default=20000, help="Number of ms to simulate per run.")
+    parser.add_argument("-o", "--output-dir", default="sweep", help="Directory holding one directory per run.")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Runs simulated at once.")
+    parser.add_argument("--until-steady", action="store_true", help="Stop each run once its throughput reaches steady state, --ticks is the limit.")
+    parser.add_argument("--compress", default="none", help="none, gzip or zstd for the Throughput and cwnd files.")
+    parser.add_argument("--cache", default="", metavar="DIR", help="The result cache. Defaults to $EXPERIMENTS_CACHE or ~/.cache/experiments/runs.")
+    parser.add_argument("--cache-size-mb", type=int, default=DEFAULT_MAX_BYTES >> 20, help="Least recently used runs are evicted to keep the cache under this size.")
+    parser.add_argument("--no-cache", action="store_true", help="Simulate every run and leave the cache alone.")
+    parser.add_argument("--plot", default=None, metavar="PNG", help="Save a comparison of the runs to this file.")
+    parser.add_argument("--metric", nargs="+", default=["cwnd"], help="Metrics to compare with --plot.")
+    parser.add_argument("--hosts", nargs="*", default=[], help="Only compare these host ids with --plot.")
+    args = parser.parse_args()
+
+    specs = [{"config": config, "cc": cc, "seed": seed, "ticks": args.ticks,
+              "output_dir": os.path.join(args.output_dir, run_name(config, cc, seed)),
+              "options": {"until_steady": args.until_steady, "compression": args.compress},
+              "cache_dir": None if args.no_cache else args.cache, "cache_bytes": args.cache_size_mb << 20}
+             for config, cc, seed in itertools.product(args.configs, args.cc, args.seeds)]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max(1, min(args.jobs, len(specs)))) as pool:
+        done = list(pool.map(run_one, specs))
+    hits = sum(hit for _, hit, _ in done)
+    for output_dir, hit, seconds in done:
+        print(f"{output_dir:<48} {'cached' if hit else 'ran':>7} {seconds:>8.2f} s")
+    print(f"{len(done)} runs, {hits} from the cache, {time.perf_counter() - start:.2f} s")
+
+    if args.plot:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        from Objects.ResultStore import load_run
+        from PlotRuns import plot_sweep
+        runs = [(os.path.join(output_dir, "run.npz"), load_run(os.path.join(output_dir, "run.npz"))) for output_dir, _, _ in done]
+        plot_sweep(plt, runs, args.metric, args.hosts)
+        plt.tight_layout()
+        plt.savefig(args.plot, bbox_inches='tight')
+        print(f"Saved plot to {args.plot}")
+
+if __name__ == "__main__":
+    main()
@@ -1,84 +1,444 @@
+#!/usr/bin/env python3
+"""
+main.py
+
+Runs one simulation of a JSON network config.
+
+Usage:
+  python main.py                                             # Configs/Bus.json for 90000 ticks
+  python main.py Configs/AQM.json --ticks 20000 --seed 1 -o runs/aqm
+  python main.py Configs/Bus.json --cc bbr --realtime        # one tick per ms of wall time
+  python main.py Configs/Mixed.json --cc cubic                # any registered algorithm, --list-cc shows them
+  python main.py Configs/Tree.json --until-steady --precision 0.02   # stop once every flow's goodput is known to 2%
+  python main.py Configs/Tree.json --telemetry-port 8765     # watch with Results/Dashboard.py http://127.0.0.1:8765
+  python main.py Configs/AQM.json --trace -o runs/aqm        # packet trace for Results/ReplayTrace.py runs/aqm/trace.bin
+  python main.py Configs/Fluid.json --fluid --fluid-dt 5      # flow level approximation, seconds for thousands of flows
+  python main.py Configs/Fluid.json --handoff r1:r2           # packets at r1->r2, the fluid flows as its cross traffic
+  python main.py Configs/ECMP.json --trace -o runs/ecmp       # ECMP hosts, per spine load with Results/ReplayTrace.py
+  python main.py Configs/Bus.json -t 100000000 --bounded-memory --memory-report -q   # constant memory, memory.json per subsystem
+  python main.py Configs/Tree.json --compress gzip -o runs/tree    # Throughput.gz and h1.gz ..., Results/Plot.py reads them as is
+  python main.py Configs/Datacenter.json -t 5000 -q               # 1 us ticks, us racks and a 20 ms WAN link in one network
+  python main.py Configs/Tree.json -t 20000 -s 1 --cache -o runs/tree   # simulated once, copied from the cache after
+  python main.py Configs/Framing.json -t 20000 -q                 # Ethernet sized packets, 4000 byte messages over a 1500 byte MTU
+
+Notes:
+ - Importing this module has no side effects, the simulator is only imported by run().
+ - The run files (run.npz, flow_stats.json, Throughput and one cwnd file per sending host) go to --output-dir.
+   Throughput and the cwnd files are written in large chunks from a background thread, and are complete even when a run
+   fails or is terminated.
+ - Configs may add algorithms with "congestion_control_plugins": {"name": "module:Class"} and set constructor arguments
+   per algorithm with "congestion_control_params": {"vegas": {"alpha": 2, "beta": 4}}, or per host with the same key.
+   Installed packages can add them through the "experiments.congestion_control" entry point group.
+ - "time_unit": "us" or "ns" in a config makes ticks finer; delays stay in ms and may be fractions, e.g. "link_delay_ms": 0.005.
+   Ticks where nothing happens are skipped, so a finer unit only costs for the events it resolves.
+   --ticks and the Tick column of the run files always count ms.
+ - "framing": {} in a config gives packets their wire sizes: IPv4, TCP or UDP headers, Ethernet overhead and padding.
+   Sending hosts then write message_bytes messages (1460 by default) that are segmented at the MTU, or coalesced while
+   data is in flight when aggregate is set; throughput counts wire bytes and goodput the payload. See Objects/Framing.py
+   for the settings. Without it a data packet is 1 byte and an ACK 0, so link and router sizes stay in packets.
+ - --cache keys a run by its config (formatting and description aside), the simulator's source, the seed and every option
+   that changes its files. Unseeded runs and ones with --realtime, telemetry, --trace or --memory-report always simulate.
+   Code a config loads from outside the simulator, such as plugins, is not part of the key.
+"""
+import argparse
 import json
+import math
+import os
+import random
+import signal
+import sys
 import time
-from Objects.Network import Network
+from typing import Optional, TYPE_CHECKING
+from Enums.CongestionControlType import CongestionControlType
+from Enums.Compression import Compression
+
+if TYPE_CHECKING:
+    from Objects.Network import Network
+    from Objects.FluidModel import FluidModel
+    from Objects.RunCache import RunCache
+
+DEFAULT_CONFIG = "Configs/Bus.json"
+DEFAULT_TICKS = 90000
+RESULTS_FILE = "run.npz"
+FLOW_STATS_FILE = "flow_stats.json"
+THROUGHPUT_FILE = "Throughput"
+TRACE_FILE = "trace.bin"
+FLUID_FILE = "fluid.npz"
+MEMORY_FILE = "memory.json"
+MEMORY_SAMPLE_TICKS = 10000
+STEADY_STATE_FILE = "steady_state.json"
+STEADY_CHECK_TICKS = 1000
+CACHE_IGNORED = ("config_path", "output_dir", "quiet", "telemetry_every")  # run arguments that never change the run files
+CACHE_BYPASS = ("realtime", "telemetry_port", "telemetry_socket", "trace", "memory_report")  # run arguments that always run
+SAMPLE_EVERY_TICKS = 10
+
+def read_topology(data: dict) -> tuple[list[dict], list[tuple]]:
+    """Splits the JSON config into device and link specs for Network.build.
+    Devices appear in every link they are on, only the first entry of each is kept.
+
+    Args:
+        data (dict): The JSON config
+
+    Returns:
+        tuple[list[dict], list[tuple]]: The device config dicts and the link tuples in LINK_FIELDS order
+    """
+    devices = {}
+    links = []
+    for link in data.get("links", []):
+        d1 = link["device_one"]
+        d2 = link["device_two"]
+        devices.setdefault(d1["id"], d1)
+        devices.setdefault(d2["id"], d2)
+        links.append((link["link_delay_ms"], link["bandwidth_in_bytes"], link["loss_rate"], d1["id"], d2["id"]))
+    return list(devices.values()), links
+
+def load_network(config_path: str, seed: Optional[int] = None, output_dir: str = ".", congestion_control: Optional[str] = None) -> tuple['Network', dict]:
+    """Builds the network of a config.
+
+    Args:
+        config_path (str): The JSON network config
+        seed (Optional[int], optional): Seed for link loss, the RL controller and the numpy neural backend. Defaults to None.
+        output_dir (str, optional): The directory the run files are written to. Defaults to ".".
+        congestion_control (Optional[str], optional): Algorithm used by every host instead of the config's. Defaults to None.
+
+    Returns:
+        tuple[Network, dict]: The network and the JSON config
+    """
+    from Objects.Network import Network
+
+    with open(config_path, "r") as j:
+        data = json.load(j)
+    if seed is not None:
+        random.seed(seed)
+    os.makedirs(output_dir, exist_ok=True)
+
+    devices, links = read_topology(data)
+    if congestion_control is not None:
+        devices = [dict(d, congestion_control=congestion_control) if d.get("type") == "host" else d for d in devices]
+    neural_policy = dict(data.get("neural_policy") or {})
+    if seed is not None and neural_policy.get("backend", "numpy") == "numpy":
+        neural_policy.setdefault("seed", seed)
+
+    from Objects.CongestionControlRegistry import register_congestion_control
+    for name, target in (data.get("congestion_control_plugins") or {}).items():
+        register_congestion_control(name, target)
+
+    framing = None
+    if data.get("framing") is not None:
+        from Objects.Framing import Framing
+        framing = Framing(**data["framing"])
+    network = Network(neural_policy, output_dir, data.get("ecmp_weighting", "equal"), data.get("congestion_control_params"), data.get("time_unit", "ms"),
+                      framing)
+    network.build(devices, links)
+    if framing is not None:
+        frame = framing.wire_bytes(framing.mtu)
+        small = [f"{l.router_in.id}-{l.router_out.id}" for l in network.links if l.bandwidth_in_bytes < frame]
+        if small:
+            print(f"Warning: links {', '.join(small)} hold less than one {frame} byte frame, full sized packets are dropped on them", file=sys.stderr)
+    return network, data
+
+def solve_fluid(network: 'Network', data: dict, max_ticks: int, dt: float = 1.0) -> 'FluidModel':
+    """Runs the fluid model of a network over the hosts' flows and the config's fluid_flows.
 
-NETWORK_CONFIG = "Configs/Bus.json"
+    Args:
+        network (Network): The built network
+        data (dict): The JSON config
+        max_ticks (int): The number of ticks to run
+        dt (float, optional): The fluid step in ticks. Defaults to 1.0.
+
+    Returns:
+        FluidModel: The model after the last step
+    """
+    from Objects.FluidModel import FluidModel
+    model = FluidModel(network, dt)
+    model.add_host_flows()
+    model.add_flow_specs(data.get("fluid_flows", []))
+    return model.run(max_ticks)
+
+def run_fluid(config_path: str = DEFAULT_CONFIG, max_ticks: int = DEFAULT_TICKS, output_dir: str = ".", congestion_control: Optional[str] = None,
+              dt: float = 1.0, quiet: bool = False) -> 'FluidModel':
+    """Approximates a run of a config with the fluid model, no packets are simulated.
+
+    Args:
+        config_path (str, optional): The JSON network config. Defaults to DEFAULT_CONFIG.
+        max_ticks (int, optional): The number of ticks to run. Defaults to DEFAULT_TICKS.
+        output_dir (str, optional): The directory fluid.npz is written to. Defaults to ".".
+        congestion_control (Optional[str], optional): Algorithm used by every host instead of the config's. Defaults to None.
+        dt (float, optional): The fluid step in ticks. Defaults to 1.0.
+        quiet (bool, optional): Do not print the flow and port tables. Defaults to False.
+
+    Returns:
+        FluidModel: The model after the last step
+    """
+    network, data = load_network(config_path, None, output_dir, congestion_control)
+    start = time.monotonic()
+    model = solve_fluid(network, data, max_ticks, dt)
+    model.save(os.path.join(output_dir, FLUID_FILE))
+    if not quiet:
+        print(f"{int(model.weights.sum())} flows, {len(model.weights)} rows, {max_ticks} ticks in {time.monotonic() - start:.2f} s")
+        print(f"\n{'flow':<14} {'dynamics':<9} {'count':>6} {'rate_pps':>10} {'goodput':>10} {'rtt':>8}")
+        for f in model.flow_stats():
+            print(f"{f['source'] + '>' + f['dest']:<14} {f['dynamics']:<9} {f['count']:>6} {f['rate_pps']:>10.1f} {f['goodput_pps']:>10.1f} {f['rtt_mean']:>8.1f}")
+        print(f"\n{'port':<14} {'util':>6} {'queue':>7} {'drop_pps':>9}")
+        for p in model.port_stats(min_utilization=0.01):
+            print(f"{p['port']:<14} {p['utilization']:>6.2f} {p['queue_mean']:>7.1f} {p['drop_pps']:>9.1f}")
+    return model
 
-def add_router_to_network(network: Network, device_data: dict):
-    """Adds a router to the Network object.
+def run(config_path: str = DEFAULT_CONFIG, max_ticks: int = DEFAULT_TICKS, seed: Optional[int] = None, output_dir: str = ".",
+        congestion_control: Optional[str] = None, realtime: bool = False, quiet: bool = False,
+        telemetry_port: Optional[int] = None, telemetry_socket: Optional[str] = None, telemetry_every: int = 100,
+        trace: Optional[str] = None, handoff: Optional[list[str]] = None, fluid_dt: float = 1.0,
+        bounded_memory: bool = False, memory_report: bool = False, until_steady: bool = False, precision: float = 0.05,
+        confidence: float = 0.95, min_ticks: int = 10000, compression: str = "none") -> 'Network':
+    """Builds the network of a config and runs it.
 
     Args:
-        network (Network): The Network object to add to
-        device_data (dict): The device data of the router read from the JSON config
+        config_path (str, optional): The JSON network config. Defaults to DEFAULT_CONFIG.
+        max_ticks (int, optional): The number of ms to run, 1 ms ticks unless the config sets a finer time_unit. Defaults to DEFAULT_TICKS.
+        seed (Optional[int], optional): Seed for link loss, the RL controller and the numpy neural backend. Defaults to None.
+        output_dir (str, optional): The directory the run files are written to. Defaults to ".".
+        congestion_control (Optional[str], optional): Algorithm used by every host instead of the config's. Defaults to None.
+        realtime (bool, optional): Sleep for the simulated time like a live network. Defaults to False.
+        quiet (bool, optional): Do not print the throughput every 100 ticks. Defaults to False.
+        telemetry_port (Optional[int], optional): Serve live snapshots over HTTP on this port. Defaults to None.
+        telemetry_socket (Optional[str], optional): Stream live snapshots on this Unix socket. Defaults to None.
+        telemetry_every (int, optional): Ticks between telemetry snapshots. Defaults to 100.
+        trace (Optional[str], optional): Write a binary packet trace to this file, relative to output_dir. Defaults to None.
+        handoff (Optional[list[str]], optional): Router ports as router:next_hop, or auto for the most congested one, that carry
+            the fluid model's load of the config's fluid_flows as cross traffic. Defaults to None.
+        fluid_dt (float, optional): The fluid step in ticks when handing off. Defaults to 1.0.
+        bounded_memory (bool, optional): Cap the structures that grow with the run, limits from the config's memory_budget. Defaults to False.
+        memory_report (bool, optional): Measure memory per subsystem every MEMORY_SAMPLE_TICKS ticks into MEMORY_FILE. Defaults to False.
+        until_steady (bool, optional): Stop before max_ticks once the throughput of the network and of every flow reach steady state
+            and their means are known to the given precision, estimates go to STEADY_STATE_FILE. Defaults to False.
+        precision (float, optional): The largest half width of the confidence intervals relative to the means. Defaults to 0.05.
+        confidence (float, optional): The confidence level of the intervals. Defaults to 0.95.
+        min_ticks (int, optional): Never stop early before this tick. Defaults to 10000.
+        compression (str, optional): none, gzip or zstd for the Throughput and cwnd files, written from a background thread. Defaults to "none".
+
+    Returns:
+        Network: The network after the last tick
     """
-    network.add_router(device_data["queue_size"], device_data["processing_delay_ms"], device_data["id"])
+    from Objects.ResultStore import ResultStore
+
+    network, data = load_network(config_path, seed, output_dir, congestion_control)
+    meta = {"config": config_path, "max_ticks": max_ticks, "seed": seed, "congestion_control": congestion_control, "time_unit": network.time_base.unit.value}
+    if handoff:
+        model = solve_fluid(network, data, max_ticks, fluid_dt)
+        ports = [tuple(port.split(":", 1)) for port in handoff if port != "auto"]
+        if "auto" in handoff:
+            ports += model.bottlenecks()
+        for (router_id, next_hop), load in model.handoff(ports).items():
+            print(f"Handoff {router_id}->{next_hop}: {load:.1f} pps of fluid cross traffic", file=sys.stderr)
+        meta["handoff"] = [f"{a}:{b}" for a, b in ports]
+    budget = None
+    if bounded_memory:
+        from Objects.MemoryBudget import MemoryBudget
+        budget = MemoryBudget(**(data.get("memory_budget") or {}))
+        network.set_memory_budget(budget)
+        meta["bounded_memory"] = True
+    if trace is not None:
+        from Objects.PacketTrace import PacketTrace
+        network.tracer = PacketTrace(os.path.join(output_dir, trace), list(network.devices), meta)
 
-def add_host_to_network(network: Network, device_data: dict):
-    """Adds a host to the Network object.
+    # Set simulation start tick
+    network.simulation_start_tick = 0
+
+    # Main loop, tick_num counts ms for the run files while now counts the network's ticks
+    tick_num = 0
+    now = 0
+    clock = network.time_base
+    from Objects.AsyncWriter import AsyncWriter
+    writer = AsyncWriter(compression)
+    network.writer = writer
+    throughput_file = writer.open(os.path.join(output_dir, THROUGHPUT_FILE))
+    throughput_file.write("Tick,bps,throughput,packets_delivered\n")
+    host_ids = [d.id for d in network.devices.values() if d.device_type == "host"]
+    results = ResultStore(os.path.join(output_dir, RESULTS_FILE), host_ids, meta=meta, max_rows=budget.result_rows if budget is not None else None)
+    memory_samples = None
+    measure_memory = None
+    if memory_report:
+        from collections import deque
+        from Objects.MemoryBudget import memory_report as measure_memory
+        memory_samples = deque(maxlen=budget.report_samples if budget is not None else None)
+    telemetry = None
+    if telemetry_port is not None or telemetry_socket is not None:
+        from Objects.Telemetry import TelemetryServer
+        telemetry = TelemetryServer(telemetry_port, telemetry_socket, meta=meta)
+        print(f"Telemetry at {telemetry.start()}", file=sys.stderr)
+    detector = None
+    if until_steady:
+        from Objects.SteadyState import SteadyStateDetector
+        detector = SteadyStateDetector(precision=precision, confidence=confidence, min_ticks=min_ticks)
+    # Ticks with nothing to do are skipped, except the ones where something is sampled
+    observe_every = clock.ticks(math.gcd(SAMPLE_EVERY_TICKS, 100, telemetry_every if telemetry is not None else 0, detector.interval if detector is not None else 0))
+    end = clock.ticks(max_ticks)
+    try:
+        while now < end:
+            next_tick = min(network.next_event_tick(now), (now // observe_every + 1) * observe_every, end)
+            if realtime:
+                time.sleep((next_tick - now) / clock.ticks_per_second)
+            now = next_tick
+            network.process_tick(now)
+            if now % clock.ticks_per_ms:
+                continue
+            tick_num = now // clock.ticks_per_ms
+            if tick_num % SAMPLE_EVERY_TICKS == 0:
+                results.record_network(network, now)
+            if telemetry is not None and tick_num % telemetry_every == 0:
+                telemetry.publish(network, now)
+            if memory_samples is not None and tick_num % MEMORY_SAMPLE_TICKS == 0:
+                memory_samples.append(dict(tick=tick_num, **measure_memory(network, results)))
+
+            # Log average throughput every 100 ticks
+            if tick_num % 100 == 0:
+                avg_throughput = network.get_average_throughput(now)
+                current_throughput = network.get_current_throughput(now)
+                if not quiet:
+                    print(f"Tick {tick_num}: Average throughput = {avg_throughput:.2f} bps, Current throughput = {current_throughput:.2f} bps, Total packets delivered = {network.total_packets_delivered}")
+                throughput_file.write(f"{tick_num},{avg_throughput:.2f},{current_throughput:.2f},{network.total_packets_delivered}\n")
+
+            # Stop early once the estimates are precise enough
+            if detector is not None:
+                if tick_num % detector.interval == 0:
+                    detector.record(network, tick_num)
+                if tick_num % STEADY_CHECK_TICKS == 0 and detector.check(tick_num):
+                    print(f"Steady state at tick {tick_num}, stopping", file=sys.stderr)
+                    meta["steady_tick"] = tick_num
+                    break
+    finally:
+        # Also on a crash, so the files hold every tick that ran
+        writer.close()
+    if network.tracer is not None:
+        network.tracer.close()
+    if telemetry is not None:
+        telemetry.close(network, now)
+
+    results.save()
+    with open(os.path.join(output_dir, FLOW_STATS_FILE), "w") as flow_stats_file:
+        json.dump(network.analytics.summary(tick_num), flow_stats_file, indent=4)
+    if detector is not None:
+        if detector.steady_tick is None:
+            detector.check(tick_num)
+        with open(os.path.join(output_dir, STEADY_STATE_FILE), "w") as steady_file:
+            json.dump(detector.summary(), steady_file, indent=4)
+    if memory_samples is not None:
+        if not memory_samples or memory_samples[-1]["tick"] != tick_num:
+            memory_samples.append(dict(tick=tick_num, **measure_memory(network, results)))
+        with open(os.path.join(output_dir, MEMORY_FILE), "w") as memory_file:
+            json.dump({"bounded_memory": bounded_memory, "samples": list(memory_samples)}, memory_file, indent=4)
+        print_memory(memory_samples[0], memory_samples[-1])
+    return network
+
+def run_cached(cache: 'RunCache', config_path: str = DEFAULT_CONFIG, max_ticks: int = DEFAULT_TICKS, seed: Optional[int] = None,
+               output_dir: str = ".", congestion_control: Optional[str] = None, **options) -> bool:
+    """Runs a config like run, or copies the files of an identical earlier run from the cache.
+    Runs without a seed, and ones that watch or measure the live run, are not reproducible and always run.
 
     Args:
-        network (Network): The Network object to add to
-        device_data (dict): The device data of the host read from the JSON config
+        cache (RunCache): The cache to look in and fill
+        config_path (str, optional): The JSON network config. Defaults to DEFAULT_CONFIG.
+        max_ticks (int, optional): The number of ms to run. Defaults to DEFAULT_TICKS.
+        seed (Optional[int], optional): Seed of the run, None never uses the cache. Defaults to None.
+        output_dir (str, optional): The directory the run files are written or copied to. Defaults to ".".
+        congestion_control (Optional[str], optional): Algorithm used by every host instead of the config's. Defaults to None.
+        **options: Any other argument of run
+
+    Returns:
+        bool: True when the files came from the cache
     """
-    congestion_control = device_data.get("congestion_control", "reno")
-    routing_path = device_data.get("packet_path", [])
-    network.add_host(device_data["id"], routing_path, congestion_control)
+    import inspect
+    bound = inspect.signature(run).bind(config_path, max_ticks, seed, output_dir, congestion_control, **options)
+    bound.apply_defaults()
+    parameters = {k: v for k, v in bound.arguments.items() if k not in CACHE_IGNORED}
+    bypass = [parameters.pop(k) for k in CACHE_BYPASS]
+    if congestion_control is not None:
+        from Objects.CongestionControlRegistry import congestion_control_name
+        parameters["congestion_control"] = congestion_control_name(congestion_control)
+    if seed is None or any(v is not None and v is not False for v in bypass):
+        run(config_path, max_ticks, seed, output_dir, congestion_control, **options)
+        return False
+    key = cache.key(config_path, parameters)
+    if cache.get(key, output_dir):
+        return True
+    network = run(config_path, max_ticks, seed, output_dir, congestion_control, **options)
+    files = [RESULTS_FILE, FLOW_STATS_FILE, STEADY_STATE_FILE if parameters["until_steady"] else None]
+    if network.writer is not None:
+        files += [path for stream in network.writer.streams for path in stream.paths()]
+    files = [os.path.relpath(os.path.join(output_dir, f), output_dir) for f in files if f is not None]
+    cache.put(key, output_dir, files, inputs=dict(parameters, config=config_path))
+    return False
 
-def add_link_to_network(network: Network, link_data: dict):
-    """Adds a link to the Network.
+def print_memory(first: dict, last: dict):
+    """Prints the memory of each subsystem at the first and last report sample.
 
     Args:
-        network (Network): The Network object to add to
-        link_data (dict): The link data read from the JSON config
+        first (dict): The first sample of the run
+        last (dict): The last sample of the run
     """
-    network.add_link(link_data["link_delay_ms"], link_data["bandwidth_in_bytes"], link_data["loss_rate"], link_data["device_one"]["id"], link_data["device_two"]["id"])
-
-
-j = open(NETWORK_CONFIG, "r")
-
-data = json.load(j)
-network = Network()
-
-# Extract links from the new config structure
-links = data.get("links", [])
-
-for link in links:
-    d1 = link["device_one"]
-    d2 = link["device_two"]
-
-    if d1["type"] == "host":
-        add_host_to_network(network, d1)
-    else:
-        add_router_to_network(network, d1)
-
-    if d2["type"] == "host":
-        add_host_to_network(network, d2)
-    else:
-        add_router_to_network(network, d2)
-
-    add_link_to_network(network, link)
-
-
-# Set simulation start tick
-network.simulation_start_tick = 0
-
-# Main loop
-tick_num = 0
-max_ticks = 90000
-throughput_file = open("Throughput", 'w')
-throughput_file.write("Tick,bps,throughput,packets_delivered\n")
-while tick_num < max_ticks:
-    time.sleep(.001)
-    tick_num += 1
-    for d in network.devices.values():
-        d.process_tick(tick_num)
-    
-    for l in network.links:
-        l.process_tick(tick_num)
-    
-    # Log average throughput every 100 ticks
-    if tick_num % 100 == 0:
-        avg_throughput = network.get_average_throughput(tick_num)
-        current_throughput = network.get_current_throughput(tick_num)
-        print(f"Tick {tick_num}: Average throughput = {avg_throughput:.2f} bps, Current throughput = {current_throughput:.2f} bps, Total packets delivered = {network.total_packets_delivered}")
-        throughput_file.write(f"{tick_num},{avg_throughput:.2f},{current_throughput:.2f},{network.total_packets_delivered}\n")
+    mib = lambda b: f"{b / 2 ** 20:.2f}" if b is not None else "-"
+    print(f"{'memory MiB':<20} {'tick ' + str(first['tick']):>14} {'tick ' + str(last['tick']):>14}", file=sys.stderr)
+    for name in last["subsystems"]:
+        print(f"{name:<20} {mib(first['subsystems'][name]):>14} {mib(last['subsystems'][name]):>14}", file=sys.stderr)
+    print(f"{'tracked':<20} {mib(first['tracked_bytes']):>14} {mib(last['tracked_bytes']):>14}", file=sys.stderr)
+    print(f"{'rss':<20} {mib(first['rss_bytes']):>14} {mib(last['rss_bytes']):>14}", file=sys.stderr)
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Run the network simulator on a JSON config.")
+    parser.add_argument("config", nargs="?", default=DEFAULT_CONFIG, help=f"The JSON network config. Defaults to {DEFAULT_CONFIG}.")
+    parser.add_argument("-t", "--ticks", type=int, default=DEFAULT_TICKS, help="Number of ms to simulate, in 1 ms ticks unless the config sets a finer time_unit.")
+    parser.add_argument("-s", "--seed", type=int, default=None, help="Random seed for a reproducible run.")
+    parser.add_argument("-o", "--output-dir", default=".", help="Directory for the run files.")
+    parser.add_argument("--cc", default=None, help="Use this congestion control on every host: " + ", ".join(c.value for c in CongestionControlType)
+                        + " or a plugin, see --list-cc.")
+    parser.add_argument("--list-cc", action="store_true", help="Print the congestion controls hosts can use, plugins included, and exit.")
+    parser.add_argument("--realtime", action="store_true", help="Sleep for the simulated time, 1 ms per ms.")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Do not print the throughput every 100 ticks.")
+    telemetry = parser.add_mutually_exclusive_group()
+    telemetry.add_argument("--telemetry-port", type=int, default=None, help="Serve live snapshots over HTTP on this port, 0 picks a free one.")
+    telemetry.add_argument("--telemetry-socket", default=None, help="Stream live snapshots on this Unix socket.")
+    parser.add_argument("--telemetry-every", type=int, default=100, help="Ticks between telemetry snapshots.")
+    parser.add_argument("--trace", nargs="?", const=TRACE_FILE, default=None, help=f"Write a binary packet trace, {TRACE_FILE} in the output dir unless a file is given.")
+    fluid = parser.add_mutually_exclusive_group()
+    fluid.add_argument("--fluid", action="store_true", help=f"Run the fluid model instead of packets, saved to {FLUID_FILE} in the output dir.")
+    fluid.add_argument("--handoff", nargs="+", default=None, metavar="PORT",
+                       help="Simulate packets with the fluid flows as cross traffic at these router:next_hop ports, auto picks the most congested.")
+    parser.add_argument("--fluid-dt", type=float, default=1.0, help="Fluid model step in ticks.")
+    parser.add_argument("--bounded-memory", action="store_true", help="Cap throughput samples, run file rows, cwnd files and reorder state for very long runs.")
+    parser.add_argument("--memory-report", action="store_true", help=f"Measure memory per subsystem every {MEMORY_SAMPLE_TICKS} ticks into {MEMORY_FILE}.")
+    parser.add_argument("--until-steady", action="store_true", help=f"Stop once throughput reaches steady state at the target precision, --ticks is the limit. Estimates go to {STEADY_STATE_FILE}.")
+    parser.add_argument("--precision", type=float, default=0.05, help="Largest confidence interval half width relative to the mean for --until-steady.")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Confidence level of the intervals for --until-steady.")
+    parser.add_argument("--min-ticks", type=int, default=10000, help="Never stop early before this tick.")
+    parser.add_argument("--compress", default="none", choices=[c.value for c in Compression],
+                        help="Compress the Throughput and cwnd files, adding .gz or .zst to their names.")
+    parser.add_argument("--cache", nargs="?", const="", default=None, metavar="DIR",
+                        help="Copy the files of an identical earlier seeded run instead of simulating, and keep this one for later. "
+                             "DIR defaults to $EXPERIMENTS_CACHE or ~/.cache/experiments/runs.")
+    parser.add_argument("--cache-size-mb", type=int, default=2048, help="Least recently used runs are evicted to keep the cache under this size.")
+    args = parser.parse_args(argv)
+    # A terminated run unwinds like an interrupted one, so buffered output is still written
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+    if args.list_cc:
+        from Objects.CongestionControlRegistry import REGISTRY
+        print("\n".join(REGISTRY.names()))
+        return
+
+    if args.fluid:
+        run_fluid(args.config, args.ticks, args.output_dir, args.cc, args.fluid_dt, args.quiet)
+        return
+    options = dict(realtime=args.realtime, quiet=args.quiet, telemetry_port=args.telemetry_port, telemetry_socket=args.telemetry_socket,
+                   telemetry_every=args.telemetry_every, trace=args.trace, handoff=args.handoff, fluid_dt=args.fluid_dt,
+                   bounded_memory=args.bounded_memory, memory_report=args.memory_report, until_steady=args.until_steady,
+                   precision=args.precision, confidence=args.confidence, min_ticks=args.min_ticks, compression=args.compress)
+    if args.cache is None:
+        run(args.config, args.ticks, args.seed, args.output_dir, args.cc, **options)
+        return
+    from Objects.RunCache import RunCache
+    cache = RunCache(args.cache or None, args.cache_size_mb << 20)
+    if run_cached(cache, args.config, args.ticks, args.seed, args.output_dir, args.cc, **options):
+        print(f"Reused a cached run, files copied to {args.output_dir}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()